@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
 from apps.menu.models import MenuItem, MenuItemOption, MenuItemTopping
+from core.encoders import RawJSON, encode_list, get_encoder, serializer_column_names
+from core.projections import ProjectionRows
 
 
 class MenuItemToppingSerializer(serializers.Serializer):
@@ -44,6 +46,24 @@ class MenuItemSerializer(serializers.Serializer):
     options = MenuItemOptionSerializer(many=True, read_only=True)
     toppings = MenuItemToppingSerializer(many=True, read_only=True)
 
+    @classmethod
+    def to_raw_json(cls, menu_items) -> RawJSON:
+        """Encode menu items with their prefetched options and toppings straight to JSON."""
+        if isinstance(menu_items, ProjectionRows):
+            return menu_items.projection.to_raw_json(menu_items)
+
+        item_encoder = get_encoder(MenuItem, serializer_column_names(cls))
+        option_encoder = get_encoder(MenuItemOption, serializer_column_names(MenuItemOptionSerializer))
+        topping_encoder = get_encoder(MenuItemTopping, serializer_column_names(MenuItemToppingSerializer))
+
+        return encode_list(
+            item_encoder.encode(menu_item, {
+                'options': [option_encoder.encode(option) for option in menu_item.options],
+                'toppings': [topping_encoder.encode(topping) for topping in menu_item.toppings],
+            })
+            for menu_item in menu_items
+        )
+
     async def create(self, validated_data):
         """Create a new menu item with options and toppings."""
         options_data = self.initial_data.get('options', [])
@@ -1,44 +1,132 @@
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Union
 
 from apps.menu.models import MenuItem, MenuItemOption, MenuItemTopping
+from apps.orders.pricing import price_indexes
+from core.conditional import Validators, collection_validators
+from core.projections import Projection, ProjectionRows
+from core.streaming import DEFAULT_CHUNK_SIZE, iterate_chunks
 
 
 class MenuService:
+    # Columns shown on menu list screens, without the description
+    LIST_PROJECTION = Projection(MenuItem, (
+        'id', 'restaurant_id', 'name', 'image_url', 'original_price',
+        'discounted_price', 'points_required', 'is_active',
+    ))
+
     @staticmethod
-    async def get_all_menu_items(is_active: bool = True) -> List[MenuItem]:
+    async def get_all_menu_items(
+            is_active: bool = True,
+            projection: Optional[Projection] = None
+    ) -> Union[List[MenuItem], ProjectionRows]:
         """
         Retrieve all menu items, optionally filtered by active status.
 
         Args:
             is_active: Filter only active menu items if True
+            projection: Columns to read as plain rows instead of model instances
 
         Returns:
-            List of menu items with their options and toppings
+            List of menu items with their options and toppings, or projection rows
         """
         query = MenuItem.filter(is_active=is_active)
+        if projection:
+            return await projection.fetch(query)
         return await query.prefetch_related('options', 'toppings')
 
     @staticmethod
-    async def get_restaurant_menu_items(restaurant_id: str, is_active: bool = True) -> List[MenuItem]:
+    async def stream_all_menu_items(
+            is_active: bool = True,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            projection: Optional[Projection] = None
+    ) -> AsyncIterator[Union[List[MenuItem], ProjectionRows]]:
+        """
+        Stream all menu items in chunks, optionally filtered by active status.
+
+        Args:
+            is_active: Filter only active menu items if True
+            chunk_size: Number of menu items per chunk
+            projection: Columns to read as plain rows instead of model instances
+
+        Returns:
+            Async iterator of menu item chunks, each with its options and toppings,
+            or of projection row chunks
+        """
+        query = MenuItem.filter(is_active=is_active)
+        if projection:
+            async for chunk in iterate_chunks(query, chunk_size, projection.fetch):
+                yield chunk
+            return
+
+        async for chunk in iterate_chunks(query, chunk_size):
+            await MenuItem.fetch_for_list(chunk, 'options', 'toppings')
+            yield chunk
+
+    @staticmethod
+    async def get_restaurant_menu_items(
+            restaurant_id: str,
+            is_active: bool = True,
+            projection: Optional[Projection] = None
+    ) -> Union[List[MenuItem], ProjectionRows]:
         """
         Retrieve menu items for a specific restaurant, optionally filtered by active status.
 
         Args:
             restaurant_id: UUID of the restaurant
             is_active: Filter only active menu items if True
+            projection: Columns to read as plain rows instead of model instances
 
         Returns:
-            List of menu items with their options and toppings
+            List of menu items with their options and toppings, or projection rows
         """
         try:
             restaurant_uuid = uuid.UUID(restaurant_id)
             query = MenuItem.filter(restaurant_id=restaurant_uuid, is_active=is_active)
+            if projection:
+                return await projection.fetch(query)
             return await query.prefetch_related('options', 'toppings')
         except ValueError:
             # Handle invalid UUID
             return []
 
+    @staticmethod
+    async def get_menu_validators(
+            restaurant_id: Optional[str] = None,
+            is_active: bool = True,
+            compact: bool = False
+    ) -> Validators:
+        """
+        Compute the ETag of a menu item list.
+
+        Args:
+            restaurant_id: UUID of the restaurant, or None for all menu items
+            is_active: Filter only active menu items if True
+            compact: Whether the list is the LIST_PROJECTION representation
+
+        Returns:
+            Validators covering the menu items and their options and toppings
+        """
+        item_filter = {'is_active': is_active}
+        if restaurant_id:
+            try:
+                item_filter['restaurant_id'] = uuid.UUID(restaurant_id)
+            except ValueError:
+                # Invalid UUID, the list is always empty
+                return await collection_validators((), restaurant_id, is_active, compact)
+
+        child_filter = {f'item__{name}': value for name, value in item_filter.items()}
+        return await collection_validators(
+            (
+                MenuItem.filter(**item_filter),
+                MenuItemOption.filter(**child_filter),
+                MenuItemTopping.filter(**child_filter),
+            ),
+            restaurant_id,
+            is_active,
+            compact
+        )
+
     @staticmethod
     async def get_menu_item_by_id(item_id: str) -> Optional[MenuItem]:
         """
@@ -51,7 +139,7 @@ class MenuService:
             Menu item with its options and toppings, or None if not found
         """
         try:
-            item_uuid = uuid.UUID(item_id)
+            item_uuid = uuid.UUID(str(item_id))
             return await MenuItem.get_or_none(id=item_uuid).prefetch_related('options', 'toppings')
         except ValueError:
             # Handle invalid UUID
@@ -84,6 +172,8 @@ class MenuService:
         for topping_data in toppings_data:
             await MenuItemTopping.create(item_id=menu_item.id, **topping_data)
 
+        price_indexes.invalidate(restaurant_id)
+
         # Return the menu item with related objects
         return await MenuService.get_menu_item_by_id(str(menu_item.id))
 
@@ -129,6 +219,8 @@ class MenuService:
             for topping_data in toppings_data:
                 await MenuItemTopping.create(item_id=item_id, **topping_data)
 
+        price_indexes.invalidate(menu_item.restaurant_id)
+
         # Return the updated menu item with related objects
         return await MenuService.get_menu_item_by_id(str(item_id))
 
@@ -154,4 +246,5 @@ class MenuService:
 
         # Delete the menu item
         await menu_item.delete()
+        price_indexes.invalidate(menu_item.restaurant_id)
         return True
\ No newline at end of file
@@ -1,24 +1,42 @@
-from rest_framework.decorators import api_view, permission_classes
+from adrf.decorators import api_view
+from rest_framework.decorators import permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 
 from apps.menu.services import MenuService
 from apps.menu.serializers import MenuItemSerializer, MenuItemCreateUpdateSerializer
+from core.conditional import not_modified, set_validators
+from core.streaming import streaming_json_response
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 async def list_menu_items(request):
-    """List menu items, optionally filtered by restaurant."""
+    """List menu items, optionally filtered by restaurant; ?compact=true lists only the list columns."""
     restaurant_id = request.query_params.get('restaurant')
     is_active = request.query_params.get('is_active', 'true').lower() == 'true'
+    compact = request.query_params.get('compact', 'false').lower() == 'true'
+    projection = MenuService.LIST_PROJECTION if compact else None
 
-    if restaurant_id:
-        menu_items = await MenuService.get_restaurant_menu_items(restaurant_id, is_active)
-    else:
-        menu_items = await MenuService.get_all_menu_items(is_active)
+    # Menus change rarely, so answer polling clients with a 304 when possible
+    validators = await MenuService.get_menu_validators(restaurant_id, is_active, compact)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
 
-    return Response(await MenuItemSerializer(menu_items, many=True).data)
+    if not restaurant_id:
+        # The whole catalogue is unbounded, so stream it in chunks
+        async def encode_chunk(chunk):
+            return MenuItemSerializer.to_raw_json(chunk)
+
+        response = streaming_json_response(
+            MenuService.stream_all_menu_items(is_active, projection=projection),
+            encode_chunk
+        )
+        return set_validators(response, validators)
+
+    menu_items = await MenuService.get_restaurant_menu_items(restaurant_id, is_active, projection)
+    return set_validators(Response(MenuItemSerializer.to_raw_json(menu_items)), validators)
 
 
 @api_view(['GET'])
@@ -29,17 +47,17 @@ async def get_menu_item(request, pk):
     if not menu_item:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
-    return Response(await MenuItemSerializer(menu_item).data)
+    return Response(MenuItemSerializer(menu_item).data)
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 async def create_menu_item(request):
     """Create a new menu item."""
     serializer = MenuItemCreateUpdateSerializer(data=request.data)
-    if await serializer.is_valid(raise_exception=True):
+    if serializer.is_valid(raise_exception=True):
         restaurant_id = request.data.get('restaurant_id')
         menu_item = await MenuService.create_menu_item(restaurant_id, serializer.validated_data)
-        return Response(await MenuItemSerializer(menu_item).data, status=status.HTTP_201_CREATED)
+        return Response(MenuItemSerializer(menu_item).data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -52,9 +70,9 @@ async def update_menu_item(request, pk):
         return Response({"detail": "Menu item not found"}, status=status.HTTP_404_NOT_FOUND)
 
     serializer = MenuItemCreateUpdateSerializer(data=request.data)
-    if await serializer.is_valid(raise_exception=True):
+    if serializer.is_valid(raise_exception=True):
         updated_item = await MenuService.update_menu_item(menu_item.id, serializer.validated_data)
-        return Response(await MenuItemSerializer(updated_item).data)
+        return Response(MenuItemSerializer(updated_item).data)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -82,7 +100,7 @@ async def list_menu_item_options(request, item_id):
 
     options = await menu_item.options.all()
     from apps.menu.serializers import MenuItemOptionSerializer
-    return Response(await MenuItemOptionSerializer(options, many=True).data)
+    return Response(MenuItemOptionSerializer(options, many=True).data)
 
 
 @api_view(['GET'])
@@ -95,4 +113,4 @@ async def list_menu_item_toppings(request, item_id):
 
     toppings = await menu_item.toppings.all()
     from apps.menu.serializers import MenuItemToppingSerializer
-    return Response(await MenuItemToppingSerializer(toppings, many=True).data)
\ No newline at end of file
+    return Response(MenuItemToppingSerializer(toppings, many=True).data)
\ No newline at end of file
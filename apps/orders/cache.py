@@ -0,0 +1,143 @@
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+from django.conf import settings
+
+from core.encoders import RawJSON
+from core.redis import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# Version keys outlive every document stored under them. Versions are random
+# tokens, so when a key expires the order gets a new one, never an old
+# version still held in some process's LRU
+VERSION_TTL = 24 * 60 * 60
+
+LocalKey = Tuple[uuid.UUID, uuid.UUID]
+
+
+class OrderDocumentCache:
+    """
+    Read-through cache of serialized order details.
+
+    Every order has a version token in Redis, and its document is stored
+    under ``order:<id>:<user id>:<version>``. Write paths replace the version
+    after their transaction commits, which orphans the stored documents.
+    A read fetches the version first and only then the document (or the
+    order, on a miss), so a document loaded before a concurrent change
+    commits is always stored under an outdated version.
+
+    A small per-process LRU of (version, document) sits in front of Redis:
+    polling an unchanged order costs a single GET of its version.
+    """
+
+    def __init__(self):
+        self._local: 'OrderedDict[LocalKey, Tuple[str, RawJSON]]' = OrderedDict()
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, 'ORDER_CACHE_TTL', 300)
+
+    @property
+    def local_size(self) -> int:
+        return getattr(settings, 'ORDER_CACHE_LOCAL_SIZE', 1024)
+
+    @staticmethod
+    def version_key(order_id: uuid.UUID) -> str:
+        return f'order:{order_id}:version'
+
+    @staticmethod
+    def document_key(order_id: uuid.UUID, user_id: uuid.UUID, version: str) -> str:
+        # The owner is part of the key, so other users always miss and go
+        # through the ownership check of the loader
+        return f'order:{order_id}:{user_id}:{version}'
+
+    @staticmethod
+    def new_version() -> str:
+        return uuid.uuid4().hex
+
+    async def _version(self, order_id: uuid.UUID) -> str:
+        """Read the order's version, starting one if it has none (yet, or any more)."""
+        redis = get_redis()
+        version_key = self.version_key(order_id)
+        version = await redis.get(version_key)
+        if version is None:
+            # Concurrent readers may race to start it; SET NX keeps the first
+            await redis.set(version_key, self.new_version(), ex=VERSION_TTL, nx=True)
+            version = await redis.get(version_key)
+        return version.decode() if version is not None else self.new_version()
+
+    def _remember(self, key: LocalKey, version: str, document: RawJSON) -> None:
+        self._local[key] = (version, document)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def get(
+            self,
+            order_id: uuid.UUID,
+            user_id: uuid.UUID,
+            load: Callable[[], Awaitable[Optional[RawJSON]]]
+    ) -> Optional[RawJSON]:
+        """Return the user's order document, loading and storing it with load on a miss."""
+        try:
+            version = await self._version(order_id)
+        except Exception:
+            logger.exception("Order cache unavailable, loading order %s", order_id)
+            return await load()
+
+        key = (order_id, user_id)
+        cached = self._local.get(key)
+        if cached and cached[0] == version:
+            self._local.move_to_end(key)
+            return cached[1]
+
+        redis = get_redis()
+        document_key = self.document_key(order_id, user_id, version)
+        try:
+            document = await redis.get(document_key)
+        except Exception:
+            logger.exception("Order cache unavailable, loading order %s", order_id)
+            return await load()
+
+        if document is not None:
+            document = RawJSON(document)
+        else:
+            document = await load()
+            if document is None:
+                return None
+            try:
+                await redis.set(document_key, bytes(document), ex=self.ttl)
+            except Exception:
+                logger.exception("Could not cache order %s", order_id)
+                return document
+
+        self._remember(key, version, document)
+        return document
+
+    async def invalidate(self, *order_ids: uuid.UUID) -> None:
+        """
+        Drop the cached documents of orders; call after the change committed.
+
+        Failures are logged, never raised: the change is already saved and the
+        stale documents expire with the TTL.
+        """
+        if not order_ids:
+            return
+
+        for key in [key for key in self._local if key[0] in order_ids]:
+            del self._local[key]
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipeline:
+                for order_id in order_ids:
+                    pipeline.set(self.version_key(order_id), self.new_version(), ex=VERSION_TTL)
+                await pipeline.execute()
+        except Exception:
+            logger.exception("Could not invalidate cached orders %s", ', '.join(map(str, order_ids)))
+
+
+order_documents = OrderDocumentCache()
@@ -0,0 +1,87 @@
+import datetime
+import uuid
+from decimal import Decimal
+from typing import List, NamedTuple
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+
+# Copies the items of an order and their options and toppings to another
+# order in one statement, at current menu prices. Items, options and toppings
+# that were deactivated (or moved off the restaurant's menu) are skipped. The
+# new item ids are generated once in source_items, which is materialized
+# because it is referenced several times, so the copied modifiers can point at
+# their new parents. Returns one row per copied item with its line total.
+CLONE_ORDER_LINES_SQL = """
+WITH source_items AS (
+    SELECT order_items.id AS source_id,
+           gen_random_uuid() AS id,
+           order_items.item_id,
+           order_items.quantity,
+           order_items.special_instructions,
+           order_items.created_at AS source_created_at,
+           menu_items.name,
+           COALESCE(menu_items.discounted_price, menu_items.original_price) AS price
+    FROM order_items
+    JOIN menu_items ON menu_items.id = order_items.item_id
+    WHERE order_items.order_id = $1
+      AND menu_items.restaurant_id = $3
+      AND menu_items.is_active
+), new_items AS (
+    INSERT INTO order_items (id, order_id, item_id, quantity, price, special_instructions, created_at, updated_at)
+    SELECT id, $2, item_id, quantity, price, special_instructions, $4, $4
+    FROM source_items
+), new_options AS (
+    INSERT INTO order_item_options (id, order_item_id, option_id, quantity, price, created_at, updated_at)
+    SELECT gen_random_uuid(), source_items.id, order_item_options.option_id, order_item_options.quantity,
+           menu_item_options.price, $4, $4
+    FROM source_items
+    JOIN order_item_options ON order_item_options.order_item_id = source_items.source_id
+    JOIN menu_item_options ON menu_item_options.id = order_item_options.option_id
+    WHERE menu_item_options.item_id = source_items.item_id
+      AND menu_item_options.is_active
+    RETURNING order_item_id, quantity * price AS total
+), new_toppings AS (
+    INSERT INTO order_item_toppings (id, order_item_id, topping_id, quantity, price, created_at, updated_at)
+    SELECT gen_random_uuid(), source_items.id, order_item_toppings.topping_id, order_item_toppings.quantity,
+           menu_item_toppings.price, $4, $4
+    FROM source_items
+    JOIN order_item_toppings ON order_item_toppings.order_item_id = source_items.source_id
+    JOIN menu_item_toppings ON menu_item_toppings.id = order_item_toppings.topping_id
+    WHERE menu_item_toppings.item_id = source_items.item_id
+      AND menu_item_toppings.is_active
+    RETURNING order_item_id, quantity * price AS total
+)
+SELECT source_items.name,
+       source_items.quantity,
+       source_items.quantity * source_items.price
+       + COALESCE((SELECT sum(total) FROM new_options WHERE order_item_id = source_items.id), 0)
+       + COALESCE((SELECT sum(total) FROM new_toppings WHERE order_item_id = source_items.id), 0) AS total
+FROM source_items
+ORDER BY source_items.source_created_at, source_items.source_id
+"""
+
+
+class ClonedLine(NamedTuple):
+    name: str
+    quantity: int
+    total: Decimal
+
+
+async def clone_order_lines(
+        connection: BaseDBAsyncClient,
+        source_order_id: uuid.UUID,
+        order_id: uuid.UUID,
+        restaurant_id: uuid.UUID,
+        created_at: datetime.datetime
+) -> List[ClonedLine]:
+    """
+    Copy the still available items of an order to another order at current prices.
+
+    Runs as a single ``INSERT ... SELECT`` statement (PostgreSQL only); call it
+    inside the transaction that creates the new order.
+    """
+    _, rows = await connection.execute_query(
+        CLONE_ORDER_LINES_SQL, [source_order_id, order_id, restaurant_id, created_at]
+    )
+    return [ClonedLine(row['name'], row['quantity'], row['total']) for row in rows]
@@ -0,0 +1,91 @@
+import datetime
+import json
+import uuid
+from typing import Optional
+from urllib.parse import parse_qs
+
+from tortoise import timezone
+
+from apps.orders.events import encode_orders, feed_message, kitchen_group_name
+from apps.orders.services import OrderService
+from apps.restaurants.services import RestaurantService
+from core.websockets import TrackedWebsocketConsumer
+
+
+class KitchenConsumer(TrackedWebsocketConsumer):
+    """
+    Live order feed of one restaurant, for the restaurant's staff.
+
+    On connect the client gets a ``snapshot`` of the open orders, or, when it
+    passes the last cursor it saw as ``?since=``, a ``delta`` with every order
+    changed since then. After that it receives ``order.created``,
+    ``order.cancelled`` and ``order.completed`` events as they are committed.
+    Every message carries a cursor to reconnect with.
+    """
+
+    async def connect(self):
+        self.restaurant_id = uuid.UUID(str(self.scope['url_route']['kwargs']['restaurant_id']))
+        self.kitchen_group_name = kitchen_group_name(self.restaurant_id)
+
+        # Only the restaurant's own staff may follow its kitchen
+        user = self.scope.get('user')
+        if (
+                not user or not user.is_authenticated or not user.is_staff
+                or not await RestaurantService.is_staff_member(self.restaurant_id, user.id)
+        ):
+            await self.close()
+            return
+
+        # Join before reading the state, so no event falls in between; an
+        # order may then arrive twice, clients keep the latest by cursor
+        await self.channel_layer.group_add(
+            self.kitchen_group_name,
+            self.channel_name
+        )
+        await self.accept()
+
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        await self.send_state(self.parse_cursor(query.get('since', [None])[0]))
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(
+            self.kitchen_group_name,
+            self.channel_name
+        )
+
+    async def receive(self, text_data):
+        try:
+            data = json.loads(text_data)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            await self.send(text_data=json.dumps({'type': 'error', 'message': 'Messages must be JSON objects'}))
+            return
+        action = data.get('action')
+
+        if action == 'resync':
+            # Resend the state, e.g. after the client missed messages
+            await self.send_state(self.parse_cursor(data.get('since')))
+
+    async def order_event(self, event):
+        await self.send(text_data=event['message'])
+
+    @staticmethod
+    def parse_cursor(cursor: Optional[str]) -> Optional[datetime.datetime]:
+        if not cursor:
+            return None
+        try:
+            return datetime.datetime.fromisoformat(cursor.replace('Z', '+00:00'))
+        except ValueError:
+            # Unknown cursors get a full snapshot
+            return None
+
+    async def send_state(self, since: Optional[datetime.datetime] = None):
+        """Send a snapshot of the open orders, or the delta since a cursor."""
+        cursor = timezone.now()
+        orders = await OrderService.get_kitchen_orders(self.restaurant_id, since)
+        await self.send(text_data=feed_message(
+            'delta' if since else 'snapshot',
+            cursor,
+            orders=await encode_orders(orders)
+        ))
@@ -0,0 +1,66 @@
+import datetime
+import logging
+import uuid
+from typing import List, Optional, Union
+
+from channels.layers import get_channel_layer
+
+from apps.orders.models import Order
+from apps.orders.serializers import OrderSerializer
+from core.encoders import RawJSON, encode_value
+
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = 'order.created'
+ORDER_CANCELLED = 'order.cancelled'
+ORDER_COMPLETED = 'order.completed'
+
+
+def kitchen_group_name(restaurant_id: Union[str, uuid.UUID]) -> str:
+    """Channel layer group of a restaurant's kitchen feed."""
+    return f'kitchen_{restaurant_id}'
+
+
+def feed_message(message_type: str, cursor: datetime.datetime, **members) -> str:
+    """
+    Encode a kitchen feed message.
+
+    Every message carries a cursor, the update time it reflects; clients send
+    the last cursor they saw when reconnecting to get the changes since then.
+    """
+    return encode_value({'type': message_type, 'cursor': cursor, **members})
+
+
+async def encode_orders(orders: List[Order]) -> RawJSON:
+    """Encode orders with their items for the kitchen."""
+    return await OrderSerializer(raw_json=True).to_representation_list(orders)
+
+
+async def publish_order_event(event_type: str, order: Order, full: Optional[bool] = None) -> None:
+    """
+    Push an order event to the kitchen of the order's restaurant.
+
+    Called after the order's transaction has committed. Created orders are
+    sent in full; status changes only carry the order's id and status unless
+    full is set. Failures are logged, never raised: the order is already
+    saved and kitchens catch up with a delta on their next reconnect.
+    """
+    if full is None:
+        full = event_type == ORDER_CREATED
+
+    try:
+        if full:
+            payload = RawJSON(bytes(await encode_orders([order]))[1:-1])
+        else:
+            payload = {'id': order.id, 'status': order.status}
+
+        await get_channel_layer().group_send(
+            kitchen_group_name(order.restaurant_id),
+            {
+                'type': 'order.event',
+                'message': feed_message(event_type, order.updated_at, order=payload),
+            }
+        )
+    except Exception:
+        logger.exception("Could not publish %s for order %s", event_type, order.id)
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.orders.partitions import ARCHIVE_SCHEMA, PartitionService
+from core.db import run_with_tortoise
+
+
+class Command(BaseCommand):
+    help = "Detach monthly partitions of the order tables older than the retention period into an archive schema."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months',
+            type=int,
+            default=settings.ORDER_PARTITION_RETENTION_MONTHS,
+            help="Months kept in the hot tables, not counting the current one"
+        )
+        parser.add_argument('--schema', default=ARCHIVE_SCHEMA)
+        parser.add_argument('--dry-run', action='store_true', help="Only list the partitions that would be archived")
+
+    def handle(self, *args, **options):
+        archived = run_with_tortoise(
+            PartitionService.archive_partitions,
+            options['keep_months'],
+            options['schema'],
+            options['dry_run']
+        )
+
+        for name in archived:
+            self.stdout.write(name)
+        verb = "Would archive" if options['dry_run'] else "Archived"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(archived)} partitions into {options['schema']}"))
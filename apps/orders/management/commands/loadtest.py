@@ -0,0 +1,342 @@
+import asyncio
+import contextvars
+import json
+import logging
+import math
+import random
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from tortoise import Tortoise
+
+from apps.menu.models import MenuItem, MenuItemOption, MenuItemTopping
+from apps.payments.qr import qr_renderer
+from apps.restaurants.models import Restaurant, Table
+from apps.users.models import User
+from core.pydantic_registry import warm_pydantic_models
+from core.redis import close_redis
+
+
+# Query counter of the request being measured; requests run in their own
+# context, so concurrent virtual users never count each other's queries
+_request_queries: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    'loadtest_request_queries', default=None
+)
+
+
+class QueryCounter(logging.Handler):
+    """Counts the statements Tortoise logs while a request is measured."""
+
+    def emit(self, record):
+        counter = _request_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+    # Status and body of the first failed request
+    first_error: Optional[str] = None
+
+    def summary(self, elapsed: float) -> Dict[str, float]:
+        return {
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'rps': round(len(self.latencies) / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(percentile(self.latencies, 50) * 1000, 1),
+            'p95_ms': round(percentile(self.latencies, 95) * 1000, 1),
+            'p99_ms': round(percentile(self.latencies, 99) * 1000, 1),
+            'queries': round(sum(self.queries) / len(self.queries), 1) if self.queries else 0.0,
+            'first_error': self.first_error,
+        }
+
+
+class LoadTest:
+    """
+    Runs the ordering flow against the ASGI application in-process.
+
+    Every virtual user repeats the scenario browse menu, create order, create
+    a QRIS payment and have staff verify it; each request is timed and its
+    database queries are counted.
+    """
+
+    STEPS = ('browse menu', 'create order', 'create payment', 'verify payment')
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.restaurant_id: Optional[uuid.UUID] = None
+        self.table_id: Optional[uuid.UUID] = None
+        # (menu item id, option id, topping id) of the seeded menu
+        self.catalogue: List[Tuple[uuid.UUID, uuid.UUID, uuid.UUID]] = []
+        self.customer_tokens: List[str] = []
+        self.staff_token: Optional[str] = None
+
+    @staticmethod
+    def issue_token(user: User) -> str:
+        return str(AccessToken.for_user(user))
+
+    async def seed(self, users: int, menu_items: int) -> None:
+        """Create a restaurant with a table and menu, the customers and a cashier."""
+        suffix = uuid.uuid4().hex[:8]
+        restaurant = await Restaurant.create(name=f'Load test {suffix}')
+        table = await Table.create(restaurant=restaurant, table_number=suffix)
+        self.restaurant_id, self.table_id = restaurant.id, table.id
+
+        for n in range(menu_items):
+            item = await MenuItem.create(
+                restaurant=restaurant,
+                name=f'Item {n + 1}',
+                original_price=Decimal(15000 + 1000 * n)
+            )
+            option = await MenuItemOption.create(item=item, option_group='Size', name='Large', price=Decimal(5000))
+            topping = await MenuItemTopping.create(item=item, name='Extra cheese', price=Decimal(3000))
+            self.catalogue.append((item.id, option.id, topping.id))
+
+        for n in range(users):
+            customer = await User.create(
+                username=f'loadtest_{suffix}_{n}',
+                phone_number=f'lt{suffix}{n:06d}',
+                password=''
+            )
+            self.customer_tokens.append(self.issue_token(customer))
+
+        staff = await User.create(
+            username=f'loadtest_{suffix}_staff',
+            phone_number=f'lt{suffix}staff',
+            password='',
+            is_staff=True
+        )
+        self.staff_token = self.issue_token(staff)
+
+    async def request(
+            self,
+            name: str,
+            method: str,
+            url: str,
+            token: str,
+            expected_status: int,
+            **kwargs: Any
+    ) -> Optional[Any]:
+        """Send one timed request; return its JSON body, or None if it failed."""
+        counter = [0]
+        reset_token = _request_queries.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, url, headers={'Authorization': f'Bearer {token}'}, **kwargs
+            )
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_queries.reset(reset_token)
+
+        stats = self.stats[name]
+        stats.latencies.append(elapsed)
+        stats.queries.append(counter[0])
+        if response.status_code != expected_status:
+            stats.errors += 1
+            if stats.first_error is None:
+                stats.first_error = f"{response.status_code} {response.text[:200]}"
+            return None
+        return response.json()
+
+    async def scenario(self, token: str) -> None:
+        await self.request('browse menu', 'GET', f'/api/menu/items/?restaurant={self.restaurant_id}', token, 200)
+
+        items = []
+        for item_id, option_id, topping_id in random.sample(
+                self.catalogue, k=random.randint(1, min(3, len(self.catalogue)))
+        ):
+            items.append({
+                'item_id': str(item_id),
+                'quantity': random.randint(1, 3),
+                'options': [{'option_id': str(option_id), 'quantity': 1}] if random.random() < 0.5 else [],
+                'toppings': [{'topping_id': str(topping_id), 'quantity': 1}] if random.random() < 0.5 else [],
+            })
+
+        order = await self.request('create order', 'POST', '/api/orders/create/', token, 201, json={
+            'restaurant': str(self.restaurant_id),
+            'table': str(self.table_id),
+            'order_mode': 'dine_in',
+            'items': items,
+        })
+        if order is None:
+            return
+
+        payment = await self.request('create payment', 'POST', '/api/payments/create/', token, 201, json={
+            'order': order['id'],
+            'payment_type': 'qris',
+            'amount': str(order['total_amount']),
+        })
+        if payment is None:
+            return
+
+        await self.request(
+            'verify payment', 'POST', f"/api/payments/{payment['id']}/verify/", self.staff_token, 200,
+            json={'status': 'completed'}
+        )
+
+    async def virtual_user(self, token: str, iterations: int) -> None:
+        for _ in range(iterations):
+            await self.scenario(token)
+
+    async def run(self, iterations: int) -> float:
+        """Run every virtual user concurrently; return the elapsed seconds."""
+        started = time.perf_counter()
+        await asyncio.gather(*(self.virtual_user(token, iterations) for token in self.customer_tokens))
+        return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the ordering and payment flow against the ASGI application in-process "
+        "and report latency percentiles, requests per second and queries per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help="Concurrent virtual users")
+        parser.add_argument('--iterations', type=int, default=20, help="Scenarios run by each user")
+        parser.add_argument('--menu-items', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=1, help="Unmeasured scenarios run by each user first")
+        parser.add_argument(
+            '--db-url',
+            help="Tortoise database URL to test against instead of TORTOISE_ORM, e.g. sqlite://:memory:"
+        )
+        parser.add_argument('--generate-schemas', action='store_true', help="Create missing tables first")
+        parser.add_argument('--seed', type=int, help="Random seed, for repeatable carts")
+        parser.add_argument('--output', help="Write the report as JSON to this file")
+        parser.add_argument('--baseline', help="JSON report of an earlier run to compare against")
+
+    def handle(self, *args, **options):
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+
+        # The QR codes rendered for the load test's payments are thrown away
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            try:
+                report = asyncio.run(self.load_test(options))
+            finally:
+                qr_renderer.shutdown()
+        self.print_report(report, self.read_baseline(options['baseline']))
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        failed = self.failed_steps(report)
+        if failed:
+            raise CommandError(f"Load test failed: {'; '.join(failed)}")
+
+    async def load_test(self, options) -> Dict[str, Any]:
+        # The ASGI module sets up Django and builds the application on import
+        from eatsight.asgi import application
+
+        config = settings.TORTOISE_ORM
+        if options['db_url']:
+            config = {**config, 'connections': {'default': options['db_url']}}
+
+        await Tortoise.init(config=config)
+        if options['generate_schemas']:
+            await Tortoise.generate_schemas(safe=True)
+        warm_pydantic_models()
+
+        db_logger = logging.getLogger('tortoise.db_client')
+        previous_level, previous_propagate = db_logger.level, db_logger.propagate
+        counter = QueryCounter()
+        db_logger.addHandler(counter)
+        db_logger.setLevel(logging.DEBUG)
+        db_logger.propagate = False
+
+        try:
+            # httpx does not send lifespan events, Tortoise is initialized above
+            transport = httpx.ASGITransport(app=application)
+            async with httpx.AsyncClient(transport=transport, base_url='http://localhost') as client:
+                load_test = LoadTest(client)
+                await load_test.seed(options['users'], options['menu_items'])
+
+                if options['warmup']:
+                    await load_test.run(options['warmup'])
+                    load_test.stats.clear()
+
+                elapsed = await load_test.run(options['iterations'])
+        finally:
+            db_logger.removeHandler(counter)
+            db_logger.setLevel(previous_level)
+            db_logger.propagate = previous_propagate
+            await Tortoise.close_connections()
+            # The command's event loop ends here, the Redis connections go with it
+            await close_redis()
+
+        return {
+            'users': options['users'],
+            'iterations': options['iterations'],
+            'elapsed': round(elapsed, 3),
+            'endpoints': {name: stats.summary(elapsed) for name, stats in load_test.stats.items()},
+        }
+
+    @staticmethod
+    def failed_steps(report: Dict[str, Any]) -> List[str]:
+        """Steps of the scenario that were never reached or failed on every request."""
+        failed = []
+        for name in LoadTest.STEPS:
+            summary = report['endpoints'].get(name)
+            if not summary or not summary['requests']:
+                failed.append(f"{name} was never reached")
+            elif summary['errors'] >= summary['requests']:
+                failed.append(f"every {name} request failed, first with {summary['first_error']}")
+        return failed
+
+    @staticmethod
+    def read_baseline(path: Optional[str]) -> Dict[str, Dict[str, float]]:
+        if not path:
+            return {}
+        with open(path) as baseline:
+            return json.load(baseline)['endpoints']
+
+    def print_report(self, report: Dict[str, Any], baseline: Dict[str, Dict[str, float]]) -> None:
+        self.stdout.write(
+            f"{report['users']} users x {report['iterations']} scenarios in {report['elapsed']:.2f}s"
+        )
+        header = (
+            f"{'endpoint':<16}{'requests':>9}{'errors':>8}{'rps':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+        )
+        if baseline:
+            header += f"{'p95 vs base':>13}"
+        self.stdout.write(header)
+
+        for name, summary in report['endpoints'].items():
+            line = (
+                f"{name:<16}{summary['requests']:>9}{summary['errors']:>8}{summary['rps']:>9}"
+                f"{summary['p50_ms']:>9}{summary['p95_ms']:>9}{summary['p99_ms']:>9}{summary['queries']:>9}"
+            )
+            base = baseline.get(name)
+            if base and base['p95_ms']:
+                line += f"{(summary['p95_ms'] - base['p95_ms']) / base['p95_ms']:>+13.1%}"
+            if summary['errors']:
+                self.stdout.write(self.style.WARNING(line))
+                self.stdout.write(self.style.WARNING(f"  first error: {summary['first_error']}"))
+            else:
+                self.stdout.write(line)
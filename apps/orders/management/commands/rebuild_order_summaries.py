@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.models import Order
+from apps.orders.services import OrderSummaryService
+from core.db import run_with_tortoise
+from core.streaming import DEFAULT_CHUNK_SIZE, iterate_chunks
+
+
+class Command(BaseCommand):
+    help = "Rebuild the order_summaries read model from the order tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        total = run_with_tortoise(self.rebuild, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} order summaries"))
+
+    async def rebuild(self, chunk_size: int) -> int:
+        total = 0
+        async for orders in iterate_chunks(Order.all().order_by('id'), chunk_size):
+            total += await OrderSummaryService.rebuild(orders)
+        return total
@@ -23,11 +23,14 @@ class Order(Model):
 
     class Meta:
         table = "orders"
+        # Serve keyset pagination of a user's order history and the kitchen
+        # feed's changes-since queries
+        indexes = [("user_id", "created_at", "id"), ("restaurant_id", "updated_at")]
 
 
 class OrderItem(Model):
     id = fields.UUIDField(pk=True, default=uuid.uuid4)
-    order = fields.ForeignKeyField('models.Order', related_name='items')
+    order = fields.ForeignKeyField('models.Order', related_name='items', db_constraint=False)
     item = fields.ForeignKeyField('models.MenuItem', related_name='order_items')
     quantity = fields.IntField(default=1)
     price = fields.DecimalField(max_digits=10, decimal_places=2)
@@ -41,7 +44,7 @@ class OrderItem(Model):
 
 class OrderItemOption(Model):
     id = fields.UUIDField(pk=True, default=uuid.uuid4)
-    order_item = fields.ForeignKeyField('models.OrderItem', related_name='options')
+    order_item = fields.ForeignKeyField('models.OrderItem', related_name='options', db_constraint=False)
     option = fields.ForeignKeyField('models.MenuItemOption', related_name='order_item_options')
     quantity = fields.IntField(default=1)
     price = fields.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -54,7 +57,7 @@ class OrderItemOption(Model):
 
 class OrderItemTopping(Model):
     id = fields.UUIDField(pk=True, default=uuid.uuid4)
-    order_item = fields.ForeignKeyField('models.OrderItem', related_name='toppings')
+    order_item = fields.ForeignKeyField('models.OrderItem', related_name='toppings', db_constraint=False)
     topping = fields.ForeignKeyField('models.MenuItemTopping', related_name='order_item_toppings')
     quantity = fields.IntField(default=1)
     price = fields.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -62,4 +65,79 @@ class OrderItemTopping(Model):
     updated_at = fields.DatetimeField(auto_now=True)
 
     class Meta:
-        table = "order_item_toppings"
\ No newline at end of file
+        table = "order_item_toppings"
+
+
+class OrderSummary(Model):
+    """
+    Denormalized order history row, one per order.
+
+    Written in the same transaction as every change to the order it
+    summarizes (creation, vouchers, status and payments), so the history
+    endpoint reads this table alone. The primary key is the order's id.
+    """
+    id = fields.UUIDField(pk=True)
+    user = fields.ForeignKeyField('models.User', related_name='order_summaries')
+    restaurant_id = fields.UUIDField()
+    restaurant_name = fields.CharField(max_length=100)
+    status = fields.CharField(max_length=20, default='in_progress')
+    order_mode = fields.CharField(max_length=20, default='dine_in')
+    table_number = fields.CharField(max_length=10, null=True)
+    item_count = fields.IntField(default=0)
+    item_preview = fields.CharField(max_length=255, default='')
+    subtotal = fields.DecimalField(max_digits=10, decimal_places=2)
+    order_fee = fields.DecimalField(max_digits=10, decimal_places=2, default=0)
+    discount_amount = fields.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_amount = fields.DecimalField(max_digits=10, decimal_places=2)
+    payment_status = fields.CharField(max_length=20, null=True)
+    is_reviewed = fields.BooleanField(default=False)
+    # Creation time of the order, not of this row
+    created_at = fields.DatetimeField()
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "order_summaries"
+        # Serves the order history as one index range scan
+        indexes = [("user_id", "created_at", "id")]
+
+
+class RestaurantDailySales(Model):
+    """Completed-order totals of one restaurant on one (local) day."""
+    id = fields.UUIDField(pk=True, default=uuid.uuid4)
+    restaurant = fields.ForeignKeyField('models.Restaurant', related_name='daily_sales')
+    day = fields.DateField()
+    order_count = fields.IntField(default=0)
+    subtotal = fields.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_fee = fields.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount_amount = fields.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_amount = fields.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "restaurant_daily_sales"
+        unique_together = [("restaurant_id", "day")]
+
+
+class MenuItemDailySales(Model):
+    """Quantity and line revenue (before options, toppings and discounts) of one menu item on one day."""
+    id = fields.UUIDField(pk=True, default=uuid.uuid4)
+    restaurant = fields.ForeignKeyField('models.Restaurant', related_name='menu_item_daily_sales')
+    item = fields.ForeignKeyField('models.MenuItem', related_name='daily_sales')
+    day = fields.DateField()
+    quantity = fields.IntField(default=0)
+    revenue = fields.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "menu_item_daily_sales"
+        unique_together = [("item_id", "day")]
+        indexes = [("restaurant_id", "day")]
+
+
+class RollupWatermark(Model):
+    """Position up to which a rollup job has processed its source rows."""
+    name = fields.CharField(max_length=50, pk=True)
+    processed_until = fields.DatetimeField()
+
+    class Meta:
+        table = "rollup_watermarks"
@@ -0,0 +1,100 @@
+import datetime
+import re
+from typing import List, Tuple
+
+from tortoise import Tortoise, timezone
+from tortoise.transactions import in_transaction
+
+
+# Tables range partitioned by month on created_at; see
+# migrations/models/5_20261017120000_partition_order_tables.py and
+# migrations/models/8_20261017140000_move_default_partition_rows.py
+PARTITIONED_TABLES = ('orders', 'order_items', 'order_item_options', 'order_item_toppings', 'payments')
+
+ARCHIVE_SCHEMA = 'archive'
+
+
+def _add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionService:
+    """Creates upcoming monthly partitions of the order tables and archives old ones."""
+
+    @staticmethod
+    async def ensure_partitions(months_ahead: int = 3) -> int:
+        """
+        Create the partitions of the current month and months_ahead next ones; return how many were new.
+
+        Rows of a new month that already landed in the default partition are moved into it.
+        """
+        now = timezone.now()
+        until = now + datetime.timedelta(days=31 * months_ahead)
+        connection = Tortoise.get_connection('default')
+
+        created = 0
+        for table in PARTITIONED_TABLES:
+            _, rows = await connection.execute_query(
+                'SELECT create_monthly_partitions($1, $2, $3)', [table, now, until]
+            )
+            created += rows[0][0]
+        return created
+
+    @staticmethod
+    async def get_partitions(table: str) -> List[Tuple[str, datetime.date]]:
+        """Monthly partitions attached to table, as (name, first day of the month), oldest first."""
+        connection = Tortoise.get_connection('default')
+        _, rows = await connection.execute_query(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            JOIN pg_namespace ON pg_namespace.oid = parent.relnamespace
+            WHERE parent.relname = $1 AND pg_namespace.nspname = current_schema()
+            """,
+            [table]
+        )
+
+        pattern = re.compile(rf'^{re.escape(table)}_(\d{{4}})_(\d{{2}})$')
+        partitions = []
+        for row in rows:
+            match = pattern.match(row[0])
+            if match:
+                partitions.append((row[0], datetime.date(int(match[1]), int(match[2]), 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    @staticmethod
+    async def archive_partitions(
+            keep_months: int,
+            schema: str = ARCHIVE_SCHEMA,
+            dry_run: bool = False
+    ) -> List[str]:
+        """
+        Detach the partitions of every order table older than keep_months and move them to schema.
+
+        All tables are handled in one transaction, so an order and its items,
+        modifiers and payments leave the hot tables together. Archived rows
+        stay queryable as <schema>.<table>_YYYY_MM.
+
+        Returns:
+            The names of the archived partitions
+        """
+        current_month = timezone.now().date().replace(day=1)
+        cutoff = _add_months(current_month, -keep_months)
+
+        archived = []
+        statements = [f'CREATE SCHEMA IF NOT EXISTS "{schema}"']
+        for table in PARTITIONED_TABLES:
+            for name, month in await PartitionService.get_partitions(table):
+                if month >= cutoff:
+                    break
+                statements.append(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+                statements.append(f'ALTER TABLE "{name}" SET SCHEMA "{schema}"')
+                archived.append(name)
+
+        if archived and not dry_run:
+            async with in_transaction() as connection:
+                await connection.execute_script(';\n'.join(statements))
+        return archived
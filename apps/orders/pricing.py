@@ -0,0 +1,219 @@
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from apps.menu.models import MenuItem, MenuItemOption, MenuItemTopping
+from apps.vouchers.models import Voucher
+
+
+CENT = Decimal('0.01')
+
+
+@dataclass
+class PriceIndex:
+    """Current prices of one restaurant's active menu, keyed by id."""
+    restaurant_id: uuid.UUID
+    items: Dict[uuid.UUID, Decimal]
+    item_names: Dict[uuid.UUID, str]
+    # Modifier id -> (menu item id, price)
+    options: Dict[uuid.UUID, Tuple[uuid.UUID, Decimal]]
+    toppings: Dict[uuid.UUID, Tuple[uuid.UUID, Decimal]]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    async def load(cls, restaurant_id: uuid.UUID) -> 'PriceIndex':
+        """Read the restaurant's prices, one query per table."""
+        items = await MenuItem.filter(restaurant_id=restaurant_id, is_active=True).values_list(
+            'id', 'name', 'original_price', 'discounted_price'
+        )
+        options = await MenuItemOption.filter(
+            item__restaurant_id=restaurant_id, item__is_active=True, is_active=True
+        ).values_list('id', 'item_id', 'price')
+        toppings = await MenuItemTopping.filter(
+            item__restaurant_id=restaurant_id, item__is_active=True, is_active=True
+        ).values_list('id', 'item_id', 'price')
+
+        return cls(
+            restaurant_id=restaurant_id,
+            items={
+                item_id: discounted if discounted is not None else original
+                for item_id, _, original, discounted in items
+            },
+            item_names={item_id: name for item_id, name, _, _ in items},
+            options={option_id: (item_id, price) for option_id, item_id, price in options},
+            toppings={topping_id: (item_id, price) for topping_id, item_id, price in toppings},
+        )
+
+
+class PriceIndexCache:
+    """
+    Per-process cache of restaurant price indexes.
+
+    Entries expire after ``ORDER_PRICE_INDEX_TTL`` seconds and are dropped as
+    soon as the menu is changed through MenuService, so a stale price can only
+    survive in other processes and for at most the TTL.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[uuid.UUID, PriceIndex] = {}
+
+    @property
+    def ttl(self) -> float:
+        return getattr(settings, 'ORDER_PRICE_INDEX_TTL', 60)
+
+    async def get(self, restaurant_id: uuid.UUID) -> PriceIndex:
+        index = self._indexes.get(restaurant_id)
+        if index is None or time.monotonic() - index.loaded_at > self.ttl:
+            index = await PriceIndex.load(restaurant_id)
+            self._indexes[restaurant_id] = index
+        return index
+
+    def invalidate(self, restaurant_id: Optional[uuid.UUID] = None) -> None:
+        """Drop the index of one restaurant, or all of them."""
+        if restaurant_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(restaurant_id, None)
+
+
+price_indexes = PriceIndexCache()
+
+
+@dataclass
+class PricedModifier:
+    id: uuid.UUID
+    quantity: int
+    price: Decimal
+
+
+@dataclass
+class PricedLine:
+    item_id: uuid.UUID
+    name: str
+    quantity: int
+    price: Decimal
+    special_instructions: Optional[str]
+    options: List[PricedModifier]
+    toppings: List[PricedModifier]
+
+    @property
+    def total(self) -> Decimal:
+        return (
+            self.price * self.quantity
+            + sum((option.price * option.quantity for option in self.options), Decimal(0))
+            + sum((topping.price * topping.quantity for topping in self.toppings), Decimal(0))
+        )
+
+
+@dataclass
+class Quote:
+    """Server-side prices and totals of a cart."""
+    lines: List[PricedLine]
+    subtotal: Decimal
+    order_fee: Decimal
+    # Voucher id -> discount granted by that voucher
+    voucher_discounts: Dict[uuid.UUID, Decimal]
+    discount_amount: Decimal
+    total_amount: Decimal
+
+    def check(self, **expected: Optional[Decimal]) -> None:
+        """Raise ValueError if a client-side amount does not match the quote."""
+        for name, amount in expected.items():
+            if amount is not None and Decimal(amount).quantize(CENT) != getattr(self, name):
+                raise ValueError(f"Price mismatch on {name}: expected {getattr(self, name)}, got {amount}")
+
+
+def _quantity(data: Dict[str, Any]) -> int:
+    quantity = int(data.get('quantity', 1))
+    if quantity < 1:
+        raise ValueError("Quantity must be at least 1")
+    return quantity
+
+
+def _price_modifiers(
+        prices: Dict[uuid.UUID, Tuple[uuid.UUID, Decimal]],
+        modifiers_data: Iterable[Dict[str, Any]],
+        id_key: str,
+        item_id: uuid.UUID
+) -> List[PricedModifier]:
+    modifiers = []
+    for modifier_data in modifiers_data:
+        modifier_id = uuid.UUID(str(modifier_data[id_key]))
+        owner_id, price = prices.get(modifier_id, (None, None))
+        if owner_id != item_id:
+            raise ValueError(f"Unavailable {id_key.replace('_id', '')}: {modifier_id}")
+        modifiers.append(PricedModifier(modifier_id, _quantity(modifier_data), price))
+    return modifiers
+
+
+def voucher_discount(voucher: Voucher, subtotal: Decimal) -> Decimal:
+    """Discount a voucher grants on subtotal."""
+    if voucher.discount_percentage:
+        return (subtotal * voucher.discount_percentage / 100).quantize(CENT)
+    return voucher.value
+
+
+class PricingEngine:
+    @staticmethod
+    def price_cart(
+            index: PriceIndex,
+            items_data: List[Dict[str, Any]],
+            order_fee: Decimal = Decimal(0),
+            vouchers: Iterable[Voucher] = ()
+    ) -> Quote:
+        """Price a cart against a price index in one pass, applying vouchers in order."""
+        order_fee = Decimal(order_fee).quantize(CENT)
+        if order_fee < 0:
+            raise ValueError("Order fee cannot be negative")
+
+        lines = []
+        for item_data in items_data:
+            item_id = uuid.UUID(str(item_data['item_id']))
+            price = index.items.get(item_id)
+            if price is None:
+                raise ValueError(f"Unavailable menu item: {item_id}")
+
+            lines.append(PricedLine(
+                item_id=item_id,
+                name=index.item_names[item_id],
+                quantity=_quantity(item_data),
+                price=price,
+                special_instructions=item_data.get('special_instructions'),
+                options=_price_modifiers(index.options, item_data.get('options', ()), 'option_id', item_id),
+                toppings=_price_modifiers(index.toppings, item_data.get('toppings', ()), 'topping_id', item_id),
+            ))
+
+        subtotal = sum((line.total for line in lines), Decimal(0)).quantize(CENT)
+
+        # Vouchers can never take the discount past the subtotal
+        voucher_discounts = {}
+        remaining = subtotal
+        for voucher in vouchers:
+            discount = min(voucher_discount(voucher, subtotal), remaining)
+            voucher_discounts[voucher.id] = discount
+            remaining -= discount
+
+        discount_amount = subtotal - remaining
+        return Quote(
+            lines=lines,
+            subtotal=subtotal,
+            order_fee=order_fee,
+            voucher_discounts=voucher_discounts,
+            discount_amount=discount_amount,
+            total_amount=subtotal - discount_amount + order_fee,
+        )
+
+    @staticmethod
+    async def quote(
+            restaurant_id: uuid.UUID,
+            items_data: List[Dict[str, Any]],
+            order_fee: Decimal = Decimal(0),
+            vouchers: Iterable[Voucher] = ()
+    ) -> Quote:
+        """Price a cart with the restaurant's cached price index."""
+        index = await price_indexes.get(restaurant_id)
+        return PricingEngine.price_cart(index, items_data, order_fee, vouchers)
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from apps.orders import consumers
+
+websocket_urlpatterns = [
+    path('ws/kitchen/<uuid:restaurant_id>/', consumers.KitchenConsumer.as_asgi()),
+]
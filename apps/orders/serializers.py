@@ -1,9 +1,15 @@
 from rest_framework import serializers
 from core.serializers import TortoiseSerializer
+from apps.menu.models import MenuItem, MenuItemOption, MenuItemTopping
 from apps.menu.serializers import MenuItemSerializer
+from apps.orders.models import OrderItem, OrderItemOption, OrderItemTopping
+from apps.payments.models import Payment
+from apps.restaurants.models import Restaurant, Table
 
 
 class OrderItemToppingSerializer(TortoiseSerializer):
+    model_name = 'OrderItemTopping'
+
     id = serializers.UUIDField(read_only=True)
     order_item_id = serializers.UUIDField()
     topping_id = serializers.UUIDField()
@@ -11,22 +17,23 @@ class OrderItemToppingSerializer(TortoiseSerializer):
     quantity = serializers.IntegerField(default=1)
     price = serializers.DecimalField(max_digits=10, decimal_places=2, default=0)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance, exclude={'topping'})
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        await loader.load_related(instances, 'topping', MenuItemTopping)
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Include topping name
-        if hasattr(instance, 'topping'):
-            topping = await instance.topping
+        topping = loader.get(MenuItemTopping, instance.topping_id)
+        if topping:
             data['topping_name'] = topping.name
 
         return data
 
-    async def to_representation_list(self, instances):
-        return [await self.to_representation(instance) for instance in instances]
-
 
 class OrderItemOptionSerializer(TortoiseSerializer):
+    model_name = 'OrderItemOption'
+
     id = serializers.UUIDField(read_only=True)
     order_item_id = serializers.UUIDField()
     option_id = serializers.UUIDField()
@@ -35,23 +42,24 @@ class OrderItemOptionSerializer(TortoiseSerializer):
     quantity = serializers.IntegerField(default=1)
     price = serializers.DecimalField(max_digits=10, decimal_places=2, default=0)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance, exclude={'option'})
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        await loader.load_related(instances, 'option', MenuItemOption)
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Include option details
-        if hasattr(instance, 'option'):
-            option = await instance.option
+        option = loader.get(MenuItemOption, instance.option_id)
+        if option:
             data['option_name'] = option.name
             data['option_group'] = option.option_group
 
         return data
 
-    async def to_representation_list(self, instances):
-        return [await self.to_representation(instance) for instance in instances]
-
 
 class OrderItemSerializer(TortoiseSerializer):
+    model_name = 'OrderItem'
+
     id = serializers.UUIDField(read_only=True)
     order_id = serializers.UUIDField()
     item_id = serializers.UUIDField()
@@ -62,16 +70,22 @@ class OrderItemSerializer(TortoiseSerializer):
     toppings = OrderItemToppingSerializer(many=True, read_only=True)
     item_details = serializers.DictField(read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(
-            instance,
-            exclude={'options', 'toppings', 'item'}
-        )
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        item_ids = [instance.id for instance in instances]
+        await loader.load_related(instances, 'item', MenuItem)
+
+        options = await loader.load_children(OrderItemOption, 'order_item', item_ids)
+        await OrderItemOptionSerializer().load_batch(options, loader)
+
+        toppings = await loader.load_children(OrderItemTopping, 'order_item', item_ids)
+        await OrderItemToppingSerializer().load_batch(toppings, loader)
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Include item details
-        if hasattr(instance, 'item'):
-            item = await instance.item
+        item = loader.get(MenuItem, instance.item_id)
+        if item:
             data['item_details'] = {
                 'id': str(item.id),
                 'name': item.name,
@@ -79,29 +93,34 @@ class OrderItemSerializer(TortoiseSerializer):
             }
 
         # Include options
-        if hasattr(instance, 'options'):
-            options = await instance.options.all().prefetch_related('option')
-            data['options'] = await OrderItemOptionSerializer().to_representation_list(options)
+        options = loader.children(OrderItemOption, 'order_item', instance.id)
+        option_serializer = self.nested(OrderItemOptionSerializer)
+        data['options'] = [await option_serializer.to_representation(option, loader) for option in options]
 
         # Include toppings
-        if hasattr(instance, 'toppings'):
-            toppings = await instance.toppings.all().prefetch_related('topping')
-            data['toppings'] = await OrderItemToppingSerializer().to_representation_list(toppings)
+        toppings = loader.children(OrderItemTopping, 'order_item', instance.id)
+        topping_serializer = self.nested(OrderItemToppingSerializer)
+        data['toppings'] = [await topping_serializer.to_representation(topping, loader) for topping in toppings]
 
         # Calculate total price
-        item_total = data['price'] * data['quantity']
-        options_total = sum(option['price'] * option['quantity'] for option in data.get('options', []))
-        toppings_total = sum(topping['price'] * topping['quantity'] for topping in data.get('toppings', []))
+        item_total = instance.price * instance.quantity
+        options_total = sum(option.price * option.quantity for option in options)
+        toppings_total = sum(topping.price * topping.quantity for topping in toppings)
 
         data['total_price'] = item_total + options_total + toppings_total
 
         return data
 
-    async def to_representation_list(self, instances):
-        return [await self.to_representation(instance) for instance in instances]
-
 
 class OrderSerializer(TortoiseSerializer):
+    model_name = 'Order'
+    relation_fields = {
+        'restaurant_name': 'restaurant',
+        'table_number': 'table',
+        'items': 'items',
+        'payment_status': 'payments',
+    }
+
     id = serializers.UUIDField(read_only=True)
     user_id = serializers.UUIDField(read_only=True)
     restaurant_id = serializers.UUIDField()
@@ -119,36 +138,66 @@ class OrderSerializer(TortoiseSerializer):
     order_date = serializers.DateTimeField(read_only=True)
     items = OrderItemSerializer(many=True, read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(
-            instance,
-            exclude={'items', 'restaurant', 'table', 'payment_method'}
-        )
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        order_ids = [instance.id for instance in instances]
+        if self.wants_relation('restaurant'):
+            await loader.load_related(instances, 'restaurant', Restaurant)
+        if self.wants_relation('table'):
+            await loader.load_related(instances, 'table', Table)
+
+        if self.wants_relation('items'):
+            items = await loader.load_children(OrderItem, 'order', order_ids)
+            await OrderItemSerializer().load_batch(items, loader)
+
+        if self.wants_relation('payments'):
+            # Latest payment first
+            await loader.load_children(Payment, 'order', order_ids, order_by='-created_at')
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Include restaurant details
-        if hasattr(instance, 'restaurant'):
-            restaurant = await instance.restaurant
+        restaurant = loader.get(Restaurant, instance.restaurant_id)
+        if restaurant:
             data['restaurant_name'] = restaurant.name
 
         # Include table details
-        if hasattr(instance, 'table') and instance.table_id:
-            table = await instance.table
+        table = loader.get(Table, instance.table_id)
+        if table:
             data['table_number'] = table.table_number
 
         # Include items
-        if hasattr(instance, 'items'):
-            items = await instance.items.all().prefetch_related('item', 'options', 'toppings')
-            data['items'] = await OrderItemSerializer().to_representation_list(items)
+        item_serializer = self.nested(OrderItemSerializer)
+        data['items'] = [
+            await item_serializer.to_representation(item, loader)
+            for item in loader.children(OrderItem, 'order', instance.id)
+        ]
 
         # Include payments status if any
-        if hasattr(instance, 'payments'):
-            payments = await instance.payments.all()
-            if payments:
-                latest_payment = payments[0]  # Assuming the first is the latest
-                data['payment_status'] = latest_payment.status
+        payments = loader.children(Payment, 'order', instance.id)
+        if payments:
+            latest_payment = payments[0]
+            data['payment_status'] = latest_payment.status
 
         return data
 
-    async def to_representation_list(self, instances):
-        return [await self.to_representation(instance) for instance in instances]
\ No newline at end of file
+
+class OrderSummarySerializer(TortoiseSerializer):
+    model_name = 'OrderSummary'
+
+    id = serializers.UUIDField(read_only=True)
+    user_id = serializers.UUIDField(read_only=True)
+    restaurant_id = serializers.UUIDField(read_only=True)
+    restaurant_name = serializers.CharField(read_only=True)
+    status = serializers.CharField(read_only=True)
+    order_mode = serializers.CharField(read_only=True)
+    table_number = serializers.CharField(read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
+    item_preview = serializers.CharField(read_only=True)
+    subtotal = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    order_fee = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    discount_amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    payment_status = serializers.CharField(read_only=True)
+    is_reviewed = serializers.BooleanField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
@@ -1,156 +1,424 @@
+import datetime
 import uuid
 from decimal import Decimal
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Sequence, Tuple, Union
 
-from tortoise.transactions import atomic
+from tortoise import timezone
+from tortoise.transactions import atomic, in_transaction
 
-from apps.orders.models import Order, OrderItem, OrderItemOption, OrderItemTopping
-from apps.vouchers.models import Voucher, UserVoucher, OrderVoucher
+from apps.menu.models import MenuItem
+from apps.orders.cache import order_documents
+from apps.orders.cloning import clone_order_lines
+from apps.orders.events import ORDER_CANCELLED, ORDER_COMPLETED, ORDER_CREATED, publish_order_event
+from apps.orders.models import Order, OrderItem, OrderItemOption, OrderItemTopping, OrderSummary
+from apps.orders.serializers import OrderSerializer
+from apps.orders.pricing import CENT, PricingEngine
+from apps.orders.states import order_states
+from apps.payments.models import Payment
+from apps.restaurants.models import Restaurant, Table
+from apps.vouchers.redemption import lock_user_vouchers, redeem_user_vouchers
+from core.encoders import RawJSON
+from core.loaders import BatchLoader
+from core.pagination import KeysetPagination
+from core.projections import Projection, ProjectionRows
 
 
 class OrderService:
     @staticmethod
     async def get_by_id(order_id: uuid.UUID, user_id: Optional[uuid.UUID] = None) -> Optional[Order]:
-        """Get order by ID, optionally filtering by user."""
+        """
+        Get order by ID, optionally filtering by user.
+
+        Items, options and toppings are not prefetched: OrderSerializer loads
+        them in batches.
+        """
         query = Order.get_or_none(id=order_id)
         if user_id:
             query = Order.get_or_none(id=order_id, user_id=user_id)
 
-        return await query.prefetch_related(
-            'items__options__option',
-            'items__toppings__topping',
-            'items__item'
-        )
+        return await query
+
+    @staticmethod
+    async def get_order_document(order_id: uuid.UUID, user_id: uuid.UUID) -> Optional[RawJSON]:
+        """Get the user's serialized order detail, through the order document cache."""
+        async def load() -> Optional[RawJSON]:
+            order = await OrderService.get_by_id(order_id, user_id)
+            if not order:
+                return None
+            return await OrderSerializer(raw_json=True).to_representation(order)
+
+        return await order_documents.get(order_id, user_id, load)
 
     @staticmethod
-    async def get_user_orders(user_id: uuid.UUID, status: Optional[str] = None) -> List[Order]:
-        """Get all orders for a user, optionally filtering by status."""
+    async def get_user_orders(
+            user_id: uuid.UUID,
+            status: Optional[str] = None,
+            projection: Optional[Projection] = None,
+            paginator: Optional[KeysetPagination] = None,
+            only: Optional[Sequence[str]] = None
+    ) -> Union[List[Order], ProjectionRows]:
+        """Get a user's orders, optionally filtered by status, projected and/or paginated."""
         query = Order.filter(user_id=user_id)
         if status:
             query = query.filter(status=status)
 
-        return await query.order_by('-created_at').prefetch_related(
-            'restaurant',
-            'items__item'
-        )
+        if only and not projection:
+            # Sparse fieldsets: load only the requested columns (plus the ordering key)
+            query = query.only(*{*only, 'created_at'})
+
+        if paginator:
+            return await paginator.paginate_queryset(query, projection.fetch if projection else None)
+
+        query = query.order_by('-created_at')
+        if projection:
+            return await projection.fetch(query)
+        return await query
 
     @staticmethod
-    @atomic()
     async def create_order(
             user_id: uuid.UUID,
             restaurant_id: uuid.UUID,
             order_mode: str,
-            subtotal: Decimal,
-            order_fee: Decimal,
-            discount_amount: Decimal,
-            total_amount: Decimal,
+            subtotal: Optional[Decimal] = None,
+            order_fee: Decimal = Decimal(0),
+            discount_amount: Optional[Decimal] = None,
+            total_amount: Optional[Decimal] = None,
             table_id: Optional[uuid.UUID] = None,
             payment_method_id: Optional[uuid.UUID] = None,
             items_data: Optional[List[Dict[str, Any]]] = None,
             voucher_ids: Optional[List[uuid.UUID]] = None
     ) -> Order:
-        """Create a new order with items, options, and toppings."""
-        # Create order
-        order = await Order.create(
-            user_id=user_id,
-            restaurant_id=restaurant_id,
-            status="in_progress",
-            order_mode=order_mode,
-            table_id=table_id,
-            subtotal=subtotal,
-            order_fee=order_fee,
-            discount_amount=discount_amount,
-            total_amount=total_amount,
-            payment_method_id=payment_method_id
-        )
+        """
+        Create a new order with items, options, and toppings.
 
-        # Add items
-        if items_data:
-            for item_data in items_data:
-                # Create order item
-                order_item = await OrderItem.create(
-                    order_id=order.id,
-                    item_id=item_data['item_id'],
-                    quantity=item_data.get('quantity', 1),
-                    price=item_data['price'],
-                    special_instructions=item_data.get('special_instructions')
-                )
-
-                # Add options
-                if 'options' in item_data:
-                    for option_data in item_data['options']:
-                        await OrderItemOption.create(
-                            order_item_id=order_item.id,
-                            option_id=option_data['option_id'],
-                            quantity=option_data.get('quantity', 1),
-                            price=option_data.get('price', 0)
-                        )
-
-                # Add toppings
-                if 'toppings' in item_data:
-                    for topping_data in item_data['toppings']:
-                        await OrderItemTopping.create(
-                            order_item_id=order_item.id,
-                            topping_id=topping_data['topping_id'],
-                            quantity=topping_data.get('quantity', 1),
-                            price=topping_data.get('price', 0)
-                        )
-
-        # Apply vouchers
-        if voucher_ids:
-            for voucher_id in voucher_ids:
-                user_voucher = await UserVoucher.get_or_none(
-                    user_id=user_id,
-                    voucher_id=voucher_id,
-                    is_used=False
-                )
-
-                if user_voucher:
-                    # Mark voucher as used
-                    user_voucher.is_used = True
-                    user_voucher.order_id = order.id
-                    await user_voucher.save()
-
-                    # Create order voucher
-                    voucher = await Voucher.get(id=voucher_id)
-
-                    # Calculate discount amount
-                    Decimal(0)
-                    if voucher.discount_percentage:
-                        discount = subtotal * (voucher.discount_percentage / 100)
-                    else:
-                        discount = voucher.value
-
-                    await OrderVoucher.create(
+        Prices and totals come from the pricing engine; subtotal, discount_amount
+        and total_amount as quoted to the client are only checked against them.
+        """
+        async with in_transaction():
+            # Lock the user's unused vouchers, one per requested voucher
+            user_vouchers = {}
+            if voucher_ids:
+                user_vouchers = await lock_user_vouchers(user_id, voucher_ids=voucher_ids)
+                missing = set(voucher_ids) - set(user_vouchers)
+                if missing:
+                    raise ValueError(f"Vouchers not available: {', '.join(sorted(map(str, missing)))}")
+
+            quote = await PricingEngine.quote(
+                restaurant_id,
+                items_data or [],
+                order_fee,
+                [user_voucher.voucher for user_voucher in user_vouchers.values()]
+            )
+            quote.check(subtotal=subtotal, discount_amount=discount_amount, total_amount=total_amount)
+
+            # Create order
+            order = await Order.create(
+                user_id=user_id,
+                restaurant_id=restaurant_id,
+                status="in_progress",
+                order_mode=order_mode,
+                table_id=table_id,
+                subtotal=quote.subtotal,
+                order_fee=quote.order_fee,
+                discount_amount=quote.discount_amount,
+                total_amount=quote.total_amount,
+                payment_method_id=payment_method_id
+            )
+
+            # Add items, options and toppings with one multi-row insert per table;
+            # ids are generated client side so children can reference their parents
+            if quote.lines:
+                order_items, options, toppings = [], [], []
+                for line in quote.lines:
+                    order_item = OrderItem(
+                        id=uuid.uuid4(),
                         order_id=order.id,
-                        voucher_id=voucher_id,
-                        user_voucher_id=user_voucher.id,
-                        discount_amount=discount
+                        item_id=line.item_id,
+                        quantity=line.quantity,
+                        price=line.price,
+                        special_instructions=line.special_instructions
                     )
+                    order_items.append(order_item)
+
+                    # Add options
+                    for option in line.options:
+                        options.append(OrderItemOption(
+                            id=uuid.uuid4(),
+                            order_item_id=order_item.id,
+                            option_id=option.id,
+                            quantity=option.quantity,
+                            price=option.price
+                        ))
 
-        # Return the full order
-        return await OrderService.get_by_id(order.id)
+                    # Add toppings
+                    for topping in line.toppings:
+                        toppings.append(OrderItemTopping(
+                            id=uuid.uuid4(),
+                            order_item_id=order_item.id,
+                            topping_id=topping.id,
+                            quantity=topping.quantity,
+                            price=topping.price
+                        ))
+
+                await OrderItem.bulk_create(order_items)
+                if options:
+                    await OrderItemOption.bulk_create(options)
+                if toppings:
+                    await OrderItemTopping.bulk_create(toppings)
+
+            # Apply vouchers
+            await redeem_user_vouchers(order.id, user_vouchers.values(), quote.voucher_discounts)
+
+            await OrderSummaryService.create(order, ((line.name, line.quantity) for line in quote.lines))
+
+        # Tell the kitchen once the order is committed
+        order = await OrderService.get_by_id(order.id)
+        await publish_order_event(ORDER_CREATED, order)
+        return order
+
+    @staticmethod
+    async def reorder(
+            order_id: uuid.UUID,
+            user_id: uuid.UUID,
+            table_id: Optional[uuid.UUID] = None
+    ) -> Order:
+        """
+        Place a new order with the items of one of the user's past orders.
+
+        Items, options and toppings are copied in SQL at current menu prices,
+        skipping what is no longer available; vouchers are not carried over.
+        The new order is placed at table_id, which must be a table of the same
+        restaurant, or at the past order's table.
+        """
+        source = await Order.get_or_none(id=order_id, user_id=user_id)
+        if not source:
+            raise ValueError("Order not found or does not belong to user")
+        if table_id and not await Table.exists(id=table_id, restaurant_id=source.restaurant_id):
+            raise ValueError("Table not found in this restaurant")
+
+        now = timezone.now()
+        async with in_transaction() as connection:
+            # The order goes in first, so its items never reference a missing
+            # order; the totals follow once the items are priced
+            order = await Order.create(
+                user_id=user_id,
+                restaurant_id=source.restaurant_id,
+                status="in_progress",
+                order_mode=source.order_mode,
+                table_id=table_id or source.table_id,
+                subtotal=Decimal(0),
+                order_fee=source.order_fee,
+                discount_amount=Decimal(0),
+                total_amount=source.order_fee,
+                payment_method_id=source.payment_method_id,
+                # The copied items are stamped with the same time
+                created_at=now
+            )
+
+            lines = await clone_order_lines(connection, source.id, order.id, source.restaurant_id, now)
+            if not lines:
+                raise ValueError("None of the items of this order are available anymore")
+
+            order.subtotal = sum((line.total for line in lines), Decimal(0)).quantize(CENT)
+            order.total_amount = order.subtotal + order.order_fee
+            await Order.filter(id=order.id).update(subtotal=order.subtotal, total_amount=order.total_amount)
+
+            await OrderSummaryService.create(order, ((line.name, line.quantity) for line in lines))
+
+        # Tell the kitchen once the order is committed
+        order = await OrderService.get_by_id(order.id)
+        await publish_order_event(ORDER_CREATED, order)
+        return order
 
     @staticmethod
     async def cancel_order(order_id: uuid.UUID, user_id: uuid.UUID) -> bool:
         """Cancel an order if it's in progress and belongs to the user."""
-        order = await Order.get_or_none(id=order_id, user_id=user_id)
+        async with in_transaction():
+            order = await order_states.transition(order_id, 'cancelled', filters={'user_id': user_id})
+            if not order:
+                return False
 
-        if not order or order.status != "in_progress":
-            return False
+            await OrderSummaryService.set_status(order_id, order.status)
 
-        order.status = "cancelled"
-        await order.save()
+        await order_documents.invalidate(order_id)
+        await publish_order_event(ORDER_CANCELLED, order)
         return True
 
     @staticmethod
     async def complete_order(order_id: uuid.UUID) -> bool:
         """Mark an order as completed."""
-        order = await Order.get_or_none(id=order_id)
+        async with in_transaction():
+            order = await order_states.transition(order_id, 'completed')
+            if not order:
+                return False
+
+            await OrderSummaryService.set_status(order_id, order.status)
+
+        await order_documents.invalidate(order_id)
+        await publish_order_event(ORDER_COMPLETED, order)
+        return True
+
+    @staticmethod
+    async def get_kitchen_orders(
+            restaurant_id: uuid.UUID,
+            since: Optional[datetime.datetime] = None
+    ) -> List[Order]:
+        """Get the open orders of a restaurant, or every order changed after since."""
+        if since:
+            query = Order.filter(restaurant_id=restaurant_id, updated_at__gt=since)
+        else:
+            query = Order.filter(restaurant_id=restaurant_id, status='in_progress')
+        return await query.order_by('updated_at', 'id')
+
+
+class OrderSummaryService:
+    # Longest item preview stored, e.g. "2x Nasi Goreng, Es Teh +3 more"
+    PREVIEW_LENGTH = 255
+
+    @staticmethod
+    def build_preview(lines: Iterable[Tuple[str, int]]) -> str:
+        """Build the short item-name preview of an order from (name, quantity) lines."""
+        lines = list(lines)
+        names = [f"{quantity}x {name}" if quantity > 1 else name for name, quantity in lines]
+
+        preview = ''
+        for shown, name in enumerate(names):
+            candidate = f"{preview}, {name}" if preview else name
+            rest = len(names) - shown - 1
+            suffix = f" +{rest} more" if rest else ''
+            if len(candidate) + len(suffix) > OrderSummaryService.PREVIEW_LENGTH:
+                if not preview:
+                    return candidate[:OrderSummaryService.PREVIEW_LENGTH]
+                return f"{preview} +{len(names) - shown} more"
+            preview = candidate
+        return preview
+
+    @staticmethod
+    async def create(order: Order, lines: Iterable[Tuple[str, int]]) -> OrderSummary:
+        """Write the summary of a new order from its (item name, quantity) lines."""
+        lines = list(lines)
+        restaurant_name = await Restaurant.filter(id=order.restaurant_id).first().values_list('name', flat=True)
+        table_number = None
+        if order.table_id:
+            table_number = await Table.filter(id=order.table_id).first().values_list('table_number', flat=True)
+
+        return await OrderSummary.create(
+            id=order.id,
+            user_id=order.user_id,
+            restaurant_id=order.restaurant_id,
+            restaurant_name=restaurant_name or '',
+            status=order.status,
+            order_mode=order.order_mode,
+            table_number=table_number,
+            item_count=sum(quantity for _, quantity in lines),
+            item_preview=OrderSummaryService.build_preview(lines),
+            subtotal=order.subtotal,
+            order_fee=order.order_fee,
+            discount_amount=order.discount_amount,
+            total_amount=order.total_amount,
+            created_at=order.created_at
+        )
+
+    @staticmethod
+    async def get_user_summaries(
+            user_id: uuid.UUID,
+            status: Optional[str] = None,
+            paginator: Optional[KeysetPagination] = None,
+            only: Optional[Sequence[str]] = None
+    ) -> List[OrderSummary]:
+        """Get a user's order history, newest first, optionally filtered by status and paginated."""
+        query = OrderSummary.filter(user_id=user_id)
+        if status:
+            query = query.filter(status=status)
+
+        if only:
+            # Sparse fieldsets: load only the requested columns (plus the ordering key)
+            query = query.only(*{*only, 'created_at'})
+
+        if paginator:
+            return await paginator.paginate_queryset(query)
+        return await query.order_by('-created_at', '-id')
+
+    @staticmethod
+    async def set_status(order_id: uuid.UUID, status: str) -> None:
+        """Copy a new order status to its summary."""
+        await OrderSummary.filter(id=order_id).update(status=status)
+
+    @staticmethod
+    async def set_payment_status(order_id: uuid.UUID, payment_status: str) -> None:
+        """Record the status of the order's latest payment."""
+        await OrderSummary.filter(id=order_id).update(payment_status=payment_status)
+
+    @staticmethod
+    async def set_statuses(order_ids: Iterable[uuid.UUID], status: str) -> None:
+        """Copy a new status shared by many orders to their summaries with one update."""
+        await OrderSummary.filter(id__in=list(order_ids)).update(status=status)
+
+    @staticmethod
+    async def set_payment_statuses(order_ids: Iterable[uuid.UUID], payment_status: str) -> None:
+        """Record a payment status shared by the latest payments of many orders with one update."""
+        await OrderSummary.filter(id__in=list(order_ids)).update(payment_status=payment_status)
+
+    @staticmethod
+    async def mark_reviewed(order_id: uuid.UUID) -> None:
+        """Flag the summary of a reviewed order."""
+        await OrderSummary.filter(id=order_id).update(is_reviewed=True)
+
+    @staticmethod
+    async def set_totals(order: Order) -> None:
+        """Copy the order's amounts to its summary, e.g. after a voucher was applied."""
+        await OrderSummary.filter(id=order.id).update(
+            subtotal=order.subtotal,
+            order_fee=order.order_fee,
+            discount_amount=order.discount_amount,
+            total_amount=order.total_amount
+        )
+
+    @staticmethod
+    @atomic()
+    async def rebuild(orders: List[Order]) -> int:
+        """Rewrite the summaries of orders from the order tables; used for backfills."""
+        if not orders:
+            return 0
+
+        order_ids = [order.id for order in orders]
+        loader = BatchLoader()
+        await loader.load_related(orders, 'restaurant', Restaurant)
+        await loader.load_related(orders, 'table', Table)
+        items = await loader.load_children(OrderItem, 'order', order_ids)
+        await loader.load_related(items, 'item', MenuItem)
+        await loader.load_children(Payment, 'order', order_ids, order_by='-created_at')
+
+        summaries = []
+        for order in orders:
+            restaurant = loader.get(Restaurant, order.restaurant_id)
+            table = loader.get(Table, order.table_id)
+            lines = [
+                (item.name if item else '', order_item.quantity)
+                for order_item in loader.children(OrderItem, 'order', order.id)
+                for item in (loader.get(MenuItem, order_item.item_id),)
+            ]
+            payments = loader.children(Payment, 'order', order.id)
 
-        if not order or order.status != "in_progress":
-            return False
+            summaries.append(OrderSummary(
+                id=order.id,
+                user_id=order.user_id,
+                restaurant_id=order.restaurant_id,
+                restaurant_name=restaurant.name if restaurant else '',
+                status=order.status,
+                order_mode=order.order_mode,
+                table_number=table.table_number if table else None,
+                item_count=sum(quantity for _, quantity in lines),
+                item_preview=OrderSummaryService.build_preview(lines),
+                subtotal=order.subtotal,
+                order_fee=order.order_fee,
+                discount_amount=order.discount_amount,
+                total_amount=order.total_amount,
+                payment_status=payments[0].status if payments else None,
+                is_reviewed=order.is_reviewed,
+                created_at=order.created_at
+            ))
 
-        order.status = "completed"
-        await order.save()
-        return True
\ No newline at end of file
+        await OrderSummary.filter(id__in=order_ids).delete()
+        await OrderSummary.bulk_create(summaries)
+        return len(summaries)
@@ -0,0 +1,8 @@
+from apps.orders.models import Order
+from core.state_machine import StateMachine
+
+
+# Allowed order status transitions
+order_states = StateMachine(Order, {
+    'in_progress': ('completed', 'cancelled'),
+})
@@ -0,0 +1,18 @@
+from celery import shared_task
+from django.conf import settings
+
+from apps.orders.partitions import PartitionService
+from apps.orders.rollups import SalesRollupService
+from core.db import run_with_tortoise
+
+
+@shared_task
+def rollup_daily_sales() -> int:
+    """Roll the completed orders changed since the last run into the daily sales tables."""
+    return run_with_tortoise(SalesRollupService.run)
+
+
+@shared_task
+def ensure_order_partitions() -> int:
+    """Create the monthly partitions of the order tables ahead of time."""
+    return run_with_tortoise(PartitionService.ensure_partitions, settings.ORDER_PARTITION_MONTHS_AHEAD)
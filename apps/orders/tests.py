@@ -1,3 +1,369 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from redis.asyncio import Redis
+from rest_framework_simplejwt.tokens import AccessToken
+from tortoise import Tortoise, timezone
+
+from apps.menu.models import MenuItem, MenuItemOption, MenuItemTopping
+from apps.orders.cache import OrderDocumentCache
+from apps.orders.management.commands.loadtest import LoadTest
+from apps.orders.models import Order, OrderItem, OrderItemOption, OrderItemTopping, OrderSummary
+from apps.orders.partitions import PARTITIONED_TABLES, PartitionService, _add_months
+from apps.restaurants.models import Restaurant, Table
+from apps.users.models import User
+from core.encoders import RawJSON
+from core.redis import close_redis, get_redis
+from core.testing import APITestCase, PostgresAPITestCase
+
+
+class LoadTestFlowTests(SimpleTestCase):
+    """Runs the ordering flow of the loadtest command against an in-memory SQLite database."""
+
+    options = {
+        'users': 2,
+        'iterations': 2,
+        'menu_items': 3,
+        'warmup': 0,
+        'db_url': 'sqlite://:memory:',
+        'generate_schemas': True,
+        'seed': 1,
+    }
+
+    def test_every_step_of_the_flow_succeeds(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'report.json')
+            call_command('loadtest', output=output, stdout=io.StringIO(), **self.options)
+            with open(output) as report:
+                endpoints = json.load(report)['endpoints']
+
+        self.assertEqual(set(endpoints), set(LoadTest.STEPS))
+        for name, summary in endpoints.items():
+            self.assertEqual(summary['requests'], 4, name)
+            self.assertEqual(summary['errors'], 0, f"{name}: {summary['first_error']}")
+
+    def test_fails_when_a_step_always_fails(self):
+        with mock.patch(
+                'apps.payments.views.PaymentService.verify_payment',
+                new=mock.AsyncMock(return_value=(False, None))
+        ):
+            with self.assertRaisesMessage(CommandError, 'every verify payment request failed, first with 404'):
+                call_command('loadtest', stdout=io.StringIO(), **self.options)
+
+    def test_fails_when_a_step_is_never_reached(self):
+        with mock.patch(
+                'apps.orders.views.OrderService.create_order',
+                new=mock.AsyncMock(side_effect=ValueError('Restaurant is closed'))
+        ):
+            with self.assertRaisesMessage(CommandError, 'create payment was never reached'):
+                call_command('loadtest', stdout=io.StringIO(), **self.options)
+
+
+class OrderDocumentCacheTests(unittest.IsolatedAsyncioTestCase):
+    """Two caches stand for two processes sharing one Redis."""
+
+    async def asyncSetUp(self):
+        self.addAsyncCleanup(close_redis)
+        try:
+            await get_redis().ping()
+        except Exception:
+            self.skipTest('Redis is not available')
+
+        self.cache, self.other_cache = OrderDocumentCache(), OrderDocumentCache()
+        self.order_id, self.user_id = uuid.uuid4(), uuid.uuid4()
+        self.loads = 0
+
+    async def load(self):
+        self.loads += 1
+        return RawJSON(json.dumps({'load': self.loads}).encode())
+
+    async def get(self, cache):
+        return json.loads(await cache.get(self.order_id, self.user_id, self.load))
+
+    async def test_hits_the_local_and_the_shared_cache(self):
+        self.assertEqual(await self.get(self.cache), {'load': 1})
+        self.assertEqual(await self.get(self.cache), {'load': 1})
+        self.assertEqual(await self.get(self.other_cache), {'load': 1})
+        self.assertEqual(self.loads, 1)
+
+    async def test_invalidate_reaches_every_process(self):
+        await self.get(self.cache)
+        await self.get(self.other_cache)
+
+        await self.cache.invalidate(self.order_id)
+
+        self.assertEqual(await self.get(self.other_cache), {'load': 2})
+        self.assertEqual(await self.get(self.cache), {'load': 2})
+
+    async def test_an_expired_version_is_never_reused(self):
+        await self.get(self.cache)
+
+        await get_redis().delete(self.cache.version_key(self.order_id))
+
+        self.assertEqual(await self.get(self.cache), {'load': 2})
+
+    async def test_loads_when_redis_is_down(self):
+        down = Redis.from_url('redis://localhost:1')
+        self.addAsyncCleanup(down.aclose)
+        with mock.patch('apps.orders.cache.get_redis', return_value=down), self.assertLogs('apps.orders.cache'):
+            self.assertEqual(await self.get(self.cache), {'load': 1})
+            await self.cache.invalidate(self.order_id)
+
+            # Down after the version was read
+            with mock.patch.object(self.cache, '_version', new=mock.AsyncMock(return_value='1')):
+                self.assertEqual(await self.get(self.cache), {'load': 2})
+
+    async def test_serves_the_load_when_storing_it_fails(self):
+        await self.get(self.cache)
+        await self.cache.invalidate(self.order_id)
+
+        failing_set = mock.patch.object(get_redis(), 'set', new=mock.AsyncMock(side_effect=ConnectionError))
+        with failing_set, self.assertLogs('apps.orders.cache'):
+            self.assertEqual(await self.get(self.cache), {'load': 2})
+
+
+class CreateOrderTests(APITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = await User.create(username='customer', phone_number='0800', password='')
+        self.restaurant = await Restaurant.create(name='Warung')
+        self.item = await MenuItem.create(restaurant=self.restaurant, name='Nasi goreng', original_price=Decimal(25000))
+
+    async def create_order(self, **data):
+        return await self.request('POST', '/api/orders/create/', self.user, json={
+            'restaurant': str(self.restaurant.id),
+            'order_mode': 'takeaway',
+            'items': [{'item_id': str(self.item.id), 'quantity': 2}],
+            **data,
+        })
+
+    async def test_prices_server_side(self):
+        response = await self.create_order(order_fee='2000')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['total_amount'], 52000.0)
+
+    async def test_rejects_a_negative_order_fee(self):
+        response = await self.create_order(order_fee='-60000')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Order fee cannot be negative'})
+        self.assertFalse(await Order.exists())
+
+
+class KitchenConsumerTests(APITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        channel_layers = override_settings(CHANNEL_LAYERS={
+            'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+        })
+        channel_layers.enable()
+        self.addCleanup(channel_layers.disable)
+
+        self.restaurant = await Restaurant.create(name='Warung')
+        self.cook = await User.create(username='cook', phone_number='0800', password='', is_staff=True)
+        await self.restaurant.staff.add(self.cook)
+        self.customer = await User.create(username='customer', phone_number='0801', password='')
+        self.item = await MenuItem.create(restaurant=self.restaurant, name='Nasi goreng', original_price=Decimal(25000))
+
+    async def connect(self, user):
+        from eatsight.asgi import application
+
+        communicator = WebsocketCommunicator(
+            application, f'/ws/kitchen/{self.restaurant.id}/?token={AccessToken.for_user(user)}'
+        )
+        connected, _ = await communicator.connect()
+        self.addAsyncCleanup(communicator.disconnect)
+        return connected, communicator
+
+    async def test_streams_the_restaurants_orders_to_its_staff(self):
+        connected, communicator = await self.connect(self.cook)
+        self.assertTrue(connected)
+        snapshot = await communicator.receive_json_from()
+        self.assertEqual((snapshot['type'], snapshot['orders']), ('snapshot', []))
+
+        response = await self.request('POST', '/api/orders/create/', self.customer, json={
+            'restaurant': str(self.restaurant.id),
+            'order_mode': 'takeaway',
+            'items': [{'item_id': str(self.item.id), 'quantity': 1}],
+        })
+        self.assertEqual(response.status_code, 201)
+
+        event = await communicator.receive_json_from()
+        self.assertEqual(event['type'], 'order.created')
+        self.assertEqual(event['order']['id'], response.json()['id'])
+
+    async def test_rejects_staff_of_other_restaurants(self):
+        other = await User.create(username='other cook', phone_number='0802', password='', is_staff=True)
+        await (await Restaurant.create(name='Kedai')).staff.add(other)
+
+        connected, _ = await self.connect(other)
+
+        self.assertFalse(connected)
+
+    async def test_rejects_customers(self):
+        connected, _ = await self.connect(self.customer)
+
+        self.assertFalse(connected)
+
+    async def test_answers_malformed_messages_with_an_error(self):
+        _, communicator = await self.connect(self.cook)
+        await communicator.receive_json_from()
+
+        for text in ('not json', '[1, 2]'):
+            await communicator.send_to(text_data=text)
+            self.assertEqual(
+                await communicator.receive_json_from(),
+                {'type': 'error', 'message': 'Messages must be JSON objects'}
+            )
+
+        await communicator.send_json_to({'action': 'resync'})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'snapshot')
+
+
+class ReorderTests(PostgresAPITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = await User.create(username='customer', phone_number='0800', password='')
+        self.restaurant = await Restaurant.create(name='Warung')
+        self.table = await Table.create(restaurant=self.restaurant, table_number='A1')
+        self.item = await MenuItem.create(restaurant=self.restaurant, name='Nasi goreng', original_price=Decimal(25000))
+        self.option = await MenuItemOption.create(item=self.item, name='Pedas', price=Decimal(2000))
+        self.topping = await MenuItemTopping.create(item=self.item, name='Telur', price=Decimal(5000))
+
+        self.order = await Order.create(
+            user=self.user, restaurant=self.restaurant, table=self.table, status='completed',
+            subtotal=Decimal(50000), order_fee=Decimal(1000), total_amount=Decimal(51000)
+        )
+        order_item = await OrderItem.create(order=self.order, item=self.item, quantity=2, price=Decimal(20000))
+        await OrderItemOption.create(order_item=order_item, option=self.option, price=Decimal(1000))
+        await OrderItemTopping.create(order_item=order_item, topping=self.topping, quantity=2, price=Decimal(4000))
+
+    async def reorder(self, **data):
+        return await self.request('POST', f'/api/orders/{self.order.id}/reorder/', self.user, json=data)
+
+    async def test_copies_the_items_at_current_prices(self):
+        response = await self.reorder()
+
+        self.assertEqual(response.status_code, 201)
+        order = await Order.get(id=response.json()['id'])
+        # 2 x 25000, one option at 2000 and two toppings at 5000
+        self.assertEqual((order.subtotal, order.total_amount), (Decimal(62000), Decimal(63000)))
+        self.assertEqual((order.status, order.table_id), ('in_progress', self.table.id))
+        [order_item] = await OrderItem.filter(order_id=order.id)
+        self.assertEqual((order_item.quantity, order_item.price), (2, Decimal(25000)))
+        self.assertEqual(await OrderItemOption.filter(order_item_id=order_item.id).count(), 1)
+        self.assertEqual(await OrderItemTopping.filter(order_item_id=order_item.id).count(), 1)
+        self.assertEqual((await OrderSummary.get(id=order.id)).total_amount, Decimal(63000))
+
+    async def test_places_the_order_at_another_table_of_the_restaurant(self):
+        table = await Table.create(restaurant=self.restaurant, table_number='B2')
+
+        response = await self.reorder(table=str(table.id))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((await Order.get(id=response.json()['id'])).table_id, table.id)
+
+    async def test_rejects_a_table_of_another_restaurant(self):
+        other = await Restaurant.create(name='Kedai')
+        table = await Table.create(restaurant=other, table_number='A1')
+
+        response = await self.reorder(table=str(table.id))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Table not found in this restaurant'})
+        self.assertEqual(await Order.all().count(), 1)
+
+    async def test_rolls_back_when_nothing_is_available(self):
+        await MenuItem.filter(id=self.item.id).update(is_active=False)
+
+        response = await self.reorder()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(await Order.all().count(), 1)
+        self.assertEqual(await OrderItem.all().count(), 1)
+
+
+class PartitionTests(PostgresAPITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.connection = Tortoise.get_connection('default')
+        self.current_month = timezone.now().date().replace(day=1)
+
+    async def count(self, table):
+        _, rows = await self.connection.execute_query(f'SELECT count(*) FROM "{table}"')
+        return rows[0][0]
+
+    async def test_creates_the_coming_months_once(self):
+        created = await PartitionService.ensure_partitions(months_ahead=6)
+
+        self.assertGreater(created, 0)
+        for table in PARTITIONED_TABLES:
+            months = [month for _, month in await PartitionService.get_partitions(table)]
+            self.assertEqual(months[-1], _add_months(self.current_month, 6), table)
+        self.assertEqual(await PartitionService.ensure_partitions(months_ahead=6), 0)
+
+    async def test_moves_rows_of_the_new_month_out_of_the_default_partition(self):
+        user = await User.create(username='customer', phone_number='0800', password='')
+        restaurant = await Restaurant.create(name='Warung')
+        item = await MenuItem.create(restaurant=restaurant, name='Nasi goreng', original_price=Decimal(25000))
+        order = await Order.create(
+            user=user, restaurant=restaurant, subtotal=Decimal(25000), order_fee=Decimal(0),
+            total_amount=Decimal(25000)
+        )
+        order_item = await OrderItem.create(order=order, item=item, quantity=1, price=Decimal(25000))
+        month = _add_months(self.current_month, 6)
+        created_at = datetime.datetime(month.year, month.month, 15, tzinfo=datetime.timezone.utc)
+        await Order.filter(id=order.id).update(created_at=created_at)
+        await OrderItem.filter(id=order_item.id).update(created_at=created_at)
+        self.assertEqual(await self.count('orders_default'), 1)
+
+        await PartitionService.ensure_partitions(months_ahead=6)
+
+        suffix = month.strftime('%Y_%m')
+        self.assertEqual(await self.count('orders_default'), 0)
+        self.assertEqual(await self.count('order_items_default'), 0)
+        self.assertEqual(await self.count(f'orders_{suffix}'), 1)
+        self.assertEqual(await self.count(f'order_items_{suffix}'), 1)
+        self.assertEqual((await Order.get(id=order.id)).created_at, created_at)
+        # Attaching gives the month the primary key and indexes of the parent
+        _, rows = await self.connection.execute_query(
+            'SELECT count(*) FROM pg_index WHERE indrelid = $1::regclass AND indisprimary', [f'orders_{suffix}']
+        )
+        self.assertEqual(rows[0][0], 1)
+
+    async def test_downgrade_restores_the_foreign_keys(self):
+        migrations = self.load_migrations()
+        for migration in reversed(migrations[5:]):
+            await self.connection.execute_script(await migration.downgrade(self.connection))
+
+        _, rows = await self.connection.execute_query(
+            """
+            SELECT conrelid::regclass::text, confrelid::regclass::text
+            FROM pg_constraint
+            WHERE contype = 'f' AND confrelid::regclass::text IN ('orders', 'order_items', 'payments')
+            """
+        )
+        self.assertEqual(sorted(map(tuple, rows)), [
+            ('order_item_options', 'order_items'),
+            ('order_item_toppings', 'order_items'),
+            ('order_items', 'orders'),
+            ('order_vouchers', 'orders'),
+            ('payment_verifications', 'payments'),
+            ('payments', 'orders'),
+            ('qr_codes', 'payments'),
+            ('testimonials', 'orders'),
+            ('user_vouchers', 'orders'),
+        ])
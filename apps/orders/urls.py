@@ -5,5 +5,6 @@ urlpatterns = [
     path('', views.list_orders, name='list_orders'),
     path('<uuid:pk>/', views.get_order, name='get_order'),
     path('create/', views.create_order, name='create_order'),
+    path('<uuid:pk>/reorder/', views.reorder, name='reorder'),
     path('<uuid:pk>/cancel/', views.cancel_order, name='cancel_order'),
 ]
\ No newline at end of file
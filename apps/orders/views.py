@@ -1,21 +1,31 @@
-from rest_framework.decorators import api_view, permission_classes
+from adrf.decorators import api_view
+from rest_framework.decorators import permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 import uuid
 from decimal import Decimal
 
-from apps.orders.services import OrderService
-from apps.orders.serializers import OrderSerializer, OrderItemSerializer
+from apps.orders.services import OrderService, OrderSummaryService
+from apps.orders.serializers import OrderSerializer, OrderItemSerializer, OrderSummarySerializer
+from core.pagination import KeysetPagination
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 async def list_orders(request):
-    """List user's orders."""
+    """List user's order history from the order summaries."""
     status_filter = request.query_params.get('status')
-    orders = await OrderService.get_user_orders(request.user.id, status_filter)
-    return Response(await OrderSerializer(orders, many=True).data)
+    serializer = OrderSummarySerializer.from_request(request, raw_json=True)
+    paginator = KeysetPagination(request)
+    summaries = await OrderSummaryService.get_user_summaries(
+        request.user.id,
+        status_filter,
+        paginator=paginator,
+        only=serializer.get_only_columns()
+    )
+    data = await serializer.to_representation_list(summaries)
+    return paginator.get_paginated_response(data)
 
 
 @api_view(['GET'])
@@ -23,11 +33,12 @@ async def list_orders(request):
 async def get_order(request, pk):
     """Get order details."""
     try:
-        order = await OrderService.get_by_id(uuid.UUID(pk), request.user.id)
-        if not order:
+        # Tracking screens poll this, so it is served from the order cache
+        document = await OrderService.get_order_document(uuid.UUID(str(pk)), request.user.id)
+        if document is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        return Response(await OrderSerializer(order).data)
+        return Response(document)
     except ValueError:
         return Response({"error": "Invalid order ID"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -43,11 +54,13 @@ async def create_order(request):
         table_id = request.data.get('table')
         payment_method_id = request.data.get('payment_method')
 
-        # Extract financial data
-        subtotal = Decimal(request.data.get('subtotal', '0'))
+        # Extract financial data; prices are computed server side and the
+        # amounts the client was shown are only checked against them
         order_fee = Decimal(request.data.get('order_fee', '0'))
-        discount_amount = Decimal(request.data.get('discount_amount', '0'))
-        total_amount = Decimal(request.data.get('total_amount', '0'))
+        subtotal, discount_amount, total_amount = (
+            Decimal(str(request.data[name])) if request.data.get(name) is not None else None
+            for name in ('subtotal', 'discount_amount', 'total_amount')
+        )
 
         # Extract items data
         items_data = request.data.get('items', [])
@@ -76,17 +89,33 @@ async def create_order(request):
             voucher_ids=[uuid.UUID(v_id) for v_id in voucher_ids] if voucher_ids else None
         )
 
-        return Response(await OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+        return Response(await OrderSerializer().to_representation(order), status=status.HTTP_201_CREATED)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+async def reorder(request, pk):
+    """Place a new order with the items of a past order at current prices."""
+    try:
+        table_id = request.data.get('table')
+        order = await OrderService.reorder(
+            uuid.UUID(str(pk)),
+            request.user.id,
+            table_id=uuid.UUID(table_id) if table_id else None
+        )
+        return Response(await OrderSerializer().to_representation(order), status=status.HTTP_201_CREATED)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 async def cancel_order(request, pk):
     """Cancel an order."""
     try:
-        success = await OrderService.cancel_order(uuid.UUID(pk), request.user.id)
+        success = await OrderService.cancel_order(uuid.UUID(str(pk)), request.user.id)
         if success:
             return Response({'status': 'order cancelled'})
         else:
@@ -1,46 +1,51 @@
-# apps/payments/consumers.py
-import json
 import asyncio
-from channels.generic.websocket import AsyncWebsocketConsumer
+import json
+from typing import Optional
 from uuid import UUID
 
+from apps.payments.events import RESYNC, payment_status_hub
 from apps.payments.services import PaymentService
+from core.websockets import TrackedWebsocketConsumer
 
 
-class PaymentConsumer(AsyncWebsocketConsumer):
-    async def connect(self):
-        self.payment_id = self.scope['url_route']['kwargs']['payment_id']
-        self.payment_group_name = f'payment_{self.payment_id}'
+class PaymentConsumer(TrackedWebsocketConsumer):
+    """
+    Live status of one payment.
+
+    On connect the client gets the current status once; after that, status
+    changes are pushed as they commit (see apps/payments/events.py), so a
+    waiting customer costs no queries.
+    """
+
+    status_queue: Optional[asyncio.Queue] = None
 
-        # Join payment group
-        await self.channel_layer.group_add(
-            self.payment_group_name,
-            self.channel_name
-        )
+    async def connect(self):
+        self.payment_id = UUID(str(self.scope['url_route']['kwargs']['payment_id']))
 
         # Check if payment exists and user has permission
-        user_id = self.scope['user'].id if self.scope['user'].is_authenticated else None
-        if not user_id:
+        self.user_id = self.scope['user'].id if self.scope['user'].is_authenticated else None
+        if not self.user_id:
             await self.close()
             return
 
+        # Subscribe before reading the status, so no change falls in between
+        self.status_queue = payment_status_hub.subscribe(self.payment_id)
+
         # Verify payment exists and belongs to user
-        payment = await PaymentService.get_by_id(UUID(self.payment_id), user_id)
-        if not payment:
+        status_info = await PaymentService.check_payment_status(self.payment_id, self.user_id)
+        if status_info['status'] == 'error':
             await self.close()
             return
 
         await self.accept()
+        await self.send_status(status_info)
 
-        # Start background task to check payment status
-        asyncio.create_task(self.check_payment_status())
+        # Relay pushed status changes to the socket until it closes
+        self.create_task(self.relay_status_events())
 
     async def disconnect(self, close_code):
-        # Leave payment group
-        await self.channel_layer.group_discard(
-            self.payment_group_name,
-            self.channel_name
-        )
+        if self.status_queue:
+            payment_status_hub.unsubscribe(self.payment_id, self.status_queue)
 
     async def receive(self, text_data):
         data = json.loads(text_data)
@@ -48,52 +53,25 @@ class PaymentConsumer(AsyncWebsocketConsumer):
 
         if action == 'check_status':
             # Manually trigger a status check
-            user_id = self.scope['user'].id if self.scope['user'].is_authenticated else None
-            status_info = await PaymentService.check_payment_status(UUID(self.payment_id), user_id)
-            await self.send_status_update(status_info)
-
-    async def payment_status_update(self, event):
-        # Send payment status update to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'payment_status',
-            'status': event['status'],
-            'verification_status': event['verification_status'],
-            'message': event['message'],
-            'timestamp': event['timestamp']
-        }))
-
-    async def check_payment_status(self):
-        """Background task to periodically check payment status"""
-        user_id = self.scope['user'].id if self.scope['user'].is_authenticated else None
+            await self.send_snapshot()
 
+    async def relay_status_events(self):
         while True:
-            # Check payment status
-            status_info = await PaymentService.check_payment_status(UUID(self.payment_id), user_id)
-
-            # Send status update
-            await self.send_status_update(status_info)
-
-            # If payment is no longer pending, stop checking
-            if status_info['status'] not in ['pending', 'error']:
-                break
-
-            # Check every 5 seconds
-            await asyncio.sleep(5)
+            event = await self.status_queue.get()
+            if event is RESYNC:
+                # Changes may have been missed, send the current status
+                await self.send_snapshot()
+            else:
+                await self.send_status(event)
 
-    async def send_status_update(self, status_info):
-        await self.channel_layer.group_send(
-            self.payment_group_name,
-            {
-                'type': 'payment_status_update',
-                **status_info
-            }
-        )
+    async def send_snapshot(self):
+        await self.send_status(await PaymentService.check_payment_status(self.payment_id, self.user_id))
 
-
-# apps/payments/routing.py
-from django.urls import path
-from . import consumers
-
-websocket_urlpatterns = [
-    path('ws/payments/<uuid:payment_id>/', consumers.PaymentConsumer.as_asgi()),
-]
\ No newline at end of file
+    async def send_status(self, status_info):
+        await self.send(text_data=json.dumps({
+            'type': 'payment_status',
+            'status': status_info['status'],
+            'verification_status': status_info.get('verification_status'),
+            'message': status_info.get('message'),
+            'timestamp': status_info.get('timestamp')
+        }))
@@ -0,0 +1,179 @@
+import asyncio
+import datetime
+import json
+import logging
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+import asyncpg
+from django.conf import settings
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from core.encoders import encode_value
+
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel of payment status changes
+PAYMENT_STATUS_CHANNEL = 'payment_status'
+
+# Resync marker queued to every subscriber after the listener reconnected,
+# since notifications sent while it was disconnected are lost
+RESYNC = {'type': 'resync'}
+
+# NOTIFY payloads are limited to 8000 bytes
+MAX_MESSAGE_LENGTH = 1000
+
+
+def status_event(
+        payment_id: uuid.UUID,
+        status: str,
+        verification_status: Optional[str],
+        message: Optional[str],
+        timestamp: datetime.datetime
+) -> Dict[str, Any]:
+    """Build a payment status event; timestamp is when the status changed."""
+    return {
+        'type': 'payment_status',
+        'payment_id': str(payment_id),
+        'status': status,
+        'verification_status': verification_status,
+        'message': message[:MAX_MESSAGE_LENGTH] if message else message,
+        'timestamp': timestamp.isoformat(),
+    }
+
+
+async def notify_payment_status(connection: BaseDBAsyncClient, event: Dict[str, Any]) -> None:
+    """
+    Queue a payment status event on the current transaction.
+
+    Postgres delivers the notification when the transaction commits and drops
+    it on rollback, so listeners never see uncommitted statuses. Other
+    databases have no NOTIFY and the event is not sent.
+    """
+    await notify_payment_statuses(connection, [event])
+
+
+async def notify_payment_statuses(connection: BaseDBAsyncClient, events: List[Dict[str, Any]]) -> None:
+    """Queue several payment status events on the current transaction with one statement."""
+    if not events or connection.capabilities.dialect != 'postgres':
+        return
+    await connection.execute_query(
+        'SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload',
+        [PAYMENT_STATUS_CHANNEL, [encode_value(event) for event in events]]
+    )
+
+
+class PaymentStatusHub:
+    """In-process fan-out of payment status events to the subscribers of each payment."""
+
+    def __init__(self):
+        self._queues: Dict[uuid.UUID, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, payment_id: uuid.UUID) -> asyncio.Queue:
+        """Return a queue receiving the status events of payment_id until unsubscribed."""
+        queue = asyncio.Queue()
+        self._queues[payment_id].add(queue)
+        return queue
+
+    def unsubscribe(self, payment_id: uuid.UUID, queue: asyncio.Queue) -> None:
+        queues = self._queues.get(payment_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._queues[payment_id]
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        for queue in self._queues.get(uuid.UUID(event['payment_id']), ()):
+            queue.put_nowait(event)
+
+    def resync(self) -> None:
+        for queues in self._queues.values():
+            for queue in queues:
+                queue.put_nowait(RESYNC)
+
+
+payment_status_hub = PaymentStatusHub()
+
+
+def _connect_arguments() -> Dict[str, Any]:
+    """asyncpg.connect() arguments of the default Tortoise connection."""
+    connection = settings.TORTOISE_ORM['connections']['default']
+    if isinstance(connection, str):
+        return {'dsn': connection}
+
+    credentials = dict(connection['credentials'])
+    credentials['port'] = int(credentials.get('port', 5432))
+    return credentials
+
+
+class PaymentStatusListener:
+    """
+    Bridges payment status NOTIFYs into the payment status hub of this process.
+
+    Every ASGI process runs one listener on a dedicated connection, started at
+    lifespan startup, so a status committed by any worker, Celery task or
+    command reaches the sockets waiting on that payment wherever they are.
+    The connection is reopened after a loss, and subscribers are told to
+    resync since notifications may have been missed meanwhile.
+    """
+
+    RECONNECT_DELAY = 5
+
+    def __init__(self, hub: PaymentStatusHub):
+        self.hub = hub
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        connection = settings.TORTOISE_ORM['connections']['default']
+        if isinstance(connection, str):
+            return connection.startswith(('postgres://', 'asyncpg://'))
+        return connection.get('engine') == 'tortoise.backends.asyncpg'
+
+    def start(self) -> None:
+        if self._task is None and self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        try:
+            self.hub.publish(json.loads(payload))
+        except Exception:
+            logger.exception("Invalid payment status notification: %s", payload)
+
+    async def _run(self) -> None:
+        arguments = _connect_arguments()
+        if arguments.get('dsn', '').startswith('asyncpg://'):
+            arguments['dsn'] = 'postgres://' + arguments['dsn'][len('asyncpg://'):]
+
+        reconnecting = False
+        while True:
+            try:
+                connection = await asyncpg.connect(**arguments)
+                try:
+                    closed = asyncio.Event()
+                    connection.add_termination_listener(lambda _: closed.set())
+                    await connection.add_listener(PAYMENT_STATUS_CHANNEL, self._on_notification)
+                    if reconnecting:
+                        self.hub.resync()
+                    await closed.wait()
+                finally:
+                    await connection.close()
+            except Exception:
+                logger.exception("Payment status listener disconnected")
+
+            reconnecting = True
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+
+payment_status_listener = PaymentStatusListener(payment_status_hub)
@@ -0,0 +1,80 @@
+import datetime
+import uuid
+from typing import List, Tuple
+
+from tortoise import timezone
+from tortoise.transactions import in_transaction
+
+from apps.orders.cache import order_documents
+from apps.orders.services import OrderSummaryService
+from apps.payments.events import notify_payment_statuses, status_event
+
+
+EXPIRED_MESSAGE = "Payment deadline passed"
+
+# Expires one batch of overdue pending payments and their verifications in
+# one statement. Rows locked by a concurrent verification are skipped and
+# picked up by the next run if still pending. The status is spelled out, not
+# a parameter, so the planner can use the partial index on the pending
+# payments' deadlines.
+EXPIRE_PAYMENTS_SQL = """
+WITH overdue AS (
+    SELECT id
+    FROM payments
+    WHERE status = 'pending' AND payment_deadline < $1
+    ORDER BY payment_deadline
+    LIMIT $2
+    FOR UPDATE SKIP LOCKED
+), expired AS (
+    UPDATE payments
+    SET status = 'expired', updated_at = $1
+    FROM overdue
+    WHERE payments.id = overdue.id
+    RETURNING payments.id, payments.order_id
+), verifications AS (
+    UPDATE payment_verifications
+    SET verification_status = 'expired', verification_message = $3, updated_at = $1
+    FROM expired
+    WHERE payment_verifications.payment_id = expired.id
+)
+SELECT id, order_id FROM expired
+"""
+
+
+class PaymentExpiryService:
+    """Moves pending payments past their deadline to ``expired`` (PostgreSQL only)."""
+
+    @staticmethod
+    async def expire_batch(now: datetime.datetime, batch_size: int) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+        """Expire up to batch_size overdue payments in one transaction; return their (id, order id)."""
+        async with in_transaction() as connection:
+            _, rows = await connection.execute_query(
+                EXPIRE_PAYMENTS_SQL,
+                [now, batch_size, EXPIRED_MESSAGE]
+            )
+            expired = [(row['id'], row['order_id']) for row in rows]
+            if not expired:
+                return expired
+
+            order_ids = list({order_id for _, order_id in expired})
+            await OrderSummaryService.set_payment_statuses(order_ids, 'expired')
+
+            # Sent to the sockets waiting on the payments once this commits
+            await notify_payment_statuses(connection, [
+                status_event(payment_id, 'expired', 'expired', EXPIRED_MESSAGE, now)
+                for payment_id, _ in expired
+            ])
+
+        await order_documents.invalidate(*order_ids)
+        return expired
+
+    @staticmethod
+    async def expire_overdue(batch_size: int = 500) -> int:
+        """Expire every payment overdue now, batch by batch; return how many were expired."""
+        now = timezone.now()
+        total = 0
+        while True:
+            expired = await PaymentExpiryService.expire_batch(now, batch_size)
+            total += len(expired)
+            if len(expired) < batch_size:
+                return total
@@ -2,6 +2,7 @@ import uuid
 from typing import TYPE_CHECKING, TypeVar
 
 from tortoise import fields
+from tortoise.indexes import PartialIndex
 from tortoise.models import Model
 
 
@@ -27,7 +28,7 @@ class PaymentMethod(Model):
 
 class Payment(Model):
     id = fields.UUIDField(pk=True, default=uuid.uuid4)
-    order = fields.ForeignKeyField('models.Order', related_name='payments')
+    order = fields.ForeignKeyField('models.Order', related_name='payments', db_constraint=False)
     payment_method = fields.ForeignKeyField('models.PaymentMethod', related_name='transactions', null=True)
     payment_type = fields.CharField(max_length=20)
     amount = fields.DecimalField(max_digits=10, decimal_places=2)
@@ -45,11 +46,19 @@ class Payment(Model):
 
     class Meta:
         table = "payments"
+        indexes = [
+            # Serves an order's payments newest first (latest payment status,
+            # payment history pages joined through the user's orders)
+            ("order_id", "created_at", "id"),
+            # Serves the expiry sweeper's overdue pending payments, oldest
+            # deadline first; only the few pending rows are indexed
+            PartialIndex(fields=("payment_deadline",), condition={"status": "pending"}),
+        ]
 
 
 class QRCode(Model):
     id = fields.UUIDField(pk=True, default=uuid.uuid4)
-    payment = fields.OneToOneField('models.Payment', related_name='qr_code')
+    payment = fields.OneToOneField('models.Payment', related_name='qr_code', db_constraint=False)
     qr_data = fields.TextField()
     qr_image_url = fields.CharField(max_length=255, null=True)
     is_downloaded = fields.BooleanField(default=False)
@@ -64,7 +73,7 @@ class QRCode(Model):
 
 class PaymentVerification(Model):
     id = fields.UUIDField(pk=True, default=uuid.uuid4)
-    payment = fields.OneToOneField('models.Payment', related_name='verification')
+    payment = fields.OneToOneField('models.Payment', related_name='verification', db_constraint=False)
     verification_type = fields.CharField(max_length=20)
     verification_status = fields.CharField(max_length=20, default='pending')
     verification_message = fields.TextField(null=True)
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal, Optional, cast
+
+from django.conf import settings
+from qrcode.constants import ERROR_CORRECT_L
+from qrcode.main import QRCode as QRCodeGenerator
+
+
+logger = logging.getLogger(__name__)
+
+# Directory of the rendered images, under MEDIA_ROOT / MEDIA_URL
+QR_CODE_DIR = 'qrcodes'
+
+
+def render_qr_png(data: str, path: str) -> None:
+    """Render data as a QR code PNG at path; runs in a worker process."""
+    qr = QRCodeGenerator(
+        version=1,
+        error_correction=cast(Literal[0, 1, 2, 3], ERROR_CORRECT_L),
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    # Write next to the target and rename, so the image is never served half written
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial_path = f'{path}.{os.getpid()}.partial'
+    with open(partial_path, 'wb') as output:
+        img.save(output)
+    os.replace(partial_path, path)
+
+
+class QRRenderer:
+    """
+    Renders QR code images in a bounded process pool.
+
+    Building and PNG-encoding a QR code is CPU bound, so it runs outside the
+    event loop and outside the GIL of the worker serving requests. The pool
+    is started at ASGI lifespan startup; other entry points (commands, Celery)
+    start it on first use.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def workers(self) -> int:
+        return getattr(settings, 'QR_RENDER_WORKERS', 2)
+
+    def start(self) -> None:
+        if self._pool is None:
+            # Spawned, not forked: the parent runs an event loop and threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    @staticmethod
+    def image_path(name: str) -> str:
+        return os.path.join(settings.MEDIA_ROOT, QR_CODE_DIR, f'{name}.png')
+
+    @staticmethod
+    def image_url(name: str) -> str:
+        return f'{settings.MEDIA_URL}{QR_CODE_DIR}/{name}.png'
+
+    async def render(self, data: str, name: str) -> str:
+        """Render data to MEDIA_ROOT/qrcodes/<name>.png and return the image's URL."""
+        self.start()
+        await asyncio.get_running_loop().run_in_executor(
+            self._pool, render_qr_png, data, self.image_path(name)
+        )
+        return self.image_url(name)
+
+
+qr_renderer = QRRenderer()
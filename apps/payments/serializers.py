@@ -1,8 +1,13 @@
 from rest_framework import serializers
 from core.serializers import TortoiseSerializer
+from apps.orders.models import Order
+from apps.payments.models import PaymentMethod, PaymentVerification, QRCode
+from apps.restaurants.models import Table
 
 
 class PaymentMethodSerializer(TortoiseSerializer):
+    model_name = 'PaymentMethod'
+
     id = serializers.UUIDField(read_only=True)
     user_id = serializers.UUIDField(read_only=True)
     type = serializers.CharField(max_length=20)
@@ -11,15 +16,10 @@ class PaymentMethodSerializer(TortoiseSerializer):
     holder_name = serializers.CharField(max_length=100, required=False, allow_null=True)
     is_default = serializers.BooleanField(default=False)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance)
-        return pydantic_model.dict()
-
-    async def to_representation_list(self, instances):
-        return [await self.to_representation(instance) for instance in instances]
-
 
 class QRCodeSerializer(TortoiseSerializer):
+    model_name = 'QRCode'
+
     id = serializers.UUIDField(read_only=True)
     payment_id = serializers.UUIDField(read_only=True)
     qr_data = serializers.CharField(read_only=True)
@@ -28,15 +28,10 @@ class QRCodeSerializer(TortoiseSerializer):
     is_shared = serializers.BooleanField(read_only=True)
     expiry_time = serializers.DateTimeField(read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance)
-        return pydantic_model.dict()
-
-    async def to_representation_list(self, instances):
-        return [await self.to_representation(instance) for instance in instances]
-
 
 class PaymentVerificationSerializer(TortoiseSerializer):
+    model_name = 'PaymentVerification'
+
     id = serializers.UUIDField(read_only=True)
     payment_id = serializers.UUIDField(read_only=True)
     verification_type = serializers.CharField(read_only=True)
@@ -46,22 +41,30 @@ class PaymentVerificationSerializer(TortoiseSerializer):
     table_id = serializers.UUIDField(required=False, allow_null=True)
     verified_at = serializers.DateTimeField(read_only=True, allow_null=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance, exclude={'table'})
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        await loader.load_related(instances, 'table', Table)
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Include table number if available
-        if hasattr(instance, 'table') and instance.table_id:
-            table = await instance.table
+        table = loader.get(Table, instance.table_id)
+        if table:
             data['table_number'] = table.table_number
 
         return data
 
-    async def to_representation_list(self, instances):
-        return [await self.to_representation(instance) for instance in instances]
-
 
 class PaymentSerializer(TortoiseSerializer):
+    model_name = 'Payment'
+    relation_fields = {
+        'qr_code': 'qr_code',
+        'verification': 'verification',
+        'order_summary': 'order',
+        'payment_method_details': 'payment_method',
+    }
+    related_columns = ('payment_type', 'status', 'payment_deadline')
+
     id = serializers.UUIDField(read_only=True)
     order_id = serializers.UUIDField()
     payment_method_id = serializers.UUIDField(required=False, allow_null=True)
@@ -75,28 +78,38 @@ class PaymentSerializer(TortoiseSerializer):
     qr_code = QRCodeSerializer(read_only=True)
     verification = PaymentVerificationSerializer(read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(
-            instance,
-            exclude={'qr_code', 'verification', 'payment_method', 'order'}
-        )
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        payment_ids = [instance.id for instance in instances]
+        if self.wants_relation('order'):
+            await loader.load_related(instances, 'order', Order)
+        if self.wants_relation('payment_method'):
+            await loader.load_related(instances, 'payment_method', PaymentMethod)
+        if self.wants_relation('qr_code'):
+            await loader.load_children(QRCode, 'payment', payment_ids)
+
+        if self.wants_relation('verification'):
+            verifications = await loader.load_children(PaymentVerification, 'payment', payment_ids)
+            await PaymentVerificationSerializer().load_batch(verifications, loader)
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Include QR code if QRIS payment
-        if instance.payment_type == 'qris' and hasattr(instance, 'qr_code'):
-            qr_code = await instance.qr_code
-            if qr_code:
-                data['qr_code'] = await QRCodeSerializer().to_representation(qr_code)
+        if instance.payment_type == 'qris':
+            qr_codes = loader.children(QRCode, 'payment', instance.id)
+            if qr_codes:
+                data['qr_code'] = await self.nested(QRCodeSerializer).to_representation(qr_codes[0], loader)
 
         # Include verification details
-        if hasattr(instance, 'verification'):
-            verification = await instance.verification
-            if verification:
-                data['verification'] = await PaymentVerificationSerializer().to_representation(verification)
+        verifications = loader.children(PaymentVerification, 'payment', instance.id)
+        if verifications:
+            data['verification'] = await self.nested(PaymentVerificationSerializer).to_representation(
+                verifications[0], loader
+            )
 
         # Include order summary
-        if hasattr(instance, 'order'):
-            order = await instance.order
+        order = loader.get(Order, instance.order_id)
+        if order:
             data['order_summary'] = {
                 'order_id': str(order.id),
                 'status': order.status,
@@ -104,8 +117,8 @@ class PaymentSerializer(TortoiseSerializer):
             }
 
         # Include payment method details
-        if hasattr(instance, 'payment_method') and instance.payment_method_id:
-            payment_method = await instance.payment_method
+        payment_method = loader.get(PaymentMethod, instance.payment_method_id)
+        if payment_method:
             data['payment_method_details'] = {
                 'type': payment_method.type,
                 'card_brand': payment_method.card_brand,
@@ -118,14 +131,11 @@ class PaymentSerializer(TortoiseSerializer):
             now = datetime.datetime.now(instance.payment_deadline.tzinfo)
             if now < instance.payment_deadline:
                 time_remaining = instance.payment_deadline - now
+                minutes, seconds = divmod(int(time_remaining.total_seconds()), 60)
                 data['time_remaining_seconds'] = time_remaining.total_seconds()
-                data[
-                    'time_remaining_formatted'] = f"{int(time_remaining.total_seconds() // 60):02d}:{int(time_remaining.total_seconds() % 60):02d}"
+                data['time_remaining_formatted'] = f"{minutes:02d}:{seconds:02d}"
             else:
                 data['time_remaining_seconds'] = 0
                 data['time_remaining_formatted'] = "00:00"
 
         return data
-
-    async def to_representation_list(self, instances):
-        return [await self.to_representation(instance) for instance in instances]
\ No newline at end of file
@@ -1,19 +1,58 @@
-import base64
+import asyncio
 import datetime
-import io
+import logging
 import uuid
 from decimal import Decimal
-from typing import List, Optional, Dict, Any, cast, Literal
+from typing import List, Optional, Dict, Any, Sequence, Tuple, Union
 
-from qrcode.constants import ERROR_CORRECT_L
-from qrcode.main import QRCode as QRCodeGenerator
-from tortoise.transactions import atomic
+from tortoise import timezone
+from tortoise.transactions import in_transaction
 
+from apps.orders.cache import order_documents
+from apps.orders.events import ORDER_COMPLETED, publish_order_event
 from apps.orders.models import Order
+from apps.orders.services import OrderSummaryService
+from apps.orders.states import order_states
+from apps.payments.events import (
+    RESYNC,
+    notify_payment_status,
+    notify_payment_statuses,
+    payment_status_hub,
+    status_event,
+)
 from apps.payments.models import Payment, PaymentMethod, QRCode, PaymentVerification
+from apps.payments.qr import qr_renderer
+from apps.payments.states import payment_states
+from core.pagination import KeysetPagination
+from core.projections import Projection, ProjectionRows
+
+
+logger = logging.getLogger(__name__)
 
 
 class PaymentService:
+    # Payment history columns, with the order status joined in
+    LIST_PROJECTION = Projection(Payment, {
+        'id': 'id',
+        'order_id': 'order_id',
+        'order_status': 'order__status',
+        'payment_type': 'payment_type',
+        'amount': 'amount',
+        'status': 'status',
+        'transaction_id': 'transaction_id',
+        'payment_deadline': 'payment_deadline',
+        'payment_date': 'payment_date',
+        'created_at': 'created_at',
+    })
+
+    # Status of one payment with its verification joined in
+    STATUS_PROJECTION = Projection(Payment, {
+        'status': 'status',
+        'updated_at': 'updated_at',
+        'verification_status': 'verification__verification_status',
+        'message': 'verification__verification_message',
+    })
+
     @staticmethod
     async def get_by_id(payment_id: uuid.UUID, user_id: Optional[uuid.UUID] = None) -> Optional[Payment]:
         """Get payment by ID, optionally filtering by user."""
@@ -24,13 +63,38 @@ class PaymentService:
         return await query.prefetch_related('qr_code', 'verification')
 
     @staticmethod
-    async def get_user_payments(user_id: uuid.UUID, status: Optional[str] = None) -> List[Payment]:
-        """Get all payments for a user, optionally filtering by status."""
+    async def get_user_payments(
+            user_id: uuid.UUID,
+            status: Optional[str] = None,
+            projection: Optional[Projection] = None,
+            paginator: Optional[KeysetPagination] = None,
+            only: Optional[Sequence[str]] = None
+    ) -> Union[List[Payment], ProjectionRows]:
+        """
+        Get a user's payments, optionally filtered by status, projected and/or paginated.
+
+        Payments have no user_id: the user's orders are found through the
+        orders (user_id, created_at, id) index and their payments through
+        (order_id, created_at, id), then sorted. A keyset page therefore reads
+        all of the user's payments past the cursor rather than just one page
+        of them, which stays cheap while a user's history is a few hundred
+        payments.
+        """
         query = Payment.filter(order__user_id=user_id)
         if status:
             query = query.filter(status=status)
 
-        return await query.order_by('-created_at').prefetch_related('qr_code', 'verification')
+        if only and not projection:
+            # Sparse fieldsets: load only the requested columns (plus the ordering key)
+            query = query.only(*{*only, 'created_at'})
+
+        if paginator:
+            return await paginator.paginate_queryset(query, projection.fetch if projection else None)
+
+        query = query.order_by('-created_at')
+        if projection:
+            return await projection.fetch(query)
+        return await query
 
     @staticmethod
     async def get_user_payment_methods(user_id: uuid.UUID) -> List[PaymentMethod]:
@@ -38,7 +102,6 @@ class PaymentService:
         return await PaymentMethod.filter(user_id=user_id).order_by('-is_default')
 
     @staticmethod
-    @atomic()
     async def create_payment(
             order_id: uuid.UUID,
             payment_type: str,
@@ -48,94 +111,92 @@ class PaymentService:
             table_id: Optional[uuid.UUID] = None
     ) -> Payment:
         """Create a new payment."""
-        # Verify order belongs to user
-        order = await Order.get_or_none(id=order_id, user_id=user_id)
-        if not order:
-            raise ValueError("Order not found or does not belong to user")
-
-        # Create payment
-        payment = await Payment.create(
-            order_id=order_id,
-            payment_method_id=payment_method_id,
-            payment_type=payment_type,
-            amount=amount,
-            status="pending",
-            payment_deadline=datetime.datetime.now() + datetime.timedelta(minutes=8)
-        )
-
-        # Handle payment type specific logic
-        if payment_type == "qris":
-            # Generate QR code
-            await PaymentService.generate_qr_code(payment.id)
-
-            # Create verification record
-            await PaymentVerification.create(
-                payment_id=payment.id,
-                verification_type="qris",
-                verification_status="pending"
-            )
-
-        elif payment_type in ["debit_card", "credit_card"]:
-            # Create verification record
-            await PaymentVerification.create(
-                payment_id=payment.id,
-                verification_type="card",
-                verification_status="pending"
+        async with in_transaction():
+            # Verify order belongs to user
+            order = await Order.get_or_none(id=order_id, user_id=user_id)
+            if not order:
+                raise ValueError("Order not found or does not belong to user")
+
+            # Create payment
+            payment = await Payment.create(
+                order_id=order_id,
+                payment_method_id=payment_method_id,
+                payment_type=payment_type,
+                amount=amount,
+                status="pending",
+                payment_deadline=timezone.now() + datetime.timedelta(minutes=8)
             )
 
-        elif payment_type == "cash":
-            # Create verification record
-            await PaymentVerification.create(
-                payment_id=payment.id,
-                verification_type="cash",
-                verification_status="pending",
-                table_id=table_id
-            )
+            # Handle payment type specific logic
+            qr_code = None
+            if payment_type == "qris":
+                # Create the QR code; its image is rendered after commit
+                qr_code = await PaymentService.generate_qr_code(payment)
+
+                # Create verification record
+                await PaymentVerification.create(
+                    payment_id=payment.id,
+                    verification_type="qris",
+                    verification_status="pending"
+                )
+
+            elif payment_type in ["debit_card", "credit_card"]:
+                # Create verification record
+                await PaymentVerification.create(
+                    payment_id=payment.id,
+                    verification_type="card",
+                    verification_status="pending"
+                )
+
+            elif payment_type == "cash":
+                # Create verification record
+                await PaymentVerification.create(
+                    payment_id=payment.id,
+                    verification_type="cash",
+                    verification_status="pending",
+                    table_id=table_id
+                )
+
+            await OrderSummaryService.set_payment_status(order_id, payment.status)
+
+        if qr_code:
+            await PaymentService.render_qr_code(qr_code)
+
+        await order_documents.invalidate(order_id)
 
         # Return full payment with related objects
         return await PaymentService.get_by_id(payment.id)
 
     @staticmethod
-    async def generate_qr_code(payment_id: uuid.UUID) -> QRCode:
-        """Generate QR code for QRIS payment."""
-        payment = await Payment.get(id=payment_id)
-
-        # Generate QR code data
-        qr_data = f"https://eatsight.com/pay/{payment_id}"
-
-        # Generate QR code image
-        qr = QRCodeGenerator(
-            version=1,
-            error_correction=cast(Literal[0, 1, 2, 3], ERROR_CORRECT_L),
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        # Save image to buffer
-        buffer = io.BytesIO()
-        img.save(buffer)
-        buffer.seek(0)
-
-        # Convert to base64
-        base64.b64encode(buffer.getvalue()).decode()
-
-        # Save path
-        qr_image_path = f"/media/qrcodes/{payment_id}.png"
-
-        # Create QR code record
-        qr_code = await QRCode.create(
-            payment_id=payment_id,
-            qr_data=qr_data,
-            qr_image_url=qr_image_path,
+    async def generate_qr_code(payment: Payment) -> QRCode:
+        """Create the QR code record of a QRIS payment; the image is rendered by render_qr_code."""
+        return await QRCode.create(
+            payment_id=payment.id,
+            qr_data=f"https://eatsight.com/pay/{payment.id}",
+            qr_image_url=None,
             expiry_time=payment.payment_deadline,
             is_downloaded=False,
             is_shared=False
         )
 
-        return qr_code
+    @staticmethod
+    async def render_qr_code(qr_code: QRCode) -> Optional[str]:
+        """
+        Render a QR code image in the process pool and record its URL.
+
+        Called after the payment is committed, so no transaction is held open
+        while rendering. Failures are logged and leave the URL empty; the
+        payment can still be paid through qr_data.
+        """
+        try:
+            qr_image_url = await qr_renderer.render(qr_code.qr_data, str(qr_code.payment_id))
+        except Exception:
+            logger.exception("Could not render the QR code of payment %s", qr_code.payment_id)
+            return None
+
+        qr_code.qr_image_url = qr_image_url
+        await QRCode.filter(id=qr_code.id).update(qr_image_url=qr_image_url)
+        return qr_image_url
 
     @staticmethod
     async def check_payment_status(payment_id: uuid.UUID, user_id: uuid.UUID) -> Dict[str, Any]:
@@ -155,9 +216,78 @@ class PaymentService:
             "status": payment.status,
             "verification_status": verification.verification_status if verification else None,
             "message": verification.verification_message if verification else None,
-            "timestamp": datetime.datetime.now().isoformat()
+            "timestamp": timezone.now().isoformat()
+        }
+
+    @staticmethod
+    async def get_status(payment_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """
+        Current status of a user's payment, read with one query.
+
+        The version is the time of the last status change; status events carry
+        the same value as their timestamp.
+        """
+        rows = await PaymentService.STATUS_PROJECTION.fetch(
+            Payment.filter(id=payment_id, order__user_id=user_id).limit(1)
+        )
+        if not rows:
+            return None
+
+        row = rows[0]
+        return {
+            "status": row['status'],
+            "verification_status": row['verification_status'],
+            "message": row['message'],
+            "version": row['updated_at'].isoformat()
         }
 
+    @staticmethod
+    async def wait_for_status(
+            payment_id: uuid.UUID,
+            user_id: uuid.UUID,
+            since: Optional[str],
+            timeout: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Long poll a payment's status.
+
+        Returns as soon as the status version differs from since, or after
+        timeout with the unchanged status. While waiting, the request is parked
+        on the in-process payment status hub and costs no queries; status
+        changes from any process reach it through the NOTIFY listener.
+        """
+        queue = payment_status_hub.subscribe(payment_id)
+        try:
+            # Subscribed before reading, so no change falls in between
+            current = await PaymentService.get_status(payment_id, user_id)
+            if current is None or current['version'] != since:
+                return current
+
+            deadline = asyncio.get_running_loop().time() + timeout
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    return current
+                try:
+                    event = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    return current
+
+                if event is RESYNC:
+                    # Changes may have been missed, read the current status
+                    current = await PaymentService.get_status(payment_id, user_id)
+                    if current is None or current['version'] != since:
+                        return current
+                elif event['timestamp'] != since:
+                    return {
+                        "status": event['status'],
+                        "verification_status": event['verification_status'],
+                        "message": event['message'],
+                        "version": event['timestamp']
+                    }
+        finally:
+            payment_status_hub.unsubscribe(payment_id, queue)
+
     @staticmethod
     async def verify_payment(
             payment_id: uuid.UUID,
@@ -165,44 +295,168 @@ class PaymentService:
             message: Optional[str] = None
     ) -> tuple[bool, None] | tuple[bool, Payment]:
         """Verify a payment (update status)."""
-        payment = await Payment.get_or_none(id=payment_id)
-        if not payment:
-            return False, None
-
-        # Only verify pending payments
-        if payment.status != "pending":
-            return False, payment
-
-        # Update payment status
-        if status == "completed":
-            payment.status = "completed"
-            payment.payment_date = datetime.datetime.now()
-
-            # Generate transaction ID
-            payment.transaction_id = f"{payment.payment_type.upper()}-{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
-
-            # Mark order as completed
-            order = await payment.order
-            order.status = "completed"
-            await order.save()
+        now = timezone.now()
+        completed_order = None
+
+        async with in_transaction() as connection:
+            # Only pending payments can be verified; the status check and the
+            # update are a single statement, so concurrent verifications cannot
+            # both succeed
+            if status == "completed":
+                payment = await payment_states.transition(payment_id, "completed", payment_date=now)
+            elif status == "failed":
+                payment = await payment_states.transition(payment_id, "failed")
+            else:
+                payment = None
+
+            if not payment:
+                return False, await Payment.get_or_none(id=payment_id)
+
+            if status == "completed":
+                # Generate transaction ID
+                payment.transaction_id = PaymentService.transaction_id(payment, now)
+                await Payment.filter(id=payment_id).update(transaction_id=payment.transaction_id)
+
+                # Mark order as completed
+                completed_order = await order_states.transition(payment.order_id, "completed")
+                if completed_order:
+                    await OrderSummaryService.set_status(payment.order_id, "completed")
+
+            await OrderSummaryService.set_payment_status(payment.order_id, payment.status)
+
+            # Update verification record
+            verification_status = "verified" if status == "completed" else "rejected"
+            await PaymentVerification.filter(payment_id=payment_id).update(
+                verification_status=verification_status,
+                verification_message=message,
+                verified_at=now
+            )
 
-        elif status == "failed":
-            payment.status = "failed"
+            # Sent to the sockets waiting on the payment once this commits
+            await notify_payment_status(connection, status_event(
+                payment_id, payment.status, verification_status, message, payment.updated_at
+            ))
 
-        await payment.save()
+        await order_documents.invalidate(payment.order_id)
+        if completed_order:
+            await publish_order_event(ORDER_COMPLETED, completed_order)
 
-        # Update verification record
-        # Use the helper method for type hinting
-        payment_with_relations = payment.with_relations()
-        verification = await payment_with_relations.verification
+        return True, payment
 
-        if verification:
-            verification.verification_status = "verified" if status == "completed" else "rejected"
-            verification.verification_message = message
-            verification.verified_at = datetime.datetime.now()
-            await verification.save()
+    @staticmethod
+    def transaction_id(payment: Payment, verified_at: datetime.datetime) -> str:
+        """Transaction ID of a completed payment, e.g. QRIS-20261017120000-1A2B3C4D."""
+        return f"{payment.payment_type.upper()}-{verified_at.strftime('%Y%m%d%H%M%S')}-{payment.id.hex[:8].upper()}"
 
-        return True, payment
+    @staticmethod
+    async def verify_payments(
+            verifications: Sequence[Tuple[uuid.UUID, str, Optional[str]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Verify many payments in one transaction, e.g. a shift's cash or a gateway settlement file.
+
+        Every table is written with set-based statements: one status transition
+        per target status, one bulk update each for transaction IDs and
+        verifications, and one transition for the orders of the completed
+        payments. Only pending payments are verified; the others are reported.
+
+        Args:
+            verifications: (payment_id, status, message) items; status is
+                'completed' or 'failed'
+
+        Returns:
+            One outcome per item, in order: payment_id, status and success, and
+            an error when the payment was not verified
+        """
+        now = timezone.now()
+        outcomes = []
+        requested: Dict[str, Dict[uuid.UUID, Optional[str]]] = {'completed': {}, 'failed': {}}
+        seen = set()
+        for payment_id, status, message in verifications:
+            outcome = {'payment_id': payment_id, 'status': status, 'success': False}
+            outcomes.append(outcome)
+            if status not in requested:
+                outcome['error'] = "Status must be 'completed' or 'failed'"
+            elif payment_id in seen:
+                outcome['error'] = "Duplicate payment"
+            else:
+                requested[status][payment_id] = message
+            seen.add(payment_id)
+
+        completed_orders = []
+        verified: Dict[uuid.UUID, Payment] = {}
+        async with in_transaction() as connection:
+            for status, messages in requested.items():
+                if not messages:
+                    continue
+                values = {'payment_date': now} if status == 'completed' else {}
+                for payment in await payment_states.transition_many(status, {'id': list(messages)}, **values):
+                    verified[payment.id] = payment
+
+            if verified:
+                completed = [payment for payment in verified.values() if payment.status == 'completed']
+                for payment in completed:
+                    payment.transaction_id = PaymentService.transaction_id(payment, now)
+                if completed:
+                    await Payment.bulk_update(completed, fields=['transaction_id'])
+
+                    # Mark their orders as completed
+                    completed_orders = await order_states.transition_many(
+                        'completed', {'id': list({payment.order_id for payment in completed})}
+                    )
+                    if completed_orders:
+                        await OrderSummaryService.set_statuses([order.id for order in completed_orders], 'completed')
+
+                for status in requested:
+                    order_ids = [payment.order_id for payment in verified.values() if payment.status == status]
+                    if order_ids:
+                        await OrderSummaryService.set_payment_statuses(order_ids, status)
+
+                # Update verification records
+                records = await PaymentVerification.filter(payment_id__in=list(verified))
+                for record in records:
+                    status = verified[record.payment_id].status
+                    record.verification_status = "verified" if status == "completed" else "rejected"
+                    record.verification_message = requested[status][record.payment_id]
+                    record.verified_at = now
+                if records:
+                    await PaymentVerification.bulk_update(
+                        records, fields=['verification_status', 'verification_message', 'verified_at']
+                    )
+
+                # Sent to the sockets waiting on the payments once this commits
+                verification_statuses = {record.payment_id: record.verification_status for record in records}
+                await notify_payment_statuses(connection, [
+                    status_event(
+                        payment.id,
+                        payment.status,
+                        verification_statuses.get(payment.id),
+                        requested[payment.status][payment.id],
+                        payment.updated_at
+                    )
+                    for payment in verified.values()
+                ])
+
+        # Explain the payments that were not verified
+        rejected = [outcome['payment_id'] for outcome in outcomes if 'error' not in outcome
+                    and outcome['payment_id'] not in verified]
+        current_statuses = dict(await Payment.filter(id__in=rejected).values_list('id', 'status')) if rejected else {}
+        for outcome in outcomes:
+            if 'error' in outcome:
+                continue
+            if outcome['payment_id'] in verified:
+                outcome['success'] = True
+            elif outcome['payment_id'] in current_statuses:
+                outcome['error'] = f"Payment is {current_statuses[outcome['payment_id']]}"
+            else:
+                outcome['error'] = "Payment not found"
+
+        if verified:
+            await order_documents.invalidate(*{payment.order_id for payment in verified.values()})
+        for order in completed_orders:
+            await publish_order_event(ORDER_COMPLETED, order)
+
+        return outcomes
 
     @staticmethod
     async def download_qr(payment_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Dict[str, str]]:
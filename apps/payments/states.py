@@ -0,0 +1,8 @@
+from apps.payments.models import Payment
+from core.state_machine import StateMachine
+
+
+# Allowed payment status transitions
+payment_states = StateMachine(Payment, {
+    'pending': ('completed', 'failed', 'expired'),
+})
@@ -0,0 +1,11 @@
+from celery import shared_task
+from django.conf import settings
+
+from apps.payments.expiry import PaymentExpiryService
+from core.db import run_with_tortoise
+
+
+@shared_task
+def expire_overdue_payments() -> int:
+    """Expire the pending payments whose deadline has passed."""
+    return run_with_tortoise(PaymentExpiryService.expire_overdue, settings.PAYMENT_EXPIRY_BATCH_SIZE)
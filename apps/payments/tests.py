@@ -1,3 +1,162 @@
-from django.test import TestCase
+import datetime
+import os
+from decimal import Decimal
 
-# Create your tests here.
+from tortoise import timezone
+from tortoise.transactions import in_transaction
+
+from apps.orders.models import Order
+from apps.payments.expiry import EXPIRE_PAYMENTS_SQL, EXPIRED_MESSAGE, PaymentExpiryService
+from apps.payments.models import Payment, PaymentVerification, QRCode
+from apps.restaurants.models import Restaurant
+from apps.users.models import User
+from core.testing import APITestCase, PostgresAPITestCase
+
+
+class PaymentsTests(APITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = await User.create(username='customer', phone_number='0800', password='')
+        restaurant = await Restaurant.create(name='Warung')
+        self.order = await Order.create(
+            user=self.user, restaurant=restaurant, subtotal=Decimal(20000), total_amount=Decimal(20000)
+        )
+        self.payment = await Payment.create(
+            order=self.order,
+            payment_type='qris',
+            amount=Decimal(20000),
+            payment_deadline=timezone.now() + datetime.timedelta(minutes=15)
+        )
+
+    async def test_get_payment(self):
+        response = await self.request('GET', f'/api/payments/{self.payment.id}/', self.user)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], str(self.payment.id))
+
+    async def test_sparse_fields(self):
+        response = await self.request('GET', '/api/payments/?fields=id,amount', self.user)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'id': str(self.payment.id), 'amount': 20000.0}])
+
+    async def test_sparse_fields_with_related_members(self):
+        response = await self.request(
+            'GET', '/api/payments/?fields=id,time_remaining_seconds&expand=order_summary', self.user
+        )
+
+        self.assertEqual(response.status_code, 200)
+        [payment] = response.json()['results']
+        self.assertEqual(set(payment), {'id', 'time_remaining_seconds', 'order_summary'})
+        self.assertEqual(payment['order_summary']['status'], 'in_progress')
+
+    async def test_payment_times_are_timezone_aware(self):
+        # Django runs the process in TIME_ZONE, naive local times would be
+        # stored hours off
+        started = timezone.now()
+        response = await self.request('POST', '/api/payments/create/', self.user, json={
+            'order': str(self.order.id),
+            'payment_type': 'qris',
+            'amount': '20000',
+        })
+        self.assertEqual(response.status_code, 201)
+        payment = await Payment.get(id=response.json()['id'])
+        self.assertLess(payment.payment_deadline - started, datetime.timedelta(minutes=9))
+
+        staff = await User.create(username='cashier', phone_number='0801', password='', is_staff=True)
+        response = await self.request(
+            'POST', f'/api/payments/{payment.id}/verify/', staff, json={'status': 'completed'}
+        )
+        self.assertEqual(response.status_code, 200)
+        payment = await Payment.get(id=payment.id)
+        self.assertLess(payment.payment_date - started, datetime.timedelta(minutes=1))
+
+    async def test_renders_the_qr_code_in_the_process_pool(self):
+        response = await self.request('POST', '/api/payments/create/', self.user, json={
+            'order': str(self.order.id),
+            'payment_type': 'qris',
+            'amount': '20000',
+        })
+        self.assertEqual(response.status_code, 201)
+        payment_id = response.json()['id']
+
+        qr_code = await QRCode.get(payment_id=payment_id)
+        self.assertEqual(qr_code.qr_image_url, f'/media/qrcodes/{payment_id}.png')
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'qrcodes')), [f'{payment_id}.png'])
+        with open(os.path.join(self.media_root, 'qrcodes', f'{payment_id}.png'), 'rb') as image:
+            self.assertEqual(image.read(8), b'\x89PNG\r\n\x1a\n')
+
+    async def test_wait_for_status_answers_a_changed_version_at_once(self):
+        response = await self.request('GET', f'/api/payments/{self.payment.id}/status/wait/?since=0', self.user)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'pending')
+        self.assertEqual(response.json()['version'], self.payment.updated_at.isoformat())
+
+    async def test_wait_for_status_answers_an_unchanged_version_on_timeout(self):
+        version = self.payment.updated_at.isoformat()
+        response = await self.request(
+            'GET', f'/api/payments/{self.payment.id}/status/wait/', self.user, params={'since': version, 'timeout': 0.1}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], version)
+
+    async def test_wait_for_status_rejects_invalid_timeouts(self):
+        for timeout in ('soon', 'nan', 'inf', '-inf'):
+            response = await self.request(
+                'GET', f'/api/payments/{self.payment.id}/status/wait/?timeout={timeout}', self.user
+            )
+            self.assertEqual(response.status_code, 400, timeout)
+
+
+class PaymentExpiryTests(PostgresAPITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        user = await User.create(username='customer', phone_number='0800', password='')
+        restaurant = await Restaurant.create(name='Warung')
+        self.order = await Order.create(
+            user=user, restaurant=restaurant, subtotal=Decimal(20000), total_amount=Decimal(20000)
+        )
+
+    async def create_payment(self, deadline_in: int, status: str = 'pending') -> Payment:
+        payment = await Payment.create(
+            order=self.order,
+            payment_type='cash',
+            amount=Decimal(20000),
+            status=status,
+            payment_deadline=timezone.now() + datetime.timedelta(minutes=deadline_in)
+        )
+        await PaymentVerification.create(payment=payment, verification_type='cashier')
+        return payment
+
+    async def test_expires_overdue_pending_payments_in_batches(self):
+        overdue = [await self.create_payment(-30), await self.create_payment(-5)]
+        completed = await self.create_payment(-30, status='completed')
+        upcoming = await self.create_payment(10)
+
+        self.assertEqual(await PaymentExpiryService.expire_overdue(batch_size=1), 2)
+
+        for payment in overdue:
+            self.assertEqual((await Payment.get(id=payment.id)).status, 'expired')
+            verification = await PaymentVerification.get(payment_id=payment.id)
+            self.assertEqual(
+                (verification.verification_status, verification.verification_message),
+                ('expired', EXPIRED_MESSAGE)
+            )
+        self.assertEqual((await Payment.get(id=completed.id)).status, 'completed')
+        self.assertEqual((await Payment.get(id=upcoming.id)).status, 'pending')
+        self.assertEqual(await PaymentExpiryService.expire_overdue(), 0)
+
+    async def test_finds_overdue_payments_through_the_partial_index(self):
+        async with in_transaction() as connection:
+            # Too few rows for the planner to prefer the index on its own
+            await connection.execute_script('SET LOCAL enable_seqscan = off')
+            _, rows = await connection.execute_query(
+                f'EXPLAIN {EXPIRE_PAYMENTS_SQL}', [timezone.now(), 500, EXPIRED_MESSAGE]
+            )
+
+        # Each partition is scanned through its copy of the partial index
+        plan = '\n'.join(row['QUERY PLAN'] for row in rows)
+        self.assertIn('payments_default_payment_deadline_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
@@ -5,7 +5,10 @@ urlpatterns = [
     path('', views.list_payments, name='list_payments'),
     path('<uuid:pk>/', views.get_payment, name='get_payment'),
     path('create/', views.create_payment, name='create_payment'),
+    path('verify/', views.verify_payments, name='verify_payments'),
     path('<uuid:pk>/check_status/', views.check_payment_status, name='check_payment_status'),
+    path('<uuid:pk>/status/wait/', views.wait_payment_status, name='wait_payment_status'),
+    path('<uuid:pk>/verify/', views.verify_payment, name='verify_payment'),
     path('<uuid:pk>/download_qr/', views.download_qr, name='download_qr'),
     path('<uuid:pk>/share_qr/', views.share_qr, name='share_qr'),
 ]
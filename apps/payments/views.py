@@ -1,22 +1,36 @@
+import math
 import uuid
 from decimal import Decimal
 
+from django.conf import settings
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from adrf.decorators import api_view
+from rest_framework.decorators import permission_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
 from apps.payments.serializers import PaymentSerializer
 from apps.payments.services import PaymentService
+from core.pagination import KeysetPagination
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 async def list_payments(request):
-    """List user's payments."""
+    """List user's payments; ?compact=true lists only the list columns, with the order status."""
     status_filter = request.query_params.get('status')
-    payments = await PaymentService.get_user_payments(request.user.id, status_filter)
-    return Response(await PaymentSerializer(payments, many=True).data)
+    compact = request.query_params.get('compact', 'false').lower() == 'true'
+    serializer = PaymentSerializer.from_request(request)
+    paginator = KeysetPagination(request)
+    payments = await PaymentService.get_user_payments(
+        request.user.id,
+        status_filter,
+        projection=PaymentService.LIST_PROJECTION if compact else None,
+        paginator=paginator,
+        only=serializer.get_only_columns()
+    )
+    data = await serializer.to_representation_list(payments)
+    return paginator.get_paginated_response(data)
 
 
 @api_view(['GET'])
@@ -24,11 +38,11 @@ async def list_payments(request):
 async def get_payment(request, pk):
     """Get payment details."""
     try:
-        payment = await PaymentService.get_by_id(uuid.UUID(pk), request.user.id)
+        payment = await PaymentService.get_by_id(uuid.UUID(str(pk)), request.user.id)
         if not payment:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        return Response(await PaymentSerializer(payment).data)
+        return Response(await PaymentSerializer().to_representation(payment))
     except ValueError:
         return Response({"error": "Invalid payment ID"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -61,7 +75,7 @@ async def create_payment(request):
             table_id=uuid.UUID(table_id) if table_id else None
         )
 
-        return Response(await PaymentSerializer(payment).data, status=status.HTTP_201_CREATED)
+        return Response(await PaymentSerializer().to_representation(payment), status=status.HTTP_201_CREATED)
     except ValueError as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
@@ -73,18 +87,91 @@ async def create_payment(request):
 async def check_payment_status(request, pk):
     """Check payment status."""
     try:
-        status_info = await PaymentService.check_payment_status(uuid.UUID(pk), request.user.id)
+        status_info = await PaymentService.check_payment_status(uuid.UUID(str(pk)), request.user.id)
         return Response(status_info)
     except ValueError:
         return Response({"error": "Invalid payment ID"}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+async def verify_payment(request, pk):
+    """Verify a pending payment as completed or failed (staff only)."""
+    verification_status = request.data.get('status')
+    if verification_status not in ('completed', 'failed'):
+        return Response({'error': "Status must be 'completed' or 'failed'"}, status=status.HTTP_400_BAD_REQUEST)
+
+    success, payment = await PaymentService.verify_payment(
+        uuid.UUID(str(pk)),
+        verification_status,
+        request.data.get('message')
+    )
+    if not payment:
+        return Response({'error': 'Payment not found'}, status=status.HTTP_404_NOT_FOUND)
+    if not success:
+        return Response({'error': 'Payment is not pending'}, status=status.HTTP_409_CONFLICT)
+
+    return Response(await PaymentSerializer().to_representation(payment))
+
+
+# Largest batch accepted by verify_payments
+MAX_VERIFY_BATCH = 1000
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+async def verify_payments(request):
+    """Verify a batch of payments in one transaction (staff only)."""
+    items = request.data.get('payments')
+    if not isinstance(items, list) or not items:
+        return Response({'error': 'A list of payments is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_VERIFY_BATCH:
+        return Response({'error': f'At most {MAX_VERIFY_BATCH} payments per batch'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        verifications = [
+            (uuid.UUID(str(item['payment_id'])), item.get('status'), item.get('message'))
+            for item in items
+        ]
+    except (KeyError, TypeError, ValueError):
+        return Response({'error': 'Every payment needs a valid payment_id'}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = await PaymentService.verify_payments(verifications)
+    return Response({'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+async def wait_payment_status(request, pk):
+    """Long poll a payment's status: answer once it changes from ?since=<version>, or on timeout."""
+    try:
+        timeout = float(request.query_params.get('timeout', settings.PAYMENT_STATUS_WAIT_TIMEOUT))
+    except ValueError:
+        return Response({'error': 'Invalid timeout'}, status=status.HTTP_400_BAD_REQUEST)
+    # float() accepts 'nan' and 'inf', which min() and max() do not clamp
+    if not math.isfinite(timeout):
+        return Response({'error': 'Invalid timeout'}, status=status.HTTP_400_BAD_REQUEST)
+    timeout = min(timeout, settings.PAYMENT_STATUS_WAIT_TIMEOUT)
+
+    status_info = await PaymentService.wait_for_status(
+        uuid.UUID(str(pk)),
+        request.user.id,
+        request.query_params.get('since'),
+        max(timeout, 0)
+    )
+    if status_info is None:
+        return Response({'error': 'Payment not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response(status_info)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 async def download_qr(request, pk):
     """Download QR code for payment."""
     try:
-        qr_data = await PaymentService.download_qr(uuid.UUID(pk), request.user.id)
+        qr_data = await PaymentService.download_qr(uuid.UUID(str(pk)), request.user.id)
         if not qr_data:
             return Response({'error': 'QR code not available'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -98,7 +185,7 @@ async def download_qr(request, pk):
 async def share_qr(request, pk):
     """Share QR code for payment."""
     try:
-        success = await PaymentService.share_qr(uuid.UUID(pk), request.user.id)
+        success = await PaymentService.share_qr(uuid.UUID(str(pk)), request.user.id)
         if not success:
             return Response({'error': 'QR code not available'}, status=status.HTTP_404_NOT_FOUND)
 
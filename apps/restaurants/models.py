@@ -11,6 +11,8 @@ class Restaurant(Model):
     image_url = fields.CharField(max_length=255, null=True)
     rating = fields.DecimalField(max_digits=3, decimal_places=1, null=True)
     location = fields.CharField(max_length=255, null=True)
+    # Staff members working at the restaurant, who may follow its kitchen feed
+    staff = fields.ManyToManyField('models.User', related_name='staffed_restaurants', through='restaurant_staff')
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
 
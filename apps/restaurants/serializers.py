@@ -1,20 +1,22 @@
 from rest_framework import serializers
 from core.serializers import TortoiseSerializer
+from apps.restaurants.models import Table
 
 
 class TableSerializer(TortoiseSerializer):
+    model_name = 'Table'
+
     id = serializers.UUIDField(read_only=True)
     restaurant_id = serializers.UUIDField()
     table_number = serializers.CharField(max_length=10)
     capacity = serializers.IntegerField(required=False, allow_null=True)
     is_occupied = serializers.BooleanField(default=False)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance)
-        return pydantic_model.dict()
-
 
 class RestaurantSerializer(TortoiseSerializer):
+    model_name = 'Restaurant'
+    relation_fields = {'tables': 'tables'}
+
     id = serializers.UUIDField(read_only=True)
     name = serializers.CharField(max_length=100)
     description = serializers.CharField(required=False, allow_null=True)
@@ -23,13 +25,18 @@ class RestaurantSerializer(TortoiseSerializer):
     location = serializers.CharField(max_length=255, required=False, allow_null=True)
     tables = TableSerializer(many=True, read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance, exclude={'tables'})
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        if self.wants_relation('tables'):
+            await loader.load_children(Table, 'restaurant', [instance.id for instance in instances])
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Add tables
-        if hasattr(instance, 'tables'):
-            tables = await instance.tables.all()
-            data['tables'] = await TableSerializer.get_pydantic_models(tables)
+        table_serializer = self.nested(TableSerializer)
+        data['tables'] = [
+            await table_serializer.to_representation(table, loader)
+            for table in loader.children(Table, 'restaurant', instance.id)
+        ]
 
-        return data
\ No newline at end of file
+        return data
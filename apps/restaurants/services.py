@@ -1,23 +1,41 @@
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 
 from tortoise.functions import Avg
 
 from apps.restaurants.models import Restaurant, Table
 from apps.reviews.models import Testimonial
+from core.conditional import Validators, collection_validators
+from core.streaming import DEFAULT_CHUNK_SIZE, iterate_chunks
 
 
 class RestaurantService:
     @staticmethod
     async def get_all() -> List[Restaurant]:
         """Get all restaurants."""
-        return await Restaurant.all().prefetch_related('tables')
+        return await Restaurant.all()
+
+    @staticmethod
+    async def stream_all(chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Restaurant]]:
+        """Stream all restaurants in chunks."""
+        async for chunk in iterate_chunks(Restaurant.all().order_by('id'), chunk_size):
+            yield chunk
+
+    @staticmethod
+    async def get_list_validators() -> Validators:
+        """Get the ETag of the restaurant list, which includes the tables."""
+        return await collection_validators((Restaurant.all(), Table.all()))
 
     @staticmethod
     async def get_by_id(restaurant_id: uuid.UUID) -> Optional[Restaurant]:
         """Get restaurant by ID."""
         return await Restaurant.get_or_none(id=restaurant_id).prefetch_related('tables')
 
+    @staticmethod
+    async def is_staff_member(restaurant_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+        """Whether the user is on the restaurant's staff."""
+        return await Restaurant.filter(id=restaurant_id, staff__id=user_id).exists()
+
     @staticmethod
     async def create_restaurant(data: Dict[str, Any]) -> Restaurant:
         """Create a new restaurant."""
@@ -1,3 +1,41 @@
-from django.test import TestCase
+from django.utils.http import http_date
 
-# Create your tests here.
+from apps.restaurants.models import Restaurant, Table
+from core.testing import APITestCase
+
+
+class ListRestaurantsTests(APITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.restaurant = await Restaurant.create(name='Warung')
+
+    async def test_not_modified(self):
+        response = await self.request('GET', '/api/restaurants/')
+        self.assertEqual(response.status_code, 200)
+
+        response = await self.request('GET', '/api/restaurants/', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_adding_a_table_changes_the_etag(self):
+        response = await self.request('GET', '/api/restaurants/')
+        etag = response.headers['ETag']
+
+        await Table.create(restaurant=self.restaurant, table_number='A1')
+
+        response = await self.request('GET', '/api/restaurants/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([table['table_number'] for table in response.json()[0]['tables']], ['A1'])
+
+    async def test_deleting_a_restaurant_is_not_hidden_by_if_modified_since(self):
+        kept = await Restaurant.create(name='Kedai')
+        response = await self.request('GET', '/api/restaurants/')
+        self.assertNotIn('Last-Modified', response.headers)
+
+        await self.restaurant.delete()
+
+        # The newest updated_at, which the list used to send as Last-Modified
+        response = await self.request('GET', '/api/restaurants/', headers={
+            'If-Modified-Since': http_date(kept.updated_at.timestamp()),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([restaurant['name'] for restaurant in response.json()], ['Kedai'])
@@ -1,18 +1,27 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from adrf.decorators import api_view
+from rest_framework.decorators import permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
 from apps.restaurants.serializers import RestaurantSerializer, TableSerializer
 from apps.restaurants.services import RestaurantService
+from core.conditional import not_modified, set_validators
+from core.streaming import streaming_json_response
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 async def list_restaurants(request):
-    """List all restaurants."""
-    restaurants = await RestaurantService.get_all()
-    return Response(await RestaurantSerializer(restaurants, many=True).data)
+    """List all restaurants, streamed in chunks."""
+    validators = await RestaurantService.get_list_validators()
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    serializer = RestaurantSerializer(raw_json=True)
+    response = streaming_json_response(RestaurantService.stream_all(), serializer.to_representation_list)
+    return set_validators(response, validators)
 
 
 @api_view(['GET'])
@@ -23,7 +32,7 @@ async def get_restaurant(request, pk):
     if not restaurant:
         return Response(status=status.HTTP_404_NOT_FOUND)
 
-    return Response(await RestaurantSerializer(restaurant).data)
+    return Response(await RestaurantSerializer().to_representation(restaurant))
 
 
 @api_view(['GET'])
@@ -31,4 +40,4 @@ async def get_restaurant(request, pk):
 async def get_restaurant_tables(request, restaurant_id):
     """Get available tables for a restaurant."""
     tables = await RestaurantService.get_available_tables(restaurant_id)
-    return Response(await TableSerializer(tables, many=True).data)
\ No newline at end of file
+    return Response(await TableSerializer().to_representation_list(tables))
\ No newline at end of file
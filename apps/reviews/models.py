@@ -8,7 +8,7 @@ class Testimonial(Model):
     id = fields.UUIDField(pk=True, default=uuid.uuid4)
     user = fields.ForeignKeyField('models.User', related_name='testimonials')
     restaurant = fields.ForeignKeyField('models.Restaurant', related_name='testimonials')
-    order = fields.ForeignKeyField('models.Order', related_name='testimonial', null=True)
+    order = fields.ForeignKeyField('models.Order', related_name='testimonial', null=True, db_constraint=False)
     rating = fields.IntField()  # 1-5 stars
     comments = fields.TextField(null=True)
     feedback_categories = fields.JSONField(default=list)  # Store categories as a JSON array
@@ -17,4 +17,6 @@ class Testimonial(Model):
     updated_at = fields.DatetimeField(auto_now=True)
 
     class Meta:
-        table = "testimonials"
\ No newline at end of file
+        table = "testimonials"
+        # Serves keyset pagination of a restaurant's testimonials
+        indexes = [("restaurant_id", "date", "id")]
\ No newline at end of file
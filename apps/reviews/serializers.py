@@ -1,8 +1,13 @@
 from rest_framework import serializers
 from core.serializers import TortoiseSerializer
+from apps.restaurants.models import Restaurant
+from apps.users.models import User
 
 
 class TestimonialSerializer(TortoiseSerializer):
+    model_name = 'Testimonial'
+    relation_fields = {'user': 'user', 'restaurant': 'restaurant'}
+
     id = serializers.UUIDField(read_only=True)
     user_id = serializers.UUIDField(read_only=True)
     restaurant_id = serializers.UUIDField()
@@ -16,28 +21,29 @@ class TestimonialSerializer(TortoiseSerializer):
     )
     date = serializers.DateTimeField(read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance)
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        if self.wants_relation('user'):
+            await loader.load_related(instances, 'user', User)
+        if self.wants_relation('restaurant'):
+            await loader.load_related(instances, 'restaurant', Restaurant)
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Include user info
-        if hasattr(instance, 'user'):
-            user = await instance.user
+        user = loader.get(User, instance.user_id)
+        if user:
             data['user'] = {
                 'id': str(user.id),
                 'username': user.username
             }
 
         # Include restaurant info
-        if hasattr(instance, 'restaurant'):
-            restaurant = await instance.restaurant
+        restaurant = loader.get(Restaurant, instance.restaurant_id)
+        if restaurant:
             data['restaurant'] = {
                 'id': str(restaurant.id),
                 'name': restaurant.name
             }
 
         return data
-
-    async def to_representation_list(self, instances):
-        """Convert multiple instances to representation."""
-        return [await self.to_representation(instance) for instance in instances]
\ No newline at end of file
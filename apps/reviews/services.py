@@ -1,10 +1,17 @@
 import uuid
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 
+from tortoise import timezone
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
+
+from apps.orders.cache import order_documents
 from apps.orders.models import Order
+from apps.orders.services import OrderSummaryService
 from apps.restaurants.models import Restaurant
 from apps.reviews.models import Testimonial
 from apps.users.models import User
+from core.pagination import KeysetPagination
 
 
 class TestimonialService:
@@ -14,19 +21,26 @@ class TestimonialService:
         return await Testimonial.get_or_none(id=testimonial_id).prefetch_related('user', 'restaurant')
 
     @staticmethod
-    async def get_by_restaurant(restaurant_id: uuid.UUID, limit: int = 10) -> List[Testimonial]:
-        """Get testimonials for a restaurant."""
-        return await Testimonial.filter(
-            restaurant_id=restaurant_id
-        ).order_by('-date').limit(limit).prefetch_related('user')
+    async def get_by_restaurant(
+            restaurant_id: uuid.UUID,
+            limit: int = 10,
+            paginator: Optional[KeysetPagination] = None,
+            only: Optional[Sequence[str]] = None
+    ) -> List[Testimonial]:
+        """Get testimonials for a restaurant, newest first; the paginator replaces limit."""
+        query = Testimonial.filter(restaurant_id=restaurant_id)
+        if only:
+            # Sparse fieldsets: load only the requested columns (plus the ordering key)
+            query = query.only(*{*only, 'date'})
+        if paginator:
+            return await paginator.paginate_queryset(query)
+
+        return await query.order_by('-date').limit(limit)
 
     @staticmethod
     async def get_by_user(user_id: uuid.UUID, limit: int = 10) -> List[Testimonial]:
         """Get testimonials written by a user."""
-        return await Testimonial.filter(
-            user_id=user_id,
-            limit=limit
-        ).order_by('-date').prefetch_related('restaurant')
+        return await Testimonial.filter(user_id=user_id).order_by('-date').limit(limit)
 
     @staticmethod
     async def create_testimonial(
@@ -38,39 +52,41 @@ class TestimonialService:
             order_id: Optional[uuid.UUID] = None
     ) -> Testimonial:
         """Create a new testimonial."""
-        # Validate rating
-        if not 1 <= rating <= 5:
-            raise ValueError("Rating must be between 1 and 5")
-
-        # Verify restaurant exists
-        restaurant = await Restaurant.get_or_none(id=restaurant_id)
-        if not restaurant:
-            raise ValueError("Restaurant not found")
+        async with in_transaction():
+            # Validate rating
+            if not 1 <= rating <= 5:
+                raise ValueError("Rating must be between 1 and 5")
+
+            # Verify restaurant exists
+            restaurant = await Restaurant.get_or_none(id=restaurant_id)
+            if not restaurant:
+                raise ValueError("Restaurant not found")
+
+            # Verify order if provided and mark it as reviewed, writing only that flag
+            if order_id:
+                reviewed = await Order.filter(id=order_id, user_id=user_id).update(
+                    is_reviewed=True,
+                    updated_at=timezone.now()
+                )
+                if not reviewed:
+                    raise ValueError("Order not found or does not belong to user")
+                await OrderSummaryService.mark_reviewed(order_id)
+
+            # Create testimonial
+            testimonial = await Testimonial.create(
+                user_id=user_id,
+                restaurant_id=restaurant_id,
+                order_id=order_id,
+                rating=rating,
+                comments=comments,
+                feedback_categories=feedback_categories or []
+            )
+
+            # Award points to user (500 points per review)
+            await User.filter(id=user_id).update(total_points=F('total_points') + 500)
 
-        # Verify order if provided
         if order_id:
-            order = await Order.get_or_none(id=order_id, user_id=user_id)
-            if not order:
-                raise ValueError("Order not found or does not belong to user")
-
-            # Mark order as reviewed
-            order.is_reviewed = True
-            await order.save()
-
-        # Create testimonial
-        testimonial = await Testimonial.create(
-            user_id=user_id,
-            restaurant_id=restaurant_id,
-            order_id=order_id,
-            rating=rating,
-            comments=comments,
-            feedback_categories=feedback_categories or []
-        )
-
-        # Award points to user (500 points per review)
-        user = await User.get(id=user_id)
-        user.total_points += 500
-        await user.save()
+            await order_documents.invalidate(order_id)
 
         return testimonial
 
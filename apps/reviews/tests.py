@@ -1,3 +1,60 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from apps.orders.models import Order
+from apps.restaurants.models import Restaurant
+from apps.reviews.models import Testimonial
+from apps.users.models import User
+from core.testing import APITestCase
+
+
+class TestimonialsTests(APITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = await User.create(username='customer', phone_number='0800', password='')
+        self.restaurant = await Restaurant.create(name='Warung')
+        self.testimonial = await Testimonial.create(user=self.user, restaurant=self.restaurant, rating=5)
+
+    async def test_restaurant_testimonials_sparse_fields(self):
+        response = await self.request('GET', f'/api/reviews/restaurant/{self.restaurant.id}/?fields=id,rating')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'id': str(self.testimonial.id), 'rating': 5}])
+
+    async def test_user_testimonials(self):
+        response = await self.request('GET', '/api/reviews/user/?limit=5', self.user)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([testimonial['id'] for testimonial in response.json()], [str(self.testimonial.id)])
+
+    async def create_testimonial(self, order, user=None):
+        return await self.request('POST', '/api/reviews/', user or self.user, json={
+            'restaurant_id': str(self.restaurant.id),
+            'rating': 4,
+            'order_id': str(order.id),
+        })
+
+    async def test_reviewing_an_order_only_flags_it(self):
+        order = await Order.create(
+            user=self.user, restaurant=self.restaurant, subtotal=Decimal(20000), total_amount=Decimal(20000)
+        )
+        # Completed by the cashier after the customer's form was loaded
+        await Order.filter(id=order.id).update(status='completed')
+
+        response = await self.create_testimonial(order)
+
+        self.assertEqual(response.status_code, 201)
+        order = await Order.get(id=order.id)
+        self.assertEqual((order.status, order.is_reviewed), ('completed', True))
+        self.assertEqual((await User.get(id=self.user.id)).total_points, self.user.total_points + 500)
+
+    async def test_cannot_review_another_users_order(self):
+        other = await User.create(username='other', phone_number='0801', password='')
+        order = await Order.create(
+            user=other, restaurant=self.restaurant, subtotal=Decimal(20000), total_amount=Decimal(20000)
+        )
+
+        response = await self.create_testimonial(order)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse((await Order.get(id=order.id)).is_reviewed)
+        self.assertEqual(await Testimonial.filter(order_id=order.id).count(), 0)
@@ -1,4 +1,5 @@
-from rest_framework.decorators import api_view, permission_classes
+from adrf.decorators import api_view
+from rest_framework.decorators import permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
@@ -6,6 +7,7 @@ import uuid
 
 from apps.reviews.services import TestimonialService
 from apps.reviews.serializers import TestimonialSerializer
+from core.pagination import KeysetPagination
 
 
 @api_view(['GET'])
@@ -13,12 +15,16 @@ from apps.reviews.serializers import TestimonialSerializer
 async def list_restaurant_testimonials(request, restaurant_id):
     """List testimonials for a restaurant."""
     try:
+        # "limit" stays the page size parameter of this endpoint
+        serializer = TestimonialSerializer.from_request(request)
+        paginator = KeysetPagination(request, ordering_field='date', page_size_query_param='limit')
         testimonials = await TestimonialService.get_by_restaurant(
-            uuid.UUID(restaurant_id),
-            limit=int(request.query_params.get('limit', 10))
+            uuid.UUID(str(restaurant_id)),
+            paginator=paginator,
+            only=serializer.get_only_columns()
         )
-        data = await TestimonialSerializer().to_representation_list(testimonials)
-        return Response(data)
+        data = await serializer.to_representation_list(testimonials)
+        return paginator.get_paginated_response(data)
     except ValueError:
         return Response({"error": "Invalid restaurant ID"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -78,7 +84,7 @@ async def update_testimonial(request, pk):
     """Update an existing testimonial."""
     try:
         testimonial = await TestimonialService.update_testimonial(
-            uuid.UUID(pk),
+            uuid.UUID(str(pk)),
             request.user.id,
             request.data
         )
@@ -97,7 +103,7 @@ async def update_testimonial(request, pk):
 async def delete_testimonial(request, pk):
     """Delete a testimonial."""
     try:
-        success = await TestimonialService.delete_testimonial(uuid.UUID(pk), request.user.id)
+        success = await TestimonialService.delete_testimonial(uuid.UUID(str(pk)), request.user.id)
 
         if not success:
             return Response(status=status.HTTP_404_NOT_FOUND)
@@ -3,6 +3,9 @@ from core.serializers import TortoiseSerializer
 
 
 class UserSerializer(TortoiseSerializer):
+    model_name = 'User'
+    pydantic_exclude = frozenset({'password'})
+
     id = serializers.UUIDField(read_only=True)
     username = serializers.CharField(max_length=50)
     email = serializers.EmailField(required=False, allow_null=True)
@@ -12,22 +15,16 @@ class UserSerializer(TortoiseSerializer):
     total_points = serializers.IntegerField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance)
-        data = pydantic_model.dict(exclude={'password'})
-        return data
-
 
 class AuthenticationSerializer(TortoiseSerializer):
+    model_name = 'Authentication'
+    pydantic_exclude = frozenset({'auth_token'})
+
     id = serializers.UUIDField(read_only=True)
     user_id = serializers.UUIDField()
     auth_provider = serializers.CharField(max_length=20)
     last_login = serializers.DateTimeField(read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance)
-        return pydantic_model.dict(exclude={'auth_token'})
-
 
 class PhoneLoginSerializer(serializers.Serializer):
     phone_number = serializers.CharField(max_length=20)
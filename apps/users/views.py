@@ -1,5 +1,6 @@
+from adrf.decorators import api_view
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -16,7 +17,7 @@ from core.otp_service import OTPService
 async def send_otp(request):
     """Send OTP to phone number for login/registration."""
     serializer = PhoneLoginSerializer(data=request.data)
-    if not await serializer.is_valid():
+    if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     phone_number = serializer.validated_data['phone_number']
@@ -35,7 +36,7 @@ async def send_otp(request):
 async def verify_otp(request):
     """Verify OTP and login/register user."""
     serializer = OTPVerificationSerializer(data=request.data)
-    if not await serializer.is_valid():
+    if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     phone_number = serializer.validated_data['phone_number']
@@ -65,7 +66,7 @@ async def verify_otp(request):
     refresh = RefreshToken.for_user(user)
 
     return Response({
-        'user': await UserSerializer(user).data,
+        'user': await UserSerializer().to_representation(user),
         'refresh': str(refresh),
         'access': str(refresh.access_token),
         'is_new_user': is_new_user
@@ -77,7 +78,7 @@ async def verify_otp(request):
 async def social_login(request):
     """Login/register using social provider."""
     serializer = SocialLoginSerializer(data=request.data)
-    if not await serializer.is_valid():
+    if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     provider_name = serializer.validated_data['provider']
@@ -103,7 +104,7 @@ async def social_login(request):
     refresh = RefreshToken.for_user(user)
 
     return Response({
-        'user': await UserSerializer(user).data,
+        'user': await UserSerializer().to_representation(user),
         'refresh': str(refresh),
         'access': str(refresh.access_token),
         'is_new_user': is_new_user
@@ -115,7 +116,7 @@ async def social_login(request):
 async def get_profile(request):
     """Get current user profile."""
     user = await UserService.get_by_id(request.user.id)
-    return Response(await UserSerializer(user).data)
+    return Response(await UserSerializer().to_representation(user))
 
 
 @api_view(['PUT'])
@@ -123,4 +124,4 @@ async def get_profile(request):
 async def update_profile(request):
     """Update user profile."""
     user = await UserService.update_user(request.user.id, request.data)
-    return Response(await UserSerializer(user).data)
\ No newline at end of file
+    return Response(await UserSerializer().to_representation(user))
\ No newline at end of file
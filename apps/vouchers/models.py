@@ -27,19 +27,21 @@ class UserVoucher(Model):
     user = fields.ForeignKeyField('models.User', related_name='vouchers')
     voucher = fields.ForeignKeyField('models.Voucher', related_name='user_vouchers')
     is_used = fields.BooleanField(default=False)
-    order = fields.ForeignKeyField('models.Order', related_name='redeemed_vouchers', null=True)
+    order = fields.ForeignKeyField('models.Order', related_name='redeemed_vouchers', null=True, db_constraint=False)
     date_acquired = fields.DatetimeField(auto_now_add=True)
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
 
     class Meta:
         table = "user_vouchers"
+        # Serves keyset pagination of a user's vouchers
+        indexes = [("user_id", "created_at", "id")]
 
 
 class OrderVoucher(Model):
     """Vouchers applied to orders."""
     id = fields.UUIDField(pk=True, default=uuid.uuid4)
-    order = fields.ForeignKeyField('models.Order', related_name='applied_vouchers')
+    order = fields.ForeignKeyField('models.Order', related_name='applied_vouchers', db_constraint=False)
     voucher = fields.ForeignKeyField('models.Voucher', related_name='order_applications')
     user_voucher = fields.ForeignKeyField('models.UserVoucher', related_name='order_application', null=True)
     discount_amount = fields.DecimalField(max_digits=10, decimal_places=2)
@@ -0,0 +1,85 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from tortoise.expressions import Q
+
+from apps.vouchers.models import OrderVoucher, UserVoucher
+
+
+async def lock_user_vouchers(
+        user_id: uuid.UUID,
+        voucher_ids: Optional[Iterable[uuid.UUID]] = None,
+        user_voucher_ids: Optional[Iterable[uuid.UUID]] = None
+) -> Dict[uuid.UUID, UserVoucher]:
+    """
+    Lock a user's unused, valid vouchers for redemption; must run inside a transaction.
+
+    The user vouchers are read together with their voucher in one
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` join. Only the user voucher rows are
+    locked, and rows locked by a concurrent checkout are skipped, so two
+    orders can never redeem the same user voucher.
+
+    Args:
+        user_id: Owner of the vouchers
+        voucher_ids: Vouchers to resolve, one user voucher each
+        user_voucher_ids: Specific user vouchers to resolve
+
+    Returns:
+        The locked user vouchers keyed by voucher id, with ``voucher`` loaded
+    """
+    query = UserVoucher.filter(
+        Q(voucher__expiry_date__isnull=True) | Q(voucher__expiry_date__gt=date.today()),
+        user_id=user_id,
+        is_used=False,
+        voucher__is_active=True
+    )
+    if voucher_ids is not None:
+        query = query.filter(voucher_id__in=list(voucher_ids))
+    if user_voucher_ids is not None:
+        query = query.filter(id__in=list(user_voucher_ids))
+
+    user_vouchers = {}
+    for user_voucher in await query.select_related('voucher').select_for_update(
+            skip_locked=True,
+            of=(UserVoucher._meta.db_table,)
+    ).order_by('date_acquired'):
+        user_vouchers.setdefault(user_voucher.voucher_id, user_voucher)
+    return user_vouchers
+
+
+async def redeem_user_vouchers(
+        order_id: uuid.UUID,
+        user_vouchers: Iterable[UserVoucher],
+        discounts: Dict[uuid.UUID, Decimal]
+) -> List[OrderVoucher]:
+    """
+    Redeem locked user vouchers on an order.
+
+    Marks them used with one bulk UPDATE and inserts their order vouchers with
+    one bulk INSERT; discounts are keyed by voucher id.
+    """
+    user_vouchers = list(user_vouchers)
+    if not user_vouchers:
+        return []
+
+    await UserVoucher.filter(id__in=[user_voucher.id for user_voucher in user_vouchers]).update(
+        is_used=True,
+        order_id=order_id
+    )
+
+    order_vouchers = []
+    for user_voucher in user_vouchers:
+        user_voucher.is_used = True
+        user_voucher.order_id = order_id
+        order_vouchers.append(OrderVoucher(
+            id=uuid.uuid4(),
+            order_id=order_id,
+            voucher_id=user_voucher.voucher_id,
+            user_voucher_id=user_voucher.id,
+            discount_amount=discounts[user_voucher.voucher_id]
+        ))
+
+    await OrderVoucher.bulk_create(order_vouchers)
+    return order_vouchers
@@ -1,8 +1,11 @@
 from rest_framework import serializers
 from core.serializers import TortoiseSerializer
+from apps.vouchers.models import Voucher
 
 
 class VoucherSerializer(TortoiseSerializer):
+    model_name = 'Voucher'
+
     id = serializers.UUIDField(read_only=True)
     code = serializers.CharField(max_length=20)
     description = serializers.CharField(max_length=255)
@@ -17,16 +20,11 @@ class VoucherSerializer(TortoiseSerializer):
     expiry_date = serializers.DateField(required=False, allow_null=True)
     is_active = serializers.BooleanField(default=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance)
-        return pydantic_model.dict()
-
-    async def to_representation_list(self, instances):
-        """Convert multiple instances to representation."""
-        return [await self.to_representation(instance) for instance in instances]
-
 
 class UserVoucherSerializer(TortoiseSerializer):
+    model_name = 'UserVoucher'
+    relation_fields = {'voucher': 'voucher'}
+
     id = serializers.UUIDField(read_only=True)
     user_id = serializers.UUIDField(read_only=True)
     voucher_id = serializers.UUIDField(read_only=True)
@@ -35,43 +33,41 @@ class UserVoucherSerializer(TortoiseSerializer):
     order_id = serializers.UUIDField(read_only=True, allow_null=True)
     date_acquired = serializers.DateTimeField(read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(instance, exclude={'voucher'})
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        if self.wants_relation('voucher'):
+            await loader.load_related(instances, 'voucher', Voucher)
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Include voucher details
-        if hasattr(instance, 'voucher'):
-            voucher = await instance.voucher
-            data['voucher'] = await VoucherSerializer().to_representation(voucher)
+        voucher = loader.get(Voucher, instance.voucher_id)
+        if voucher:
+            data['voucher'] = await self.nested(VoucherSerializer).to_representation(voucher, loader)
 
         return data
 
-    async def to_representation_list(self, instances):
-        """Convert multiple instances to representation."""
-        return [await self.to_representation(instance) for instance in instances]
-
 
 class OrderVoucherSerializer(TortoiseSerializer):
+    model_name = 'OrderVoucher'
+    relation_fields = {'voucher': 'voucher'}
+
     id = serializers.UUIDField(read_only=True)
     order_id = serializers.UUIDField()
     voucher_id = serializers.UUIDField(read_only=True)
     user_voucher_id = serializers.UUIDField()
     discount_amount = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
-    async def to_representation(self, instance):
-        pydantic_model = await self.get_pydantic_model(
-            instance,
-            exclude={'voucher', 'user_voucher'}
-        )
-        data = pydantic_model.dict()
+    async def load_batch(self, instances, loader):
+        if self.wants_relation('voucher'):
+            await loader.load_related(instances, 'voucher', Voucher)
+
+    async def get_related_data(self, instance, loader):
+        data = {}
 
         # Include voucher details
-        if hasattr(instance, 'voucher'):
-            voucher = await instance.voucher
-            data['voucher'] = await VoucherSerializer().to_representation(voucher)
+        voucher = loader.get(Voucher, instance.voucher_id)
+        if voucher:
+            data['voucher'] = await self.nested(VoucherSerializer).to_representation(voucher, loader)
 
         return data
-
-    async def to_representation_list(self, instances):
-        """Convert multiple instances to representation."""
-        return [await self.to_representation(instance) for instance in instances]
\ No newline at end of file
@@ -1,19 +1,48 @@
 import uuid
 from datetime import date
-from decimal import Decimal
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Union
 
-from tortoise.transactions import atomic
+from tortoise import timezone
+from tortoise.transactions import atomic, in_transaction
 
+from apps.orders.cache import order_documents
 from apps.orders.models import Order
+from apps.orders.pricing import voucher_discount
+from apps.orders.services import OrderSummaryService
 from apps.users.models import User
 from apps.vouchers.models import Voucher, UserVoucher, OrderVoucher
+from apps.vouchers.redemption import lock_user_vouchers, redeem_user_vouchers
+from core.conditional import Validators, collection_validators
+from core.pagination import KeysetPagination
+from core.projections import Projection, ProjectionRows
 
 
 class VoucherService:
+    # Voucher catalogue columns, without the description
+    LIST_PROJECTION = Projection(Voucher, (
+        'id', 'code', 'points_cost', 'value', 'discount_percentage', 'expiry_date', 'is_active',
+    ))
+
+    # Owned voucher columns, with the voucher terms joined in
+    USER_LIST_PROJECTION = Projection(UserVoucher, {
+        'id': 'id',
+        'voucher_id': 'voucher_id',
+        'is_used': 'is_used',
+        'order_id': 'order_id',
+        'date_acquired': 'date_acquired',
+        'created_at': 'created_at',
+        'voucher_code': 'voucher__code',
+        'voucher_value': 'voucher__value',
+        'voucher_discount_percentage': 'voucher__discount_percentage',
+        'voucher_expiry_date': 'voucher__expiry_date',
+    })
+
     @staticmethod
-    async def get_all_vouchers(include_inactive: bool = False) -> List[Voucher]:
-        """Get all vouchers, optionally including inactive ones."""
+    async def get_all_vouchers(
+            include_inactive: bool = False,
+            projection: Optional[Projection] = None
+    ) -> Union[List[Voucher], ProjectionRows]:
+        """Get all vouchers, optionally including inactive ones or reading only projected columns."""
         query = Voucher.all()
         if not include_inactive:
             today = date.today()
@@ -22,8 +51,21 @@ class VoucherService:
                 expiry_date__gt=today
             )
 
+        if projection:
+            return await projection.fetch(query)
         return await query
 
+    @staticmethod
+    async def get_list_validators(include_inactive: bool = False, compact: bool = False) -> Validators:
+        """Get the ETag of the voucher list, full or as LIST_PROJECTION rows."""
+        if include_inactive:
+            return await collection_validators((Voucher.all(),), include_inactive, compact)
+
+        # Vouchers drop out of the list when they expire, so the date is part of the ETag
+        today = date.today()
+        query = Voucher.filter(is_active=True, expiry_date__gt=today)
+        return await collection_validators((query,), include_inactive, compact, today)
+
     @staticmethod
     async def get_voucher_by_id(voucher_id: uuid.UUID) -> Optional[Voucher]:
         """Get voucher by ID."""
@@ -37,14 +79,26 @@ class VoucherService:
     @staticmethod
     async def get_user_vouchers(
             user_id: uuid.UUID,
-            used: Optional[bool] = None
-    ) -> List[UserVoucher]:
-        """Get vouchers owned by a user, optionally filtering by used status."""
+            used: Optional[bool] = None,
+            projection: Optional[Projection] = None,
+            paginator: Optional[KeysetPagination] = None,
+            only: Optional[Sequence[str]] = None
+    ) -> Union[List[UserVoucher], ProjectionRows]:
+        """Get vouchers owned by a user, optionally filtered by used status, projected and/or paginated."""
         query = UserVoucher.filter(user_id=user_id)
         if used is not None:
             query = query.filter(is_used=used)
 
-        return await query.prefetch_related('voucher')
+        if only and not projection:
+            # Sparse fieldsets: load only the requested columns (plus the ordering key)
+            query = query.only(*{*only, 'created_at'})
+
+        if paginator:
+            return await paginator.paginate_queryset(query, projection.fetch if projection else None)
+
+        if projection:
+            return await projection.fetch(query)
+        return await query
 
     @staticmethod
     async def get_user_voucher_by_id(
@@ -99,58 +153,45 @@ class VoucherService:
         return user_voucher
 
     @staticmethod
-    @atomic()
     async def apply_voucher_to_order(
             order_id: uuid.UUID,
             user_voucher_id: uuid.UUID,
             user_id: uuid.UUID
     ) -> OrderVoucher:
         """Apply a voucher to an order."""
-        # Verify user voucher belongs to user and is unused
-        user_voucher = await UserVoucher.get_or_none(
-            id=user_voucher_id,
-            user_id=user_id,
-            is_used=False
-        )
-
-        if not user_voucher:
-            raise ValueError("Voucher not found or already used")
-
-        # Verify order belongs to user
-        order = await Order.get_or_none(id=order_id, user_id=user_id)
-        if not order:
-            raise ValueError("Order not found or does not belong to user")
-
-        # Get voucher details
-        voucher = await user_voucher.voucher
-
-        # Calculate discount
-        discount_amount = Decimal(0)
-        if voucher.discount_percentage:
-            discount_amount = order.subtotal * (voucher.discount_percentage / 100)
-        else:
-            discount_amount = voucher.value
-
-        # Cap discount at subtotal
-        discount_amount = min(discount_amount, order.subtotal)
-
-        # Create order voucher
-        order_voucher = await OrderVoucher.create(
-            order_id=order_id,
-            voucher_id=voucher.id,
-            user_voucher_id=user_voucher_id,
-            discount_amount=discount_amount
-        )
-
-        # Mark user voucher as used
-        user_voucher.is_used = True
-        user_voucher.order_id = order_id
-        await user_voucher.save()
+        async with in_transaction():
+            # Verify order belongs to user; the row lock holds off status
+            # transitions until the new totals are written
+            order = await Order.filter(id=order_id, user_id=user_id).select_for_update().first()
+            if not order:
+                raise ValueError("Order not found or does not belong to user")
+            if order.status != 'in_progress':
+                raise ValueError("Vouchers can only be applied to orders in progress")
+
+            # Lock the user voucher, verifying it belongs to the user and is unused
+            user_vouchers = await lock_user_vouchers(user_id, user_voucher_ids=[user_voucher_id])
+            if not user_vouchers:
+                raise ValueError("Voucher not found or already used")
+            voucher_id, user_voucher = user_vouchers.popitem()
+
+            # Calculate discount, capped at subtotal
+            discount_amount = min(voucher_discount(user_voucher.voucher, order.subtotal), order.subtotal)
+
+            order_voucher, = await redeem_user_vouchers(order_id, [user_voucher], {voucher_id: discount_amount})
+
+            # Update order total, writing only the amounts of an order still in progress
+            order.discount_amount += discount_amount
+            order.total_amount = order.subtotal + order.order_fee - order.discount_amount
+            updated = await Order.filter(id=order_id, status='in_progress').update(
+                discount_amount=order.discount_amount,
+                total_amount=order.total_amount,
+                updated_at=timezone.now()
+            )
+            if not updated:
+                raise ValueError("Vouchers can only be applied to orders in progress")
+            await OrderSummaryService.set_totals(order)
 
-        # Update order total
-        order.discount_amount += discount_amount
-        order.total_amount = order.subtotal + order.order_fee - order.discount_amount
-        await order.save()
+        await order_documents.invalidate(order_id)
 
         # Prefetch relations
         await order_voucher.fetch_related('voucher', 'user_voucher')
@@ -1,3 +1,169 @@
-from django.test import TestCase
+import asyncio
+from decimal import Decimal
 
-# Create your tests here.
+from tortoise.transactions import in_transaction
+
+from apps.menu.models import MenuItem
+from apps.orders.models import Order
+from apps.restaurants.models import Restaurant
+from apps.users.models import User
+from apps.vouchers.models import OrderVoucher, UserVoucher, Voucher
+from apps.vouchers.redemption import lock_user_vouchers, redeem_user_vouchers
+from core.testing import APITestCase, PostgresAPITestCase
+
+
+class ListUserVouchersTests(APITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = await User.create(username='customer', phone_number='0800', password='')
+        voucher = await Voucher.create(
+            code='HEMAT10', description='Rp10.000 off', points_cost=100, value=Decimal(10000)
+        )
+        self.user_voucher = await UserVoucher.create(user=self.user, voucher=voucher)
+
+    async def test_sparse_fields(self):
+        response = await self.request('GET', '/api/vouchers/user/?fields=id,is_used', self.user)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'id': str(self.user_voucher.id), 'is_used': False}])
+
+    async def test_sparse_fields_with_expanded_voucher(self):
+        response = await self.request('GET', '/api/vouchers/user/?fields=id&expand=voucher', self.user)
+
+        self.assertEqual(response.status_code, 200)
+        [user_voucher] = response.json()['results']
+        self.assertEqual(set(user_voucher), {'id', 'voucher'})
+        self.assertEqual(user_voucher['voucher']['code'], 'HEMAT10')
+
+
+class RedeemVouchersMixin:
+    async def set_up_order(self):
+        self.user = await User.create(username='customer', phone_number='0800', password='')
+        self.restaurant = await Restaurant.create(name='Warung')
+        self.item = await MenuItem.create(
+            restaurant=self.restaurant, name='Nasi goreng', original_price=Decimal(25000)
+        )
+        self.voucher = await Voucher.create(
+            code='HEMAT10', description='Rp10.000 off', points_cost=100, value=Decimal(10000)
+        )
+        self.user_voucher = await UserVoucher.create(user=self.user, voucher=self.voucher)
+        self.order = await Order.create(
+            user=self.user, restaurant=self.restaurant, subtotal=Decimal(50000), total_amount=Decimal(50000)
+        )
+
+    async def apply_voucher(self):
+        return await self.request('POST', '/api/vouchers/apply/', self.user, json={
+            'order_id': str(self.order.id),
+            'user_voucher_id': str(self.user_voucher.id),
+        })
+
+    async def checkout(self):
+        return await self.request('POST', '/api/orders/create/', self.user, json={
+            'restaurant': str(self.restaurant.id),
+            'order_mode': 'takeaway',
+            'items': [{'item_id': str(self.item.id), 'quantity': 2}],
+            'voucher_ids': [str(self.voucher.id)],
+        })
+
+
+class ApplyVoucherTests(RedeemVouchersMixin, APITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.set_up_order()
+
+    async def test_applies_the_discount(self):
+        response = await self.apply_voucher()
+
+        self.assertEqual(response.status_code, 201)
+        order = await Order.get(id=self.order.id)
+        self.assertEqual((order.discount_amount, order.total_amount), (Decimal(10000), Decimal(40000)))
+        self.assertEqual(order.status, 'in_progress')
+
+    async def test_redeems_a_voucher_once(self):
+        self.assertEqual((await self.apply_voucher()).status_code, 201)
+
+        response = await self.apply_voucher()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Voucher not found or already used'})
+        self.assertEqual((await Order.get(id=self.order.id)).total_amount, Decimal(40000))
+
+    async def test_rejects_an_order_that_is_no_longer_in_progress(self):
+        response = await self.request('POST', f'/api/orders/{self.order.id}/cancel/', self.user)
+        self.assertEqual(response.status_code, 200)
+
+        response = await self.apply_voucher()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Vouchers can only be applied to orders in progress'})
+        order = await Order.get(id=self.order.id)
+        self.assertEqual((order.status, order.total_amount), ('cancelled', Decimal(50000)))
+        self.assertFalse((await UserVoucher.get(id=self.user_voucher.id)).is_used)
+
+    async def test_checkout_redeems_the_voucher(self):
+        response = await self.checkout()
+
+        self.assertEqual(response.status_code, 201)
+        user_voucher = await UserVoucher.get(id=self.user_voucher.id)
+        self.assertTrue(user_voucher.is_used)
+        self.assertEqual(str(user_voucher.order_id), response.json()['id'])
+
+        response = await self.checkout()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': f'Vouchers not available: {self.voucher.id}'})
+
+
+class ConcurrentRedemptionTests(RedeemVouchersMixin, PostgresAPITestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.set_up_order()
+
+    async def test_a_locked_voucher_is_skipped_by_other_checkouts(self):
+        locked, released = asyncio.Event(), asyncio.Event()
+
+        async def hold_lock():
+            async with in_transaction():
+                self.assertEqual(list(await lock_user_vouchers(self.user.id)), [self.voucher.id])
+                locked.set()
+                await released.wait()
+
+        holder = asyncio.create_task(hold_lock())
+        await locked.wait()
+        try:
+            async with in_transaction():
+                self.assertEqual(await lock_user_vouchers(self.user.id), {})
+        finally:
+            released.set()
+            await holder
+
+        async with in_transaction():
+            user_vouchers = await lock_user_vouchers(self.user.id, user_voucher_ids=[self.user_voucher.id])
+            await redeem_user_vouchers(self.order.id, user_vouchers.values(), {self.voucher.id: Decimal(10000)})
+
+        async with in_transaction():
+            self.assertEqual(await lock_user_vouchers(self.user.id), {})
+        self.assertEqual(await OrderVoucher.filter(order_id=self.order.id).count(), 1)
+
+    async def test_double_checkout_redeems_the_voucher_once(self):
+        responses = await asyncio.gather(self.checkout(), self.checkout())
+
+        self.assertEqual(sorted(response.status_code for response in responses), [201, 400])
+        [created] = [response.json() for response in responses if response.status_code == 201]
+        user_voucher = await UserVoucher.get(id=self.user_voucher.id)
+        self.assertEqual(str(user_voucher.order_id), created['id'])
+        self.assertEqual(await OrderVoucher.filter(voucher_id=self.voucher.id).count(), 1)
+
+    async def test_applying_a_voucher_never_reverts_a_cancellation(self):
+        responses = await asyncio.gather(
+            self.apply_voucher(),
+            self.request('POST', f'/api/orders/{self.order.id}/cancel/', self.user)
+        )
+
+        self.assertEqual(responses[1].status_code, 200)
+        order = await Order.get(id=self.order.id)
+        self.assertEqual(order.status, 'cancelled')
+        if responses[0].status_code == 201:
+            self.assertEqual(order.total_amount, Decimal(40000))
+        else:
+            self.assertEqual(order.total_amount, Decimal(50000))
@@ -1,40 +1,61 @@
 import uuid
 
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from adrf.decorators import api_view
+from rest_framework.decorators import permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 
 from apps.vouchers.serializers import VoucherSerializer, UserVoucherSerializer, OrderVoucherSerializer
 from apps.vouchers.services import VoucherService
+from core.conditional import not_modified, set_validators
+from core.pagination import KeysetPagination
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 async def list_vouchers(request):
-    """List all active vouchers."""
+    """List all active vouchers; ?compact=true lists only the list columns."""
     include_inactive = request.query_params.get('include_inactive', 'false').lower() == 'true'
+    compact = request.query_params.get('compact', 'false').lower() == 'true'
 
     # Only admins can see inactive vouchers
     if include_inactive and not request.user.is_staff:
         include_inactive = False
 
-    vouchers = await VoucherService.get_all_vouchers(include_inactive)
+    validators = await VoucherService.get_list_validators(include_inactive, compact)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    vouchers = await VoucherService.get_all_vouchers(
+        include_inactive,
+        projection=VoucherService.LIST_PROJECTION if compact else None
+    )
     data = await VoucherSerializer().to_representation_list(vouchers)
-    return Response(data)
+    return set_validators(Response(data), validators)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 async def list_user_vouchers(request):
-    """List vouchers owned by the current user."""
+    """List vouchers owned by the current user; ?compact=true lists the voucher terms as flat columns."""
     used = None
     if 'used' in request.query_params:
         used = request.query_params.get('used').lower() == 'true'
-
-    user_vouchers = await VoucherService.get_user_vouchers(request.user.id, used)
-    data = await UserVoucherSerializer().to_representation_list(user_vouchers)
-    return Response(data)
+    compact = request.query_params.get('compact', 'false').lower() == 'true'
+
+    serializer = UserVoucherSerializer.from_request(request)
+    paginator = KeysetPagination(request)
+    user_vouchers = await VoucherService.get_user_vouchers(
+        request.user.id,
+        used,
+        projection=VoucherService.USER_LIST_PROJECTION if compact else None,
+        paginator=paginator,
+        only=serializer.get_only_columns()
+    )
+    data = await serializer.to_representation_list(user_vouchers)
+    return paginator.get_paginated_response(data)
 
 
 @api_view(['POST'])
@@ -0,0 +1,93 @@
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.users.models import User
+
+
+@dataclass(frozen=True)
+class TokenUser:
+    """The parts of a Tortoise User requests and consumers need, shaped like a Django user."""
+    id: uuid.UUID
+    username: str
+    is_staff: bool
+
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def pk(self) -> uuid.UUID:
+        return self.id
+
+
+class UserCache:
+    """
+    Per-process cache of the active users behind access tokens.
+
+    Entries expire after ``AUTH_USER_CACHE_TTL`` seconds, so a deactivated
+    user or a changed staff flag takes effect within the TTL. Unknown and
+    inactive users are cached too, as None.
+    """
+
+    MAX_SIZE = 10000
+
+    def __init__(self):
+        self._users: Dict[str, Tuple[float, Optional[TokenUser]]] = {}
+
+    @property
+    def ttl(self) -> float:
+        return getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+    async def get(self, user_id: str) -> Optional[TokenUser]:
+        now = time.monotonic()
+        cached = self._users.get(user_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        user = await User.filter(id=user_id, is_active=True).only('id', 'username', 'is_staff').first()
+        resolved = TokenUser(user.id, user.username, user.is_staff) if user else None
+
+        if len(self._users) >= self.MAX_SIZE:
+            # Drop the expired entries, or everything if none expired
+            self._users = {key: entry for key, entry in self._users.items() if entry[0] > now}
+            if len(self._users) >= self.MAX_SIZE:
+                self._users.clear()
+        self._users[user_id] = (now + self.ttl, resolved)
+        return resolved
+
+
+token_users = UserCache()
+
+
+class JWTUserAuthentication(JWTAuthentication):
+    """
+    Authenticates API requests with JWT access tokens and the user behind them.
+
+    simplejwt loads users through the Django ORM, but users are Tortoise
+    models: the token's active user is read from token_users instead, so
+    is_staff and deactivation are checked server side rather than trusted
+    from claims. authenticate is a coroutine, which adrf's request awaits.
+    """
+
+    async def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = await token_users.get(str(user_id)) if user_id else None
+        if user is None:
+            raise AuthenticationFailed("User not found or inactive", code="user_not_found")
+
+        return user, validated_token
@@ -0,0 +1,57 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from tortoise.functions import Count, Max
+from tortoise.queryset import QuerySet
+
+
+@dataclass(frozen=True)
+class Validators:
+    """
+    ETag of a collection response.
+
+    There is no Last-Modified: a delete does not move max(updated_at), and a
+    second edit within the same second does not move its HTTP date.
+    """
+    etag: str
+
+
+async def collection_validators(queries: Iterable[QuerySet], *key: Any) -> Validators:
+    """
+    Compute the validators of a collection from ``max(updated_at)`` and the row count.
+
+    Each query contributes one aggregate over the rows it matches, so any
+    insert, update or delete changes the ETag without reading the rows
+    themselves. key adds whatever else the response depends on (query
+    parameters, the current date for date-filtered collections, ...).
+    """
+    parts = [repr(key)]
+    for query in queries:
+        row = await query.annotate(
+            last_updated=Max('updated_at'),
+            row_count=Count('id')
+        ).first().values('last_updated', 'row_count')
+
+        updated, count = (row['last_updated'], row['row_count']) if row else (None, 0)
+        parts.append(f'{query.model.__name__}:{count}:{updated.isoformat() if updated else ""}')
+
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    return Validators(etag=quote_etag(digest))
+
+
+def not_modified(request, validators: Validators) -> Optional[HttpResponseBase]:
+    """Return a 304 (or 412) response if the request's preconditions match validators."""
+    response = get_conditional_response(request, etag=validators.etag)
+    if response is not None:
+        set_validators(response, validators)
+    return response
+
+
+def set_validators(response: HttpResponseBase, validators: Validators) -> HttpResponseBase:
+    """Set the ETag header of response."""
+    response.headers['ETag'] = validators.etag
+    return response
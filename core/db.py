@@ -0,0 +1,22 @@
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+from django.conf import settings
+from tortoise import Tortoise
+
+
+T = TypeVar('T')
+
+
+async def with_tortoise(function: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+    """Await function with Tortoise initialized, closing its connections afterwards."""
+    await Tortoise.init(config=settings.TORTOISE_ORM)
+    try:
+        return await function(*args, **kwargs)
+    finally:
+        await Tortoise.close_connections()
+
+
+def run_with_tortoise(function: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+    """Run async ORM code from synchronous entry points (management commands, Celery tasks)."""
+    return asyncio.run(with_tortoise(function, *args, **kwargs))
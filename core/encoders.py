@@ -0,0 +1,189 @@
+import datetime
+import decimal
+import json
+import uuid
+from functools import lru_cache
+from json.encoder import encode_basestring
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple, Type
+
+from rest_framework.serializers import BaseSerializer
+from tortoise import fields
+from tortoise.models import Model
+
+
+class RawJSON(bytes):
+    """Already encoded JSON, written to the response as is."""
+
+
+def encode_datetime(value: datetime.datetime) -> str:
+    """Encode a datetime the way DRF's JSONEncoder does."""
+    representation = value.isoformat()
+    if value.microsecond:
+        representation = representation[:23] + representation[26:]
+    if representation.endswith('+00:00'):
+        representation = representation[:-6] + 'Z'
+    return f'"{representation}"'
+
+
+def encode_value(value: Any) -> str:
+    """Encode any value; used for values whose type is not known up front."""
+    if value is None:
+        return 'null'
+    if isinstance(value, RawJSON):
+        return value.decode()
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, float):
+        return json.dumps(value)
+    if isinstance(value, uuid.UUID):
+        return f'"{value}"'
+    if isinstance(value, datetime.datetime):
+        return encode_datetime(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return f'"{value.isoformat()}"'
+    if isinstance(value, dict):
+        return '{' + ','.join(
+            f'{encode_basestring(str(key))}:{encode_value(item)}' for key, item in value.items()
+        ) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join(encode_value(item) for item in value) + ']'
+    return encode_basestring(str(value))
+
+
+def _encode_bool(value: bool) -> str:
+    return 'true' if value else 'false'
+
+
+def _encode_quoted(value: Any) -> str:
+    return f'"{value}"'
+
+
+def _encode_date(value: datetime.date) -> str:
+    return f'"{value.isoformat()}"'
+
+
+def _encode_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+# Converters for the Tortoise field types used in this project; anything else
+# goes through encode_value.
+FIELD_ENCODERS: Tuple[Tuple[Type[fields.Field], Callable[[Any], str]], ...] = (
+    (fields.BooleanField, _encode_bool),
+    (fields.DecimalField, str),
+    (fields.IntField, str),
+    (fields.BigIntField, str),
+    (fields.SmallIntField, str),
+    (fields.UUIDField, _encode_quoted),
+    (fields.DatetimeField, encode_datetime),
+    (fields.DateField, _encode_date),
+    (fields.CharField, encode_basestring),
+    (fields.TextField, encode_basestring),
+    (fields.JSONField, _encode_json),
+)
+
+
+def resolve_field(model: Type[Model], path: str) -> fields.Field:
+    """Return the field a ``__`` separated path points to, following relations."""
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.fields_map[relation].related_model
+    return model._meta.fields_map[name]
+
+
+def _field_encoder(field: fields.Field) -> Callable[[Any], str]:
+    for field_type, encoder in FIELD_ENCODERS:
+        if isinstance(field, field_type):
+            return encoder
+    return encode_value
+
+
+class ModelEncoder:
+    """
+    Encodes the columns of one Tortoise model straight to JSON.
+
+    The field list, the getters and the per-field converters are compiled once
+    per (model, fields) pair, so encoding a row is a single attribute lookup
+    followed by one converter call per column, without building a pydantic
+    model or an intermediate dict.
+    """
+
+    def __init__(
+            self,
+            model: Type[Model],
+            field_names: Tuple[str, ...],
+            sources: Optional[Dict[str, str]] = None
+    ):
+        # sources maps output names to field paths such as "restaurant__name"
+        self.model = model
+        self.field_names = field_names
+        sources = sources or {}
+        self._keys = [encode_basestring(name) + ':' for name in field_names]
+        self._encoders = [
+            _field_encoder(resolve_field(model, sources.get(name, name)))
+            for name in field_names
+        ]
+
+        if len(field_names) == 1:
+            self._get_attrs = lambda obj: (getattr(obj, field_names[0]),)
+            self._get_items = lambda row: (row[field_names[0]],)
+        else:
+            self._get_attrs = attrgetter(*field_names)
+            self._get_items = itemgetter(*field_names)
+
+    def encode_members(self, obj: Any) -> str:
+        """Encode the columns of a model instance or a ``.values()`` row as object members."""
+        values = self._get_items(obj) if isinstance(obj, dict) else self._get_attrs(obj)
+        return ','.join(
+            key + ('null' if value is None else encoder(value))
+            for key, encoder, value in zip(self._keys, self._encoders, values)
+        )
+
+    def encode(self, obj: Any, extra: Optional[Dict[str, Any]] = None) -> RawJSON:
+        """Encode a model instance or row, plus any extra members, as a JSON object."""
+        members = self.encode_members(obj)
+        if extra:
+            extra_members = ','.join(
+                f'{encode_basestring(key)}:{encode_value(value)}' for key, value in extra.items()
+            )
+            members = f'{members},{extra_members}' if members else extra_members
+        return RawJSON(('{' + members + '}').encode())
+
+
+def model_field_names(model: Type[Model], exclude: Iterable[str] = ()) -> Tuple[str, ...]:
+    """Column names of model (foreign keys as ``<name>_id``), minus exclude."""
+    exclude = set(exclude)
+    return tuple(
+        name for name in model._meta.fields_db_projection
+        if name not in exclude
+    )
+
+
+def serializer_column_names(serializer_class) -> Tuple[str, ...]:
+    """Names of the declared fields of a DRF serializer that are not nested serializers."""
+    return tuple(
+        name for name, field in serializer_class._declared_fields.items()
+        if not isinstance(field, BaseSerializer) and not field.write_only
+    )
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: Type[Model], field_names: Tuple[str, ...]) -> ModelEncoder:
+    """Return the compiled encoder for a model and field selection."""
+    return ModelEncoder(model, field_names)
+
+
+@lru_cache(maxsize=None)
+def get_model_encoder(model: Type[Model], exclude: FrozenSet[str] = frozenset()) -> ModelEncoder:
+    """Return the compiled encoder for all columns of a model, minus exclude."""
+    return get_encoder(model, model_field_names(model, exclude))
+
+
+def encode_list(items: Iterable[bytes]) -> RawJSON:
+    """Join encoded JSON values into a JSON array."""
+    return RawJSON(b'[' + b','.join(items) + b']')
@@ -0,0 +1,71 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from tortoise.models import Model
+
+
+class BatchLoader:
+    """
+    DataLoader-style resolver for the relations a list serializer needs.
+
+    Serializers collect the foreign key ids of a whole batch of instances and
+    load each relation with a single ``id__in`` query. Results are cached on the
+    loader, so the per-instance code looks them up without touching the database
+    and the number of queries does not depend on the number of rows.
+    """
+
+    def __init__(self):
+        self._objects: Dict[Type[Model], Dict[Any, Model]] = defaultdict(dict)
+        self._children: Dict[Tuple[Type[Model], str], Dict[Any, List[Model]]] = {}
+
+    async def load_many(self, model: Type[Model], ids: Iterable[Any]) -> List[Model]:
+        """Load instances of model by primary key, querying only the ids not cached yet."""
+        cache = self._objects[model]
+        ids = {pk for pk in ids if pk is not None}
+        missing = [pk for pk in ids if pk not in cache]
+        if missing:
+            for obj in await model.filter(id__in=missing):
+                cache[obj.pk] = obj
+
+        return [cache[pk] for pk in ids if pk in cache]
+
+    async def load_related(self, instances: Iterable[Model], relation: str, model: Type[Model]) -> List[Model]:
+        """Load the objects a foreign key relation of instances points to."""
+        return await self.load_many(
+            model,
+            (getattr(instance, f"{relation}_id") for instance in instances)
+        )
+
+    async def load_children(
+            self,
+            model: Type[Model],
+            fk_field: str,
+            parent_ids: Iterable[Any],
+            order_by: Optional[str] = None
+    ) -> List[Model]:
+        """Load the rows of model referencing any of parent_ids through fk_field."""
+        parent_ids = list({pk for pk in parent_ids if pk is not None})
+        groups = self._children.setdefault((model, fk_field), {})
+        missing = [pk for pk in parent_ids if pk not in groups]
+        if missing:
+            query = model.filter(**{f"{fk_field}_id__in": missing})
+            if order_by:
+                query = query.order_by(order_by)
+
+            for pk in missing:
+                groups[pk] = []
+            for child in await query:
+                groups[getattr(child, f"{fk_field}_id")].append(child)
+                self._objects[model][child.pk] = child
+
+        return [child for pk in parent_ids for child in groups[pk]]
+
+    def get(self, model: Type[Model], pk: Any) -> Optional[Model]:
+        """Return a loaded instance of model, or None if it was not loaded."""
+        if pk is None:
+            return None
+        return self._objects[model].get(pk)
+
+    def children(self, model: Type[Model], fk_field: str, parent_id: Any) -> List[Model]:
+        """Return the loaded children of a parent, in load order."""
+        return self._children.get((model, fk_field), {}).get(parent_id, [])
@@ -0,0 +1,128 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional
+
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+
+from core.encoders import RawJSON, encode_value
+from core.projections import ProjectionRows
+
+
+class KeysetPagination:
+    """
+    Keyset (cursor) pagination for the async function views.
+
+    Pages are ordered newest first on (ordering_field, id) and the next page
+    starts strictly after the last row of the current one, so every page is a
+    single index range scan however deep the client pages. Cursors are opaque
+    base64 tokens of that last (ordering value, id) pair.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(
+            self,
+            request,
+            ordering_field: str = 'created_at',
+            page_size_query_param: Optional[str] = None
+    ):
+        self.request = request
+        self.ordering_field = ordering_field
+        if page_size_query_param:
+            self.page_size_query_param = page_size_query_param
+
+        self.page_size = self.get_page_size(request)
+        self.cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        self.next_cursor: Optional[str] = None
+
+    def get_page_size(self, request) -> int:
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+
+        if requested <= 0:
+            return page_size
+        return min(requested, self.max_page_size)
+
+    def decode_cursor(self, encoded: Optional[str]) -> Optional[tuple]:
+        """Decode a cursor into its (ordering value, id) position."""
+        if not encoded:
+            return None
+
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return datetime.fromisoformat(value), uuid.UUID(pk)
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row: Any) -> str:
+        """Encode the position of a model instance or projection row."""
+        if isinstance(row, dict):
+            value, pk = row[self.ordering_field], row['id']
+        else:
+            value, pk = getattr(row, self.ordering_field), row.id
+        position = json.dumps([value.isoformat(), str(pk)])
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    async def paginate_queryset(
+            self,
+            queryset: QuerySet,
+            fetch: Optional[Callable[[QuerySet], Awaitable[List[Any]]]] = None
+    ) -> List[Any]:
+        """
+        Return one page of queryset.
+
+        Args:
+            queryset: Unordered queryset to paginate
+            fetch: Coroutine function running the query, e.g. Projection.fetch;
+                by default the queryset is awaited
+
+        Returns:
+            The rows of the page
+        """
+        if self.cursor:
+            value, pk = self.cursor
+            queryset = queryset.filter(
+                Q(**{f'{self.ordering_field}__lt': value})
+                | Q(**{self.ordering_field: value, 'id__lt': pk})
+            )
+
+        # One extra row tells whether there is a next page
+        queryset = queryset.order_by(f'-{self.ordering_field}', '-id').limit(self.page_size + 1)
+        rows = await fetch(queryset) if fetch else await queryset
+
+        page = rows[:self.page_size]
+        if isinstance(rows, ProjectionRows):
+            page = ProjectionRows(page, rows.projection)
+
+        if len(rows) > self.page_size:
+            self.next_cursor = self.encode_cursor(page[-1])
+        return page
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.next_cursor:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data) -> Response:
+        payload = {
+            'next': self.get_next_link(),
+            'results': data,
+        }
+        if isinstance(data, RawJSON):
+            return Response(RawJSON(encode_value(payload).encode()))
+        return Response(payload)
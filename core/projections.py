@@ -0,0 +1,55 @@
+from functools import cached_property
+from typing import Dict, Mapping, Sequence, Type, Union
+
+from tortoise.models import Model
+from tortoise.queryset import QuerySet
+
+from core.encoders import ModelEncoder, RawJSON, encode_list
+
+
+class Projection:
+    """
+    A selection of columns, including joined relation columns, read with ``.values()``.
+
+    Columns are given either as field names or as a mapping of output name to
+    field path, e.g. ``{'restaurant_name': 'restaurant__name'}``. Services run
+    the projection instead of loading full model instances, and serializers
+    consume the resulting rows as plain dicts.
+    """
+
+    def __init__(self, model: Type[Model], columns: Union[Sequence[str], Mapping[str, str]]):
+        self.model = model
+        if isinstance(columns, Mapping):
+            self.columns: Dict[str, str] = dict(columns)
+        else:
+            self.columns = {column: column for column in columns}
+
+    def extend(self, columns: Union[Sequence[str], Mapping[str, str]]) -> 'Projection':
+        """Return a new projection with extra columns."""
+        extra = Projection(self.model, columns).columns
+        return Projection(self.model, {**self.columns, **extra})
+
+    async def fetch(self, query: QuerySet) -> 'ProjectionRows':
+        """Run query as a ``.values()`` query over the projected columns."""
+        plain = [name for name, path in self.columns.items() if name == path]
+        aliased = {name: path for name, path in self.columns.items() if name != path}
+        rows = await query.values(*plain, **aliased)
+        return ProjectionRows(rows, self)
+
+    @cached_property
+    def encoder(self) -> ModelEncoder:
+        """Compiled JSON encoder for the rows of this projection."""
+        return ModelEncoder(self.model, tuple(self.columns), sources=self.columns)
+
+    def to_raw_json(self, rows: Sequence[dict]) -> RawJSON:
+        """Encode rows of this projection as a JSON array."""
+        encode = self.encoder.encode
+        return encode_list(encode(row) for row in rows)
+
+
+class ProjectionRows(list):
+    """Rows returned by a projection, keeping the projection they came from."""
+
+    def __init__(self, rows, projection: Projection):
+        super().__init__(rows)
+        self.projection = projection
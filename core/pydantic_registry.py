@@ -0,0 +1,119 @@
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple, Type
+
+from django.utils.module_loading import autodiscover_modules
+from tortoise import Tortoise
+from tortoise.contrib.pydantic import pydantic_model_creator
+from tortoise.models import Model
+
+
+RegistryKey = Tuple[Type[Model], FrozenSet[str], FrozenSet[str]]
+
+
+class PydanticModelRegistry:
+    """Process-wide cache of pydantic models built from Tortoise models."""
+
+    def __init__(self):
+        self._models: Dict[RegistryKey, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+            model: Type[Model],
+            exclude: Optional[Iterable[str]] = None,
+            include: Optional[Iterable[str]] = None
+    ) -> RegistryKey:
+        """Build the registry key for a model and field selection."""
+        return model, frozenset(exclude or ()), frozenset(include or ())
+
+    @staticmethod
+    def _model_name(key: RegistryKey) -> str:
+        """Unique pydantic model name, so variants of one model never collide."""
+        model, exclude, include = key
+        name = f"{model.__module__}.{model.__name__}"
+        if exclude:
+            name += f".exclude.{'.'.join(sorted(exclude))}"
+        if include:
+            name += f".include.{'.'.join(sorted(include))}"
+        return name
+
+    def get(
+            self,
+            model: Type[Model],
+            exclude: Optional[Iterable[str]] = None,
+            include: Optional[Iterable[str]] = None
+    ):
+        """Return the pydantic model for the given selection, building it once."""
+        key = self.make_key(model, exclude, include)
+        pydantic_model = self._models.get(key)
+        if pydantic_model is not None:
+            self.hits += 1
+            return pydantic_model
+
+        with self._lock:
+            pydantic_model = self._models.get(key)
+            if pydantic_model is None:
+                self.misses += 1
+                pydantic_model = pydantic_model_creator(
+                    model,
+                    name=self._model_name(key),
+                    exclude=tuple(sorted(key[1])),
+                    include=tuple(sorted(key[2]))
+                )
+                self._models[key] = pydantic_model
+            else:
+                self.hits += 1
+
+        return pydantic_model
+
+    def warm(self, selections: Iterable[Tuple[Type[Model], Iterable[str], Iterable[str]]]) -> int:
+        """Build every given (model, exclude, include) selection ahead of time."""
+        count = 0
+        for model, exclude, include in selections:
+            key = self.make_key(model, exclude, include)
+            if key not in self._models:
+                self.get(model, exclude, include)
+                count += 1
+        return count
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current registry size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._models),
+        }
+
+    def clear(self) -> None:
+        """Drop all cached models and reset the counters."""
+        with self._lock:
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+registry = PydanticModelRegistry()
+
+
+def warm_pydantic_models() -> int:
+    """
+    Build pydantic models for every Tortoise model and serializer selection.
+
+    Must run after Tortoise.init(), since model relations are resolved there.
+
+    Returns:
+        Number of pydantic models built
+    """
+    # Import every app's serializers so all TortoiseSerializer subclasses are known
+    autodiscover_modules('serializers')
+    from core.serializers import TortoiseSerializer
+
+    selections = [
+        (model, TortoiseSerializer.get_pydantic_exclude(model), ())
+        for app in Tortoise.apps.values()
+        for model in app.values()
+    ]
+    selections.extend(TortoiseSerializer.pydantic_selections())
+    return registry.warm(selections)
@@ -0,0 +1,23 @@
+from typing import Optional
+
+from django.conf import settings
+from redis.asyncio import Redis
+
+
+_client: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """Shared asyncio Redis client of the process, connected to REDIS_URL."""
+    global _client
+    if _client is None:
+        _client = Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared client, so the next get_redis connects on the running event loop."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,13 @@
+from rest_framework.renderers import JSONRenderer
+
+from core.encoders import RawJSON
+
+
+class TortoiseJSONRenderer(JSONRenderer):
+    """JSON renderer that writes already encoded RawJSON data through unchanged."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, RawJSON):
+            return bytes(data)
+
+        return super().render(data, accepted_media_type, renderer_context)
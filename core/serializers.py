@@ -1,21 +1,205 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
 from rest_framework import serializers
-from tortoise.contrib.pydantic import pydantic_model_creator
+from tortoise import Tortoise
+
+from core.encoders import encode_list, get_encoder, get_model_encoder, model_field_names
+from core.loaders import BatchLoader
+from core.projections import ProjectionRows
+from core.pydantic_registry import registry
 
 
 class TortoiseSerializer(serializers.Serializer):
     """Base serializer for Tortoise ORM models."""
 
+    # Tortoise model name (as registered in the "models" app) and the columns
+    # left out of its pydantic model; used to warm the registry at startup.
+    # Relations are always left out, see get_pydantic_exclude.
+    model_name: Optional[str] = None
+    pydantic_exclude: FrozenSet[str] = frozenset()
+
+    # Representation members built from relations, mapped to the relation they
+    # need; relations are only loaded when one of their members is requested.
+    relation_fields: Dict[str, str] = {}
+
+    # Columns other than the foreign keys that get_related_data reads; like
+    # the foreign keys, they are loaded whatever ?fields= asks for.
+    related_columns: Tuple[str, ...] = ()
+
+    def __init__(
+            self,
+            *args,
+            raw_json: bool = False,
+            sparse_fields: Optional[Iterable[str]] = None,
+            expand: Optional[Iterable[str]] = None,
+            **kwargs
+    ):
+        # In raw JSON mode representations are encoded straight from the model
+        # columns to RawJSON bytes, for use with core.renderers.TortoiseJSONRenderer.
+        super().__init__(*args, **kwargs)
+        self.raw_json = raw_json
+
+        # sparse_fields limits the representation to the given members (None
+        # means all of them); expand adds relations on top of sparse_fields.
+        self.sparse_fields = frozenset(sparse_fields) if sparse_fields is not None else None
+        self.expand = frozenset(expand or ())
+        self.requested_relations = frozenset(
+            {self.relation_fields.get(name, name) for name in self.expand}
+            | {self.relation_fields[name] for name in self.sparse_fields or () if name in self.relation_fields}
+        )
+
+    @classmethod
+    def from_request(cls, request, **kwargs):
+        """Instantiate with the ``?fields=`` and ``?expand=`` query parameters of request."""
+        fields = request.query_params.get('fields')
+        expand = request.query_params.get('expand')
+        return cls(
+            sparse_fields=[name.strip() for name in fields.split(',') if name.strip()] if fields else None,
+            expand=[name.strip() for name in expand.split(',') if name.strip()] if expand else None,
+            **kwargs
+        )
+
+    @classmethod
+    def get_model(cls):
+        return Tortoise.apps['models'][cls.model_name]
+
+    def wants_relation(self, relation: str) -> bool:
+        """Whether a relation is needed for the requested members."""
+        return self.sparse_fields is None or relation in self.requested_relations
+
+    def get_columns(self, model) -> Tuple[str, ...]:
+        """Model columns included in the representation."""
+        columns = model_field_names(model, self.pydantic_exclude)
+        if self.sparse_fields is None:
+            return columns
+        return tuple(column for column in columns if column in self.sparse_fields)
+
+    def get_only_columns(self) -> Optional[Tuple[str, ...]]:
+        """
+        Columns a service should load with ``.only()``, or None to load them all.
+
+        These are the requested columns plus the foreign keys and
+        related_columns, which get_related_data reads on every instance.
+        """
+        if self.sparse_fields is None:
+            return None
+
+        model = self.get_model()
+        columns = set(self.get_columns(model)) | {'id'} | set(self.related_columns)
+        for relation in model._meta.fk_fields | model._meta.o2o_fields:
+            columns.add(model._meta.fields_map[relation].source_field)
+        return tuple(sorted(columns))
+
+    def nested(self, serializer_class):
+        """Instantiate a nested serializer in the same output mode."""
+        return serializer_class(raw_json=self.raw_json)
+
     @classmethod
-    async def get_pydantic_model(cls, instance, **kwargs):
+    def get_pydantic_exclude(cls, model) -> FrozenSet[str]:
+        """
+        Fields left out of the pydantic model of model: pydantic_exclude and every relation.
+
+        Pydantic models only carry columns, so from_tortoise_orm never fetches
+        related rows; relations are represented through get_related_data.
+        """
+        return cls.pydantic_exclude | frozenset(model._meta.fetch_fields)
+
+    @classmethod
+    def pydantic_selections(cls) -> List[Tuple[type, FrozenSet[str], FrozenSet[str]]]:
+        """Collect the (model, exclude, include) selections of all subclasses."""
+        selections = []
+        pending = list(cls.__subclasses__())
+        while pending:
+            subclass = pending.pop()
+            pending.extend(subclass.__subclasses__())
+            if subclass.model_name:
+                model = Tortoise.apps['models'][subclass.model_name]
+                selections.append((model, subclass.get_pydantic_exclude(model), frozenset()))
+        return selections
+
+    @classmethod
+    async def get_pydantic_model(
+            cls,
+            instance,
+            exclude: Optional[Iterable[str]] = None,
+            include: Optional[Iterable[str]] = None,
+            **kwargs
+    ):
         """Convert a Tortoise instance to a Pydantic model."""
-        pydantic_model = pydantic_model_creator(instance.__class__)
+        if exclude is None:
+            exclude = cls.get_pydantic_exclude(instance.__class__)
+        pydantic_model = registry.get(instance.__class__, exclude, include)
         return await pydantic_model.from_tortoise_orm(instance, **kwargs)
 
     @classmethod
-    async def get_pydantic_models(cls, instances, **kwargs):
+    async def get_pydantic_models(
+            cls,
+            instances,
+            exclude: Optional[Iterable[str]] = None,
+            include: Optional[Iterable[str]] = None,
+            **kwargs
+    ):
         """Convert multiple Tortoise instances to Pydantic models."""
         if not instances:
             return []
 
-        pydantic_model = pydantic_model_creator(instances[0].__class__)
-        return [await pydantic_model.from_tortoise_orm(instance, **kwargs) for instance in instances]
\ No newline at end of file
+        if exclude is None:
+            exclude = cls.get_pydantic_exclude(instances[0].__class__)
+        pydantic_model = registry.get(instances[0].__class__, exclude, include)
+        return [await pydantic_model.from_tortoise_orm(instance, **kwargs) for instance in instances]
+
+    async def load_batch(self, instances, loader: BatchLoader) -> None:
+        """Load the relations needed to represent instances; nothing by default."""
+
+    async def get_loader(self, instances, loader: Optional[BatchLoader] = None) -> BatchLoader:
+        """Return loader, or a new one with the relations of instances already loaded."""
+        if loader is None:
+            loader = BatchLoader()
+            await self.load_batch(instances, loader)
+        return loader
+
+    async def get_related_data(self, instance, loader: BatchLoader) -> Dict[str, Any]:
+        """Representation members built from loaded relations; none by default."""
+        return {}
+
+    async def to_representation(self, instance, loader: Optional[BatchLoader] = None):
+        loader = await self.get_loader([instance], loader)
+        related_data = await self.get_related_data(instance, loader)
+
+        if self.sparse_fields is not None:
+            related_data = {
+                name: value for name, value in related_data.items()
+                if name in self.sparse_fields or self.relation_fields.get(name) in self.requested_relations
+            }
+
+            # Instances may be partially loaded with .only(), so skip pydantic
+            columns = self.get_columns(instance.__class__)
+            if self.raw_json:
+                return get_encoder(instance.__class__, columns).encode(instance, related_data)
+
+            data = {column: getattr(instance, column) for column in columns}
+            data.update(related_data)
+            return data
+
+        if self.raw_json:
+            encoder = get_model_encoder(instance.__class__, self.pydantic_exclude)
+            return encoder.encode(instance, related_data)
+
+        pydantic_model = await self.get_pydantic_model(instance)
+        data = pydantic_model.dict()
+        data.update(related_data)
+        return data
+
+    async def to_representation_list(self, instances):
+        """Convert multiple instances, loading their relations in one query each."""
+        if isinstance(instances, ProjectionRows):
+            # Projection rows already carry their relation columns
+            if self.raw_json:
+                return instances.projection.to_raw_json(instances)
+            return list(instances)
+
+        loader = await self.get_loader(instances)
+        representations = [await self.to_representation(instance, loader) for instance in instances]
+        if self.raw_json:
+            return encode_list(representations)
+        return representations
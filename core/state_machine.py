@@ -0,0 +1,123 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Type
+
+from tortoise import timezone
+from tortoise.models import Model
+
+
+class StateMachine:
+    """
+    Declared status transitions of a model, applied as compare-and-set updates.
+
+    A transition is one ``UPDATE ... WHERE id = ? AND status IN (<sources>)
+    RETURNING *`` statement: the status check and the write happen atomically
+    in the database, so concurrent writers cannot both win and no row has to
+    be read first. Requires a backend supporting RETURNING (PostgreSQL, SQLite).
+    """
+
+    def __init__(self, model: Type[Model], transitions: Mapping[str, Iterable[str]], field: str = 'status'):
+        # transitions maps each state to the states it may move to
+        self.model = model
+        self.field = field
+        self.transitions: Dict[str, Tuple[str, ...]] = {
+            source: tuple(targets) for source, targets in transitions.items()
+        }
+
+    @property
+    def states(self) -> Tuple[str, ...]:
+        states = dict.fromkeys(self.transitions)
+        for targets in self.transitions.values():
+            states.update(dict.fromkeys(targets))
+        return tuple(states)
+
+    def can_transition(self, source: str, target: str) -> bool:
+        return target in self.transitions.get(source, ())
+
+    def sources(self, target: str) -> Tuple[str, ...]:
+        """States a row may be in to move to target."""
+        sources = tuple(source for source, targets in self.transitions.items() if target in targets)
+        if not sources:
+            raise ValueError(f"No transition of {self.model.__name__}.{self.field} leads to '{target}'")
+        return sources
+
+    def _db_value(self, name: str, value: Any) -> Any:
+        field = self.model._meta.fields_map[name]
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            # to_db_value would stamp the (missing) instance instead
+            return value
+        return field.to_db_value(value, None)
+
+    async def transition(
+            self,
+            pk: Any,
+            target: str,
+            filters: Optional[Dict[str, Any]] = None,
+            **values: Any
+    ) -> Optional[Model]:
+        """
+        Move a row to target if its current state allows it.
+
+        Args:
+            pk: Primary key of the row
+            target: State to move to
+            filters: Extra column equality conditions, e.g. ``{'user_id': user_id}``
+            **values: Other columns to set in the same statement
+
+        Returns:
+            The updated instance, or None if the row does not exist, does not
+            match filters or is not in a state that can move to target
+        """
+        moved = await self.transition_many(target, {'id': pk, **(filters or {})}, **values)
+        return moved[0] if moved else None
+
+    async def transition_many(
+            self,
+            target: str,
+            filters: Dict[str, Any],
+            **values: Any
+    ) -> List[Model]:
+        """
+        Move every row matching filters and allowed to move to target; return the moved rows.
+
+        A filter value that is a list, tuple or set matches any of its values.
+        """
+        connection = self.model._meta.db
+        sql, params = self._build(self.sources(target), filters, target, values, connection)
+        rows = await connection.execute_query_dict(sql, params)
+        return [self.model._init_from_db(**row) for row in rows]
+
+    def _build(self, sources, conditions, target, values, connection) -> Tuple[str, list]:
+        meta = self.model._meta
+        values = {self.field: target, **values}
+        if 'updated_at' in meta.fields_map:
+            values.setdefault('updated_at', timezone.now())
+
+        dialect = connection.capabilities.dialect
+        params: list = []
+
+        def placeholder(value: Any) -> str:
+            params.append(value)
+            return f'${len(params)}' if dialect == 'postgres' else '?'
+
+        def column(name: str) -> str:
+            return f'"{meta.fields_db_projection[name]}"'
+
+        assignments = ', '.join(
+            f'{column(name)} = {placeholder(self._db_value(name, value))}' for name, value in values.items()
+        )
+        where = []
+        for name, value in conditions.items():
+            if isinstance(value, (list, tuple, set, frozenset)):
+                # A collection matches any of its values
+                if not value:
+                    where.append('FALSE')
+                    continue
+                options = ', '.join(placeholder(self._db_value(name, option)) for option in value)
+                where.append(f'{column(name)} IN ({options})')
+            else:
+                where.append(f'{column(name)} = {placeholder(self._db_value(name, value))}')
+        where.append(
+            f'{column(self.field)} IN ({", ".join(placeholder(source) for source in sources)})'
+        )
+
+        sql = f'UPDATE "{meta.db_table}" SET {assignments} WHERE {" AND ".join(where)} RETURNING *'
+        return sql, params
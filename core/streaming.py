@@ -0,0 +1,75 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+from django.http import StreamingHttpResponse
+from tortoise.models import Model
+from tortoise.queryset import QuerySet
+
+from core.encoders import RawJSON
+
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+async def iterate_chunks(
+        query: QuerySet,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        fetch: Optional[Callable[[QuerySet], Awaitable[List[Any]]]] = None
+) -> AsyncIterator[List[Any]]:
+    """
+    Yield the rows of query in primary key order, in chunks of chunk_size.
+
+    Every chunk is read with its own keyset query starting after the last
+    primary key of the previous chunk, so only one chunk is held in memory at
+    a time, and no connection or transaction stays open between chunks: a
+    slow client downloading a streamed response never holds a pool
+    connection. Rows changed while iterating may or may not be included.
+
+    Args:
+        query: Unordered queryset to read
+        chunk_size: Number of rows per chunk
+        fetch: Coroutine function running a chunk's query, e.g. Projection.fetch;
+            by default the queryset is awaited
+    """
+    pk = query.model._meta.pk_attr
+    last_pk = None
+    while True:
+        chunk_query = query if last_pk is None else query.filter(**{f'{pk}__gt': last_pk})
+        chunk_query = chunk_query.order_by(pk).limit(chunk_size)
+        chunk = await fetch(chunk_query) if fetch else await chunk_query
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+
+        last = chunk[-1]
+        last_pk = last[pk] if isinstance(last, dict) else last.pk
+
+
+async def stream_json_array(
+        chunks: AsyncIterator[List[Model]],
+        encode_chunk: Callable[[List[Model]], Awaitable[RawJSON]]
+) -> AsyncIterator[bytes]:
+    """Encode each chunk as a JSON array and splice the arrays into one."""
+    yield b'['
+    first = True
+    async for chunk in chunks:
+        # Drop the brackets of the chunk's own array
+        body = bytes(await encode_chunk(chunk))[1:-1]
+        if not body:
+            continue
+        if not first:
+            yield b','
+        yield body
+        first = False
+    yield b']'
+
+
+def streaming_json_response(
+        chunks: AsyncIterator[List[Model]],
+        encode_chunk: Callable[[List[Model]], Awaitable[RawJSON]]
+) -> StreamingHttpResponse:
+    """Build a streaming response writing chunks as one JSON array."""
+    return StreamingHttpResponse(
+        stream_json_array(chunks, encode_chunk),
+        content_type='application/json'
+    )
@@ -0,0 +1,113 @@
+import glob
+import importlib.util
+import os
+import tempfile
+import unittest
+from types import ModuleType
+from typing import Any, Dict, List, Optional
+
+import httpx
+from django.conf import settings
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from tortoise import Tortoise
+from tortoise.backends.base.executor import EXECUTOR_CACHE
+
+from apps.payments.qr import qr_renderer
+from core.pydantic_registry import warm_pydantic_models
+from core.redis import close_redis
+
+
+class APITestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    Test case calling the ASGI application in-process, on a fresh in-memory
+    SQLite database per test.
+
+    Redis is used as configured; without it the caches in front of it are
+    skipped, as in production. Uploaded and rendered media go to a temporary
+    MEDIA_ROOT.
+    """
+
+    db_url = 'sqlite://:memory:'
+
+    async def asyncSetUp(self):
+        # The ASGI module sets up Django and builds the application on import
+        from eatsight.asgi import application
+
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media_root = media_root.name
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        await self.set_up_database()
+        warm_pydantic_models()
+
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=application), base_url='http://localhost')
+
+    async def set_up_database(self):
+        await Tortoise.init(config={**settings.TORTOISE_ORM, 'connections': {'default': self.db_url}})
+        await Tortoise.generate_schemas()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await Tortoise.close_connections()
+        # Tortoise caches insert statements by connection name, not dialect
+        EXECUTOR_CACHE.clear()
+        await close_redis()
+        qr_renderer.shutdown()
+
+    async def request(
+            self,
+            method: str,
+            url: str,
+            user: Optional[Any] = None,
+            headers: Optional[Dict[str, str]] = None,
+            **kwargs: Any
+    ) -> httpx.Response:
+        """Send a request, authenticated as user if given."""
+        headers = dict(headers or {})
+        if user:
+            headers['Authorization'] = f'Bearer {AccessToken.for_user(user)}'
+        return await self.client.request(method, url, headers=headers, **kwargs)
+
+
+class PostgresAPITestCase(APITestCase):
+    """
+    APITestCase on the PostgreSQL database TEST_DB_NAME, for the raw SQL, row
+    locks and partitions SQLite does not have.
+
+    The public schema is dropped and rebuilt from the aerich migrations for
+    every test. Skipped when TEST_DB_NAME is not set.
+    """
+
+    migrations = os.path.join(settings.BASE_DIR, 'migrations', 'models')
+
+    async def set_up_database(self):
+        if not settings.TEST_DB_NAME:
+            self.skipTest('TEST_DB_NAME is not set')
+
+        default = settings.TORTOISE_ORM['connections']['default']
+        connection = {**default, 'credentials': {**default['credentials'], 'database': settings.TEST_DB_NAME}}
+        await Tortoise.init(config={**settings.TORTOISE_ORM, 'connections': {'default': connection}})
+
+        db = Tortoise.get_connection('default')
+        await db.execute_script('DROP SCHEMA public CASCADE; CREATE SCHEMA public;')
+        for migration in self.load_migrations():
+            await db.execute_script(await migration.upgrade(db))
+
+    @classmethod
+    def load_migrations(cls) -> List[ModuleType]:
+        """The aerich migration modules, oldest first."""
+        migrations = []
+        for path in sorted(glob.glob(os.path.join(cls.migrations, '*.py')), key=cls.migration_number):
+            spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+            migration = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(migration)
+            migrations.append(migration)
+        return migrations
+
+    @staticmethod
+    def migration_number(path: str) -> int:
+        return int(os.path.basename(path).split('_', 1)[0])
@@ -3,11 +3,15 @@ from uuid import UUID
 from datetime import datetime
 
 from django.http import Http404
-from rest_framework.views import APIView
+from adrf.decorators import api_view
+from adrf.views import APIView
+from rest_framework.decorators import permission_classes
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+
+from core.websockets import websocket_metrics
 
 
 class AsyncView(APIView):
@@ -23,4 +27,11 @@ class AsyncView(APIView):
         obj = await self.service_class.get_by_id(pk, user_id)
         if obj is None:
             raise Http404
-        return obj
\ No newline at end of file
+        return obj
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+async def get_websocket_metrics(request):
+    """Websocket connections and message rates of the worker process serving the request."""
+    return Response(websocket_metrics.snapshot())
@@ -0,0 +1,54 @@
+from typing import Optional, Union
+from urllib.parse import parse_qs
+
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.authentication import TokenUser, token_users
+
+
+def get_raw_token(scope) -> Optional[str]:
+    """The access token of a websocket handshake, from ``?token=`` or the Authorization header."""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get('token'):
+        return query['token'][0]
+
+    for name, value in scope.get('headers', ()):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+                return parts[1]
+    return None
+
+
+async def get_websocket_user(scope) -> Union[TokenUser, AnonymousUser]:
+    raw_token = get_raw_token(scope)
+    if not raw_token:
+        return AnonymousUser()
+
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return AnonymousUser()
+
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    user = await token_users.get(str(user_id)) if user_id else None
+    return user or AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates websocket connections with the API's JWT access tokens.
+
+    Browsers cannot set headers on websocket handshakes, so the token may be
+    passed as ``?token=``. ``scope['user']`` is the token's active Tortoise
+    user, or AnonymousUser.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'] = await get_websocket_user(scope)
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from typing import Any, Coroutine, Dict, Set
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+
+class RateCounter:
+    """Events per second over a sliding window, kept in one-second buckets."""
+
+    def __init__(self, window: int = 60):
+        self.window = window
+        self.total = 0
+        self._buckets = [0] * window
+        self._seconds = [0] * window
+
+    def add(self, count: int = 1) -> None:
+        second = int(time.monotonic())
+        index = second % self.window
+        if self._seconds[index] != second:
+            self._seconds[index] = second
+            self._buckets[index] = 0
+        self._buckets[index] += count
+        self.total += count
+
+    def rate(self) -> float:
+        oldest = int(time.monotonic()) - self.window
+        return sum(
+            count for count, second in zip(self._buckets, self._seconds) if second > oldest
+        ) / self.window
+
+
+class WebsocketMetrics:
+    """
+    Websocket connection and message counters of this process, per consumer.
+
+    Open connections and message rates per worker process are what sizing
+    the ASGI workers depends on; see core.views.get_websocket_metrics.
+    """
+
+    def __init__(self):
+        self.open_connections: Dict[str, int] = defaultdict(int)
+        self.connections: Dict[str, RateCounter] = defaultdict(RateCounter)
+        self.received: Dict[str, RateCounter] = defaultdict(RateCounter)
+        self.sent: Dict[str, RateCounter] = defaultdict(RateCounter)
+        self.started_at = time.time()
+
+    def connection_opened(self, name: str) -> None:
+        self.open_connections[name] += 1
+        self.connections[name].add()
+
+    def connection_closed(self, name: str) -> None:
+        self.open_connections[name] -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        names = sorted(set(self.open_connections) | set(self.received) | set(self.sent))
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started_at),
+            'open_connections': sum(self.open_connections.values()),
+            'consumers': {
+                name: {
+                    'open_connections': self.open_connections[name],
+                    'connections_total': self.connections[name].total,
+                    'connections_per_second': round(self.connections[name].rate(), 2),
+                    'received_total': self.received[name].total,
+                    'received_per_second': round(self.received[name].rate(), 2),
+                    'sent_total': self.sent[name].total,
+                    'sent_per_second': round(self.sent[name].rate(), 2),
+                }
+                for name in names
+            },
+        }
+
+
+websocket_metrics = WebsocketMetrics()
+
+
+class TrackedWebsocketConsumer(AsyncWebsocketConsumer):
+    """
+    Websocket consumer that owns its background tasks and reports metrics.
+
+    Tasks started with create_task are cancelled when the socket closes, so
+    no work outlives its connection. Connections and messages are counted in
+    websocket_metrics under the consumer's class name.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tasks: Set[asyncio.Task] = set()
+
+    @property
+    def metrics_name(self) -> str:
+        return type(self).__name__
+
+    def create_task(self, coroutine: Coroutine) -> asyncio.Task:
+        """Run coroutine in the background until it finishes or the socket closes."""
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def websocket_connect(self, message):
+        websocket_metrics.connection_opened(self.metrics_name)
+        await super().websocket_connect(message)
+
+    async def websocket_receive(self, message):
+        websocket_metrics.received[self.metrics_name].add()
+        await super().websocket_receive(message)
+
+    async def websocket_disconnect(self, message):
+        for task in list(self.tasks):
+            task.cancel()
+        websocket_metrics.connection_closed(self.metrics_name)
+        await super().websocket_disconnect(message)
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        if text_data is not None or bytes_data is not None:
+            websocket_metrics.sent[self.metrics_name].add()
+        await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
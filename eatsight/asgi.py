@@ -1,12 +1,16 @@
 import os
 
 import django
-from channels.routing import ProtocolTypeRouter
+from channels.routing import ProtocolTypeRouter, URLRouter
 # Import settings after Django setup
 from django.conf import settings
 from django.core.asgi import get_asgi_application
 from tortoise import Tortoise
 
+from apps.payments.events import payment_status_listener
+from apps.payments.qr import qr_renderer
+from core.pydantic_registry import warm_pydantic_models
+
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eatsight.settings.development')
 django.setup()
@@ -18,6 +22,15 @@ async def init_tortoise():
     if settings.DEBUG:
         await Tortoise.generate_schemas(safe=True)
 
+    # Build all serializer pydantic models once, before the first request
+    warm_pydantic_models()
+
+    # Start the QR rendering workers before the first payment needs them
+    qr_renderer.start()
+
+    # Relay payment status changes to this process' websockets
+    payment_status_listener.start()
+
 
 # Create a proper ASGI application with lifecycle events
 class TortoiseInitASGI:
@@ -27,15 +40,20 @@ class TortoiseInitASGI:
 
     async def __call__(self, scope, receive, send):
         if scope["type"] == "lifespan":
-            message = await receive()
-            if message["type"] == "lifespan.startup":
-                # Initialize Tortoise on startup
-                await init_tortoise()
-                await send({"type": "lifespan.startup.complete"})
-            elif message["type"] == "lifespan.shutdown":
-                # Close Tortoise connections on shutdown
-                await Tortoise.close_connections()
-                await send({"type": "lifespan.shutdown.complete"})
+            # One call handles the whole lifespan: startup, then shutdown
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    # Initialize Tortoise on startup
+                    await init_tortoise()
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    # Close Tortoise connections on shutdown
+                    await payment_status_listener.stop()
+                    await Tortoise.close_connections()
+                    qr_renderer.shutdown()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
         else:
             # Handle regular requests
             await self.app(scope, receive, send)
@@ -44,13 +62,17 @@ class TortoiseInitASGI:
 # Create the Django ASGI application
 django_application = get_asgi_application()
 
-# Define the main application
+# Consumers import models and services, so only after Django is set up
+from apps.orders.routing import websocket_urlpatterns as order_websocket_urlpatterns  # noqa: E402
+from apps.payments.routing import websocket_urlpatterns as payment_websocket_urlpatterns  # noqa: E402
+from core.websocket_auth import JWTAuthMiddleware  # noqa: E402
+
+# Define the main application; websockets authenticate with the API's JWTs
 application = ProtocolTypeRouter({
     "http": django_application,
-    # Uncomment when ready for websockets
-    # "websocket": AuthMiddlewareStack(
-    #     URLRouter(websocket_urlpatterns)
-    # ),
+    "websocket": JWTAuthMiddleware(
+        URLRouter(order_websocket_urlpatterns + payment_websocket_urlpatterns)
+    ),
 })
 
 # Wrap the application with Tortoise initialization middleware
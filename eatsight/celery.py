@@ -0,0 +1,11 @@
+import os
+
+from celery import Celery
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eatsight.settings.development')
+
+# Run with: celery -A eatsight.celery worker --beat --scheduler django_celery_beat.schedulers:DatabaseScheduler
+app = Celery('eatsight')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -108,6 +108,10 @@ TORTOISE_ORM = {
     "use_tz": True,
 }
 
+# PostgreSQL database, on the server above, that the PostgreSQL-only tests
+# rebuild from the migrations for every test; they are skipped without it
+TEST_DB_NAME = os.environ.get('TEST_DB_NAME')
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -143,12 +147,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework settings
 REST_FRAMEWORK = {
+    # JWTs resolved to their active Tortoise user, see core.authentication
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.JWTUserAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Renders serializer RawJSON output (raw_json=True) without re-encoding it
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.TortoiseJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
@@ -169,6 +179,12 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Redis used for application caches
+REDIS_URL = os.environ.get(
+    'REDIS_URL',
+    f"redis://{os.environ.get('REDIS_HOST', 'localhost')}:{os.environ.get('REDIS_PORT', 6379)}/0"
+)
+
 # Channels configuration
 CHANNEL_LAYERS = {
     'default': {
@@ -180,5 +196,59 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Seconds the user behind an access token (API or websocket) is cached
+# before it is read again
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
+
+# Orders
+# Seconds a restaurant's cached price index is trusted before it is reloaded
+ORDER_PRICE_INDEX_TTL = int(os.environ.get('ORDER_PRICE_INDEX_TTL', 60))
+
+# Seconds a serialized order detail stays in Redis, and how many of them each
+# process keeps in memory in front of Redis
+ORDER_CACHE_TTL = int(os.environ.get('ORDER_CACHE_TTL', 300))
+ORDER_CACHE_LOCAL_SIZE = int(os.environ.get('ORDER_CACHE_LOCAL_SIZE', 1024))
+
+# Monthly partitions of the order tables: months created ahead of time, and
+# months kept before archive_order_partitions moves them to the archive schema
+ORDER_PARTITION_MONTHS_AHEAD = int(os.environ.get('ORDER_PARTITION_MONTHS_AHEAD', 3))
+ORDER_PARTITION_RETENTION_MONTHS = int(os.environ.get('ORDER_PARTITION_RETENTION_MONTHS', 12))
+
+# Seconds the sales rollup stays behind the clock, so rows of transactions
+# that are still open are picked up by the next run
+SALES_ROLLUP_LAG = int(os.environ.get('SALES_ROLLUP_LAG', 60))
+
+# Payments
+# Worker processes rendering QR code images
+QR_RENDER_WORKERS = int(os.environ.get('QR_RENDER_WORKERS', 2))
+
+# Longest a payment status long poll is held open, in seconds
+PAYMENT_STATUS_WAIT_TIMEOUT = float(os.environ.get('PAYMENT_STATUS_WAIT_TIMEOUT', 25))
+
+# Overdue pending payments expired per statement by the expiry sweeper
+PAYMENT_EXPIRY_BATCH_SIZE = int(os.environ.get('PAYMENT_EXPIRY_BATCH_SIZE', 500))
+
+# Celery
+CELERY_BROKER_URL = os.environ.get(
+    'CELERY_BROKER_URL',
+    f"redis://{os.environ.get('REDIS_HOST', 'localhost')}:{os.environ.get('REDIS_PORT', 6379)}/1"
+)
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'rollup-daily-sales': {
+        'task': 'apps.orders.tasks.rollup_daily_sales',
+        'schedule': 300.0,
+    },
+    'ensure-order-partitions': {
+        'task': 'apps.orders.tasks.ensure_order_partitions',
+        'schedule': 86400.0,
+    },
+    'expire-overdue-payments': {
+        'task': 'apps.payments.tasks.expire_overdue_payments',
+        'schedule': 60.0,
+    },
+}
@@ -1,7 +1,11 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from core.views import get_websocket_metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
@@ -17,6 +21,12 @@ urlpatterns = [
     path('api/vouchers/', include('apps.vouchers.urls')),
     path('api/reviews/', include('apps.reviews.urls')),
 
+    # Operations
+    path('api/metrics/websockets/', get_websocket_metrics, name='websocket_metrics'),
+
     # GraphQL endpoint (will implement async version later)
     # path('graphql/', include('graphql_api.urls')),
-]
\ No newline at end of file
+]
+
+# Uploaded and generated media (e.g. QR codes); served by the web server in production
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,244 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "otp_verifications" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "phone_number" VARCHAR(20) NOT NULL,
+    "otp_code" VARCHAR(6) NOT NULL,
+    "is_verified" BOOL NOT NULL DEFAULT False,
+    "verification_attempts" INT NOT NULL DEFAULT 0,
+    "expires_at" TIMESTAMPTZ NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "idx_otp_verific_phone_n_049e9d" ON "otp_verifications" ("phone_number");
+COMMENT ON TABLE "otp_verifications" IS 'Model for storing OTP verification requests';
+CREATE TABLE IF NOT EXISTS "users" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "username" VARCHAR(50) NOT NULL UNIQUE,
+    "email" VARCHAR(100) UNIQUE,
+    "password" VARCHAR(128) NOT NULL,
+    "phone_number" VARCHAR(20) NOT NULL UNIQUE,
+    "profile_image" VARCHAR(255),
+    "total_points" INT NOT NULL DEFAULT 0,
+    "is_active" BOOL NOT NULL DEFAULT True,
+    "is_staff" BOOL NOT NULL DEFAULT False,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS "authentication" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "auth_provider" VARCHAR(20) NOT NULL,
+    "auth_token" VARCHAR(255),
+    "last_login" TIMESTAMPTZ,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "user_id" UUID NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_authenticat_user_id_2f73ce" UNIQUE ("user_id", "auth_provider")
+);
+CREATE TABLE IF NOT EXISTS "restaurants" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "name" VARCHAR(100) NOT NULL,
+    "description" TEXT,
+    "image_url" VARCHAR(255),
+    "rating" DECIMAL(3,1),
+    "location" VARCHAR(255),
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS "tables" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "table_number" VARCHAR(10) NOT NULL,
+    "capacity" INT,
+    "is_occupied" BOOL NOT NULL DEFAULT False,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "restaurant_id" UUID NOT NULL REFERENCES "restaurants" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_tables_restaur_37c3bf" UNIQUE ("restaurant_id", "table_number")
+);
+CREATE TABLE IF NOT EXISTS "menu_items" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "name" VARCHAR(100) NOT NULL,
+    "description" TEXT,
+    "image_url" VARCHAR(255),
+    "original_price" DECIMAL(10,2) NOT NULL,
+    "discounted_price" DECIMAL(10,2),
+    "points_required" INT,
+    "is_active" BOOL NOT NULL DEFAULT True,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "restaurant_id" UUID NOT NULL REFERENCES "restaurants" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "menu_item_options" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "option_group" VARCHAR(50),
+    "name" VARCHAR(100) NOT NULL,
+    "price" DECIMAL(10,2) NOT NULL DEFAULT 0,
+    "is_required" BOOL NOT NULL DEFAULT False,
+    "max_selections" INT NOT NULL DEFAULT 1,
+    "is_active" BOOL NOT NULL DEFAULT True,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "item_id" UUID NOT NULL REFERENCES "menu_items" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "menu_item_toppings" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "name" VARCHAR(100) NOT NULL,
+    "price" DECIMAL(10,2) NOT NULL DEFAULT 0,
+    "is_active" BOOL NOT NULL DEFAULT True,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "item_id" UUID NOT NULL REFERENCES "menu_items" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "payment_methods" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "type" VARCHAR(20) NOT NULL,
+    "card_number_last4" VARCHAR(4),
+    "card_brand" VARCHAR(20),
+    "holder_name" VARCHAR(100),
+    "is_default" BOOL NOT NULL DEFAULT False,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "user_id" UUID NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "orders" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "status" VARCHAR(20) NOT NULL DEFAULT 'in_progress',
+    "order_mode" VARCHAR(20) NOT NULL DEFAULT 'dine_in',
+    "subtotal" DECIMAL(10,2) NOT NULL,
+    "order_fee" DECIMAL(10,2) NOT NULL DEFAULT 0,
+    "discount_amount" DECIMAL(10,2) NOT NULL DEFAULT 0,
+    "total_amount" DECIMAL(10,2) NOT NULL,
+    "is_reviewed" BOOL NOT NULL DEFAULT False,
+    "order_date" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "payment_method_id" UUID REFERENCES "payment_methods" ("id") ON DELETE CASCADE,
+    "restaurant_id" UUID NOT NULL REFERENCES "restaurants" ("id") ON DELETE CASCADE,
+    "table_id" UUID REFERENCES "tables" ("id") ON DELETE CASCADE,
+    "user_id" UUID NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "order_items" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "quantity" INT NOT NULL DEFAULT 1,
+    "price" DECIMAL(10,2) NOT NULL,
+    "special_instructions" TEXT,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "item_id" UUID NOT NULL REFERENCES "menu_items" ("id") ON DELETE CASCADE,
+    "order_id" UUID NOT NULL REFERENCES "orders" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "order_item_options" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "quantity" INT NOT NULL DEFAULT 1,
+    "price" DECIMAL(10,2) NOT NULL DEFAULT 0,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "option_id" UUID NOT NULL REFERENCES "menu_item_options" ("id") ON DELETE CASCADE,
+    "order_item_id" UUID NOT NULL REFERENCES "order_items" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "order_item_toppings" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "quantity" INT NOT NULL DEFAULT 1,
+    "price" DECIMAL(10,2) NOT NULL DEFAULT 0,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "order_item_id" UUID NOT NULL REFERENCES "order_items" ("id") ON DELETE CASCADE,
+    "topping_id" UUID NOT NULL REFERENCES "menu_item_toppings" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "payments" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "payment_type" VARCHAR(20) NOT NULL,
+    "amount" DECIMAL(10,2) NOT NULL,
+    "status" VARCHAR(20) NOT NULL DEFAULT 'pending',
+    "transaction_id" VARCHAR(100),
+    "reference_number" VARCHAR(100),
+    "payment_deadline" TIMESTAMPTZ,
+    "payment_date" TIMESTAMPTZ,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "order_id" UUID NOT NULL REFERENCES "orders" ("id") ON DELETE CASCADE,
+    "payment_method_id" UUID REFERENCES "payment_methods" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "payment_verifications" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "verification_type" VARCHAR(20) NOT NULL,
+    "verification_status" VARCHAR(20) NOT NULL DEFAULT 'pending',
+    "verification_message" TEXT,
+    "cashier_name" VARCHAR(100),
+    "verified_at" TIMESTAMPTZ,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "table_id" UUID REFERENCES "tables" ("id") ON DELETE CASCADE,
+    "payment_id" UUID NOT NULL UNIQUE REFERENCES "payments" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "qr_codes" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "qr_data" TEXT NOT NULL,
+    "qr_image_url" VARCHAR(255),
+    "is_downloaded" BOOL NOT NULL DEFAULT False,
+    "is_shared" BOOL NOT NULL DEFAULT False,
+    "expiry_time" TIMESTAMPTZ NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "payment_id" UUID NOT NULL UNIQUE REFERENCES "payments" ("id") ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS "vouchers" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "code" VARCHAR(20) NOT NULL UNIQUE,
+    "description" VARCHAR(255) NOT NULL,
+    "points_cost" INT NOT NULL,
+    "value" DECIMAL(10,2) NOT NULL,
+    "discount_percentage" DECIMAL(5,2),
+    "expiry_date" DATE,
+    "is_active" BOOL NOT NULL DEFAULT True,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+COMMENT ON TABLE "vouchers" IS 'Vouchers that can be redeemed with points.';
+CREATE TABLE IF NOT EXISTS "user_vouchers" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "is_used" BOOL NOT NULL DEFAULT False,
+    "date_acquired" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "order_id" UUID REFERENCES "orders" ("id") ON DELETE CASCADE,
+    "user_id" UUID NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    "voucher_id" UUID NOT NULL REFERENCES "vouchers" ("id") ON DELETE CASCADE
+);
+COMMENT ON TABLE "user_vouchers" IS 'Vouchers acquired by users.';
+CREATE TABLE IF NOT EXISTS "order_vouchers" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "discount_amount" DECIMAL(10,2) NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "order_id" UUID NOT NULL REFERENCES "orders" ("id") ON DELETE CASCADE,
+    "user_voucher_id" UUID REFERENCES "user_vouchers" ("id") ON DELETE CASCADE,
+    "voucher_id" UUID NOT NULL REFERENCES "vouchers" ("id") ON DELETE CASCADE
+);
+COMMENT ON TABLE "order_vouchers" IS 'Vouchers applied to orders.';
+CREATE TABLE IF NOT EXISTS "testimonials" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "rating" INT NOT NULL,
+    "comments" TEXT,
+    "feedback_categories" JSONB NOT NULL,
+    "date" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "order_id" UUID REFERENCES "orders" ("id") ON DELETE CASCADE,
+    "restaurant_id" UUID NOT NULL REFERENCES "restaurants" ("id") ON DELETE CASCADE,
+    "user_id" UUID NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE
+);
+COMMENT ON TABLE "testimonials" IS 'Restaurant reviews and ratings.';
+CREATE TABLE IF NOT EXISTS "aerich" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "version" VARCHAR(255) NOT NULL,
+    "app" VARCHAR(100) NOT NULL,
+    "content" JSONB NOT NULL
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        """
@@ -0,0 +1,17 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_orders_user_id_505d61" ON "orders" ("user_id", "created_at", "id");
+        CREATE INDEX IF NOT EXISTS "idx_payments_order_i_37170a" ON "payments" ("order_id", "created_at", "id");
+        CREATE INDEX IF NOT EXISTS "idx_user_vouche_user_id_c1b878" ON "user_vouchers" ("user_id", "created_at", "id");
+        CREATE INDEX IF NOT EXISTS "idx_testimonial_restaur_764c32" ON "testimonials" ("restaurant_id", "date", "id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_user_vouche_user_id_c1b878";
+        DROP INDEX IF EXISTS "idx_testimonial_restaur_764c32";
+        DROP INDEX IF EXISTS "idx_payments_order_i_37170a";
+        DROP INDEX IF EXISTS "idx_orders_user_id_505d61";"""
@@ -0,0 +1,31 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "order_summaries" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "restaurant_id" UUID NOT NULL,
+    "restaurant_name" VARCHAR(100) NOT NULL,
+    "status" VARCHAR(20) NOT NULL DEFAULT 'in_progress',
+    "order_mode" VARCHAR(20) NOT NULL DEFAULT 'dine_in',
+    "table_number" VARCHAR(10),
+    "item_count" INT NOT NULL DEFAULT 0,
+    "item_preview" VARCHAR(255) NOT NULL DEFAULT '',
+    "subtotal" DECIMAL(10,2) NOT NULL,
+    "order_fee" DECIMAL(10,2) NOT NULL DEFAULT 0,
+    "discount_amount" DECIMAL(10,2) NOT NULL DEFAULT 0,
+    "total_amount" DECIMAL(10,2) NOT NULL,
+    "payment_status" VARCHAR(20),
+    "is_reviewed" BOOL NOT NULL DEFAULT False,
+    "created_at" TIMESTAMPTZ NOT NULL,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "user_id" UUID NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_order_summa_user_id_ac3b3c" ON "order_summaries" ("user_id", "created_at", "id");
+COMMENT ON TABLE "order_summaries" IS 'Denormalized order history row, one per order.';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "order_summaries";"""
@@ -0,0 +1,42 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "menu_item_daily_sales" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "day" DATE NOT NULL,
+    "quantity" INT NOT NULL DEFAULT 0,
+    "revenue" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "item_id" UUID NOT NULL REFERENCES "menu_items" ("id") ON DELETE CASCADE,
+    "restaurant_id" UUID NOT NULL REFERENCES "restaurants" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_menu_item_d_item_id_17876c" UNIQUE ("item_id", "day")
+);
+CREATE INDEX IF NOT EXISTS "idx_menu_item_d_restaur_b5eab6" ON "menu_item_daily_sales" ("restaurant_id", "day");
+COMMENT ON TABLE "menu_item_daily_sales" IS 'Quantity and line revenue (before options, toppings and discounts) of one menu item on one day.';
+        CREATE TABLE IF NOT EXISTS "restaurant_daily_sales" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "day" DATE NOT NULL,
+    "order_count" INT NOT NULL DEFAULT 0,
+    "subtotal" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "order_fee" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "discount_amount" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "total_amount" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "updated_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "restaurant_id" UUID NOT NULL REFERENCES "restaurants" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_restaurant__restaur_1e0eed" UNIQUE ("restaurant_id", "day")
+);
+COMMENT ON TABLE "restaurant_daily_sales" IS 'Completed-order totals of one restaurant on one (local) day.';
+        CREATE TABLE IF NOT EXISTS "rollup_watermarks" (
+    "name" VARCHAR(50) NOT NULL PRIMARY KEY,
+    "processed_until" TIMESTAMPTZ NOT NULL
+);
+COMMENT ON TABLE "rollup_watermarks" IS 'Position up to which a rollup job has processed its source rows.';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "menu_item_daily_sales";
+        DROP TABLE IF EXISTS "rollup_watermarks";
+        DROP TABLE IF EXISTS "restaurant_daily_sales";"""
@@ -0,0 +1,197 @@
+from tortoise import BaseDBAsyncClient
+
+
+# Monthly range partitioning of the order tables on created_at.
+#
+# A partitioned table's primary key must contain the partition key, so the
+# primary keys become (id, created_at) and nothing can reference these tables
+# by id alone. The foreign keys pointing at them are dropped, and the models
+# declare those relations with db_constraint=False: order_items.order,
+# order_item_options/order_item_toppings.order_item, payments.order,
+# qr_codes/payment_verifications.payment and the order of user_vouchers,
+# order_vouchers and testimonials. Their foreign keys to unpartitioned tables
+# are added back on the partitioned tables. The indexes keep the names the
+# earlier migrations gave them. The downgrade restores the dropped foreign
+# keys, and stops if rows written meanwhile point at missing ones.
+#
+# Partitions are named <table>_YYYY_MM (UTC months); rows outside every month
+# land in <table>_default (see migration 8 for how they are moved out once
+# their month is created). Future months are created ahead of time by the
+# ensure_order_partitions task, old ones are moved out with the
+# archive_order_partitions command.
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE OR REPLACE FUNCTION create_monthly_partitions(parent text, from_time timestamptz, to_time timestamptz)
+        RETURNS integer
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            month_start timestamp := date_trunc('month', from_time AT TIME ZONE 'UTC');
+            partition_name text;
+            created integer := 0;
+        BEGIN
+            WHILE month_start AT TIME ZONE 'UTC' < to_time LOOP
+                partition_name := format('%s_%s', parent, to_char(month_start, 'YYYY_MM'));
+                IF to_regclass(quote_ident(partition_name)) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                        partition_name,
+                        parent,
+                        month_start AT TIME ZONE 'UTC',
+                        (month_start + interval '1 month') AT TIME ZONE 'UTC'
+                    );
+                    created := created + 1;
+                END IF;
+                month_start := month_start + interval '1 month';
+            END LOOP;
+            RETURN created;
+        END
+        $$;
+
+        -- orders
+        ALTER TABLE "orders" RENAME TO "orders_unpartitioned";
+        CREATE TABLE "orders" (LIKE "orders_unpartitioned" INCLUDING DEFAULTS) PARTITION BY RANGE ("created_at");
+        ALTER TABLE "orders" ADD PRIMARY KEY ("id", "created_at");
+        CREATE TABLE "orders_default" PARTITION OF "orders" DEFAULT;
+        SELECT create_monthly_partitions(
+            'orders',
+            COALESCE((SELECT min("created_at") FROM "orders_unpartitioned"), now()),
+            now() + interval '3 months'
+        );
+        INSERT INTO "orders" SELECT * FROM "orders_unpartitioned";
+        DROP TABLE "orders_unpartitioned" CASCADE;
+        CREATE INDEX "idx_orders_user_id_505d61" ON "orders" ("user_id", "created_at", "id");
+        CREATE INDEX "idx_orders_restaur_3dbd96" ON "orders" ("restaurant_id", "updated_at");
+        ALTER TABLE "orders" ADD FOREIGN KEY ("user_id") REFERENCES "users" ("id") ON DELETE CASCADE;
+        ALTER TABLE "orders" ADD FOREIGN KEY ("restaurant_id") REFERENCES "restaurants" ("id") ON DELETE CASCADE;
+        ALTER TABLE "orders" ADD FOREIGN KEY ("table_id") REFERENCES "tables" ("id") ON DELETE CASCADE;
+        ALTER TABLE "orders" ADD FOREIGN KEY ("payment_method_id") REFERENCES "payment_methods" ("id") ON DELETE CASCADE;
+
+        -- order_items
+        ALTER TABLE "order_items" RENAME TO "order_items_unpartitioned";
+        CREATE TABLE "order_items" (LIKE "order_items_unpartitioned" INCLUDING DEFAULTS) PARTITION BY RANGE ("created_at");
+        ALTER TABLE "order_items" ADD PRIMARY KEY ("id", "created_at");
+        CREATE TABLE "order_items_default" PARTITION OF "order_items" DEFAULT;
+        SELECT create_monthly_partitions(
+            'order_items',
+            COALESCE((SELECT min("created_at") FROM "order_items_unpartitioned"), now()),
+            now() + interval '3 months'
+        );
+        INSERT INTO "order_items" SELECT * FROM "order_items_unpartitioned";
+        DROP TABLE "order_items_unpartitioned" CASCADE;
+        CREATE INDEX "idx_order_items_order" ON "order_items" ("order_id");
+        ALTER TABLE "order_items" ADD FOREIGN KEY ("item_id") REFERENCES "menu_items" ("id") ON DELETE CASCADE;
+
+        -- order_item_options
+        ALTER TABLE "order_item_options" RENAME TO "order_item_options_unpartitioned";
+        CREATE TABLE "order_item_options" (LIKE "order_item_options_unpartitioned" INCLUDING DEFAULTS) PARTITION BY RANGE ("created_at");
+        ALTER TABLE "order_item_options" ADD PRIMARY KEY ("id", "created_at");
+        CREATE TABLE "order_item_options_default" PARTITION OF "order_item_options" DEFAULT;
+        SELECT create_monthly_partitions(
+            'order_item_options',
+            COALESCE((SELECT min("created_at") FROM "order_item_options_unpartitioned"), now()),
+            now() + interval '3 months'
+        );
+        INSERT INTO "order_item_options" SELECT * FROM "order_item_options_unpartitioned";
+        DROP TABLE "order_item_options_unpartitioned" CASCADE;
+        CREATE INDEX "idx_order_item_options_order_item" ON "order_item_options" ("order_item_id");
+        ALTER TABLE "order_item_options" ADD FOREIGN KEY ("option_id") REFERENCES "menu_item_options" ("id") ON DELETE CASCADE;
+
+        -- order_item_toppings
+        ALTER TABLE "order_item_toppings" RENAME TO "order_item_toppings_unpartitioned";
+        CREATE TABLE "order_item_toppings" (LIKE "order_item_toppings_unpartitioned" INCLUDING DEFAULTS) PARTITION BY RANGE ("created_at");
+        ALTER TABLE "order_item_toppings" ADD PRIMARY KEY ("id", "created_at");
+        CREATE TABLE "order_item_toppings_default" PARTITION OF "order_item_toppings" DEFAULT;
+        SELECT create_monthly_partitions(
+            'order_item_toppings',
+            COALESCE((SELECT min("created_at") FROM "order_item_toppings_unpartitioned"), now()),
+            now() + interval '3 months'
+        );
+        INSERT INTO "order_item_toppings" SELECT * FROM "order_item_toppings_unpartitioned";
+        DROP TABLE "order_item_toppings_unpartitioned" CASCADE;
+        CREATE INDEX "idx_order_item_toppings_order_item" ON "order_item_toppings" ("order_item_id");
+        ALTER TABLE "order_item_toppings" ADD FOREIGN KEY ("topping_id") REFERENCES "menu_item_toppings" ("id") ON DELETE CASCADE;
+
+        -- payments
+        ALTER TABLE "payments" RENAME TO "payments_unpartitioned";
+        CREATE TABLE "payments" (LIKE "payments_unpartitioned" INCLUDING DEFAULTS) PARTITION BY RANGE ("created_at");
+        ALTER TABLE "payments" ADD PRIMARY KEY ("id", "created_at");
+        CREATE TABLE "payments_default" PARTITION OF "payments" DEFAULT;
+        SELECT create_monthly_partitions(
+            'payments',
+            COALESCE((SELECT min("created_at") FROM "payments_unpartitioned"), now()),
+            now() + interval '3 months'
+        );
+        INSERT INTO "payments" SELECT * FROM "payments_unpartitioned";
+        DROP TABLE "payments_unpartitioned" CASCADE;
+        CREATE INDEX "idx_payments_order_i_37170a" ON "payments" ("order_id", "created_at", "id");
+        ALTER TABLE "payments" ADD FOREIGN KEY ("payment_method_id") REFERENCES "payment_methods" ("id") ON DELETE CASCADE;
+        """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- payments
+        CREATE TABLE "payments_unpartitioned" (LIKE "payments" INCLUDING DEFAULTS);
+        INSERT INTO "payments_unpartitioned" SELECT * FROM "payments";
+        DROP TABLE "payments" CASCADE;
+        ALTER TABLE "payments_unpartitioned" RENAME TO "payments";
+        ALTER TABLE "payments" ADD PRIMARY KEY ("id");
+        CREATE INDEX "idx_payments_order_i_37170a" ON "payments" ("order_id", "created_at", "id");
+        ALTER TABLE "payments" ADD FOREIGN KEY ("payment_method_id") REFERENCES "payment_methods" ("id") ON DELETE CASCADE;
+
+        -- order_item_toppings
+        CREATE TABLE "order_item_toppings_unpartitioned" (LIKE "order_item_toppings" INCLUDING DEFAULTS);
+        INSERT INTO "order_item_toppings_unpartitioned" SELECT * FROM "order_item_toppings";
+        DROP TABLE "order_item_toppings" CASCADE;
+        ALTER TABLE "order_item_toppings_unpartitioned" RENAME TO "order_item_toppings";
+        ALTER TABLE "order_item_toppings" ADD PRIMARY KEY ("id");
+        CREATE INDEX "idx_order_item_toppings_order_item" ON "order_item_toppings" ("order_item_id");
+        ALTER TABLE "order_item_toppings" ADD FOREIGN KEY ("topping_id") REFERENCES "menu_item_toppings" ("id") ON DELETE CASCADE;
+
+        -- order_item_options
+        CREATE TABLE "order_item_options_unpartitioned" (LIKE "order_item_options" INCLUDING DEFAULTS);
+        INSERT INTO "order_item_options_unpartitioned" SELECT * FROM "order_item_options";
+        DROP TABLE "order_item_options" CASCADE;
+        ALTER TABLE "order_item_options_unpartitioned" RENAME TO "order_item_options";
+        ALTER TABLE "order_item_options" ADD PRIMARY KEY ("id");
+        CREATE INDEX "idx_order_item_options_order_item" ON "order_item_options" ("order_item_id");
+        ALTER TABLE "order_item_options" ADD FOREIGN KEY ("option_id") REFERENCES "menu_item_options" ("id") ON DELETE CASCADE;
+
+        -- order_items
+        CREATE TABLE "order_items_unpartitioned" (LIKE "order_items" INCLUDING DEFAULTS);
+        INSERT INTO "order_items_unpartitioned" SELECT * FROM "order_items";
+        DROP TABLE "order_items" CASCADE;
+        ALTER TABLE "order_items_unpartitioned" RENAME TO "order_items";
+        ALTER TABLE "order_items" ADD PRIMARY KEY ("id");
+        CREATE INDEX "idx_order_items_order" ON "order_items" ("order_id");
+        ALTER TABLE "order_items" ADD FOREIGN KEY ("item_id") REFERENCES "menu_items" ("id") ON DELETE CASCADE;
+
+        -- orders
+        CREATE TABLE "orders_unpartitioned" (LIKE "orders" INCLUDING DEFAULTS);
+        INSERT INTO "orders_unpartitioned" SELECT * FROM "orders";
+        DROP TABLE "orders" CASCADE;
+        ALTER TABLE "orders_unpartitioned" RENAME TO "orders";
+        ALTER TABLE "orders" ADD PRIMARY KEY ("id");
+        CREATE INDEX "idx_orders_user_id_505d61" ON "orders" ("user_id", "created_at", "id");
+        CREATE INDEX "idx_orders_restaur_3dbd96" ON "orders" ("restaurant_id", "updated_at");
+        ALTER TABLE "orders" ADD FOREIGN KEY ("user_id") REFERENCES "users" ("id") ON DELETE CASCADE;
+        ALTER TABLE "orders" ADD FOREIGN KEY ("restaurant_id") REFERENCES "restaurants" ("id") ON DELETE CASCADE;
+        ALTER TABLE "orders" ADD FOREIGN KEY ("table_id") REFERENCES "tables" ("id") ON DELETE CASCADE;
+        ALTER TABLE "orders" ADD FOREIGN KEY ("payment_method_id") REFERENCES "payment_methods" ("id") ON DELETE CASCADE;
+
+        -- The foreign keys into the order tables, once they are unpartitioned again
+        ALTER TABLE "order_items" ADD FOREIGN KEY ("order_id") REFERENCES "orders" ("id") ON DELETE CASCADE;
+        ALTER TABLE "order_item_options" ADD FOREIGN KEY ("order_item_id") REFERENCES "order_items" ("id") ON DELETE CASCADE;
+        ALTER TABLE "order_item_toppings" ADD FOREIGN KEY ("order_item_id") REFERENCES "order_items" ("id") ON DELETE CASCADE;
+        ALTER TABLE "payments" ADD FOREIGN KEY ("order_id") REFERENCES "orders" ("id") ON DELETE CASCADE;
+        ALTER TABLE "payment_verifications" ADD FOREIGN KEY ("payment_id") REFERENCES "payments" ("id") ON DELETE CASCADE;
+        ALTER TABLE "qr_codes" ADD FOREIGN KEY ("payment_id") REFERENCES "payments" ("id") ON DELETE CASCADE;
+        ALTER TABLE "user_vouchers" ADD FOREIGN KEY ("order_id") REFERENCES "orders" ("id") ON DELETE CASCADE;
+        ALTER TABLE "order_vouchers" ADD FOREIGN KEY ("order_id") REFERENCES "orders" ("id") ON DELETE CASCADE;
+        ALTER TABLE "testimonials" ADD FOREIGN KEY ("order_id") REFERENCES "orders" ("id") ON DELETE CASCADE;
+
+        DROP FUNCTION IF EXISTS create_monthly_partitions(text, timestamptz, timestamptz);
+        """
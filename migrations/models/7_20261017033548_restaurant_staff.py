@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE "restaurant_staff" (
+    "user_id" UUID NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE,
+    "restaurants_id" UUID NOT NULL REFERENCES "restaurants" ("id") ON DELETE CASCADE
+);
+        CREATE UNIQUE INDEX "uidx_restaurant__restaur_a27d01" ON "restaurant_staff" ("restaurants_id", "user_id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "restaurant_staff";"""
@@ -0,0 +1,79 @@
+from tortoise import BaseDBAsyncClient
+
+
+# Rows of a month that arrive before its partition exists land in
+# <table>_default, and creating the partition over them fails. The month is
+# now built as a plain table, the default partition's rows of that month are
+# moved into it, and it is attached. The default partition is locked against
+# writes meanwhile, so no row of the month can slip in between.
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE OR REPLACE FUNCTION create_monthly_partitions(parent text, from_time timestamptz, to_time timestamptz)
+        RETURNS integer
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            month_start timestamp := date_trunc('month', from_time AT TIME ZONE 'UTC');
+            partition_name text;
+            default_name text := parent || '_default';
+            created integer := 0;
+        BEGIN
+            WHILE month_start AT TIME ZONE 'UTC' < to_time LOOP
+                partition_name := format('%s_%s', parent, to_char(month_start, 'YYYY_MM'));
+                IF to_regclass(quote_ident(partition_name)) IS NULL THEN
+                    EXECUTE format('LOCK TABLE %I IN EXCLUSIVE MODE', default_name);
+                    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS)', partition_name, parent);
+                    EXECUTE format(
+                        'WITH moved AS (DELETE FROM %I WHERE "created_at" >= %L AND "created_at" < %L RETURNING *) '
+                        'INSERT INTO %I SELECT * FROM moved',
+                        default_name,
+                        month_start AT TIME ZONE 'UTC',
+                        (month_start + interval '1 month') AT TIME ZONE 'UTC',
+                        partition_name
+                    );
+                    EXECUTE format(
+                        'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                        parent,
+                        partition_name,
+                        month_start AT TIME ZONE 'UTC',
+                        (month_start + interval '1 month') AT TIME ZONE 'UTC'
+                    );
+                    created := created + 1;
+                END IF;
+                month_start := month_start + interval '1 month';
+            END LOOP;
+            RETURN created;
+        END
+        $$;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE OR REPLACE FUNCTION create_monthly_partitions(parent text, from_time timestamptz, to_time timestamptz)
+        RETURNS integer
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            month_start timestamp := date_trunc('month', from_time AT TIME ZONE 'UTC');
+            partition_name text;
+            created integer := 0;
+        BEGIN
+            WHILE month_start AT TIME ZONE 'UTC' < to_time LOOP
+                partition_name := format('%s_%s', parent, to_char(month_start, 'YYYY_MM'));
+                IF to_regclass(quote_ident(partition_name)) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                        partition_name,
+                        parent,
+                        month_start AT TIME ZONE 'UTC',
+                        (month_start + interval '1 month') AT TIME ZONE 'UTC'
+                    );
+                    created := created + 1;
+                END IF;
+                month_start := month_start + interval '1 month';
+            END LOOP;
+            RETURN created;
+        END
+        $$;"""